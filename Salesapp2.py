@@ -1,28 +1,120 @@
+import time
+rerun_started = time.perf_counter()
+
 import streamlit as st
 import cohere
-import PyPDF2
-from docx import Document
-from io import BytesIO
-from docx.shared import Pt
-import re
-import pytesseract
-from PIL import Image
-from pdf2image import convert_from_bytes
-from gmail_utils import gmail_authenticate, get_recent_emails, get_attachment
+from gmail_utils import (LISTING_QUERY, PAGE_SIZE, TENDER_TERMS, build_query, gmail_authenticate, gmail_credentials,
+                         list_message_ids, thread_local_service)
+from dedup import THRESHOLD, DedupIndex
+from jobs import JobQueue
+from report import REPORT_FORMATS, REPORT_MIME_TYPES, generate_pipeline_report, generate_table_word
+from message_store import MessageStore
+from prefetch import CPU_BUDGET, LLM_BUDGET, Prefetcher
+from summary_cache import SummaryCache
+from tender_store import TenderStore
+from tracing import METRICS, TRACE_LOG, Trace
 from dotenv import load_dotenv
 import os
 import json
-
-# Write credentials.json to a temp file
-with open("credentials.json", "w") as f:
-    f.write(st.secrets["credentials"])
-
-# Write token.json to a temp file
-with open("token.json", "w") as f:
-    f.write(st.secrets["token"])
-
-cohere_api_key = st.secrets["cohere_api_key"]
-co = cohere.Client(cohere_api_key)
+import datetime
+
+# Seconds an inbox listing is served before Gmail is synced again.
+INBOX_TTL = 60
+
+# Everything below is created once per server process and shared by every session
+# and rerun; only the page itself is rebuilt on each rerun.
+@st.cache_resource
+def write_google_credentials():
+    # Write credentials.json and token.json to temp files. Doing this once also keeps
+    # the refreshed token gmail_authenticate() saves from being overwritten.
+    with open("credentials.json", "w") as f:
+        f.write(st.secrets["credentials"])
+    with open("token.json", "w") as f:
+        f.write(st.secrets["token"])
+
+@st.cache_resource
+def get_cohere_client():
+    return cohere.Client(st.secrets["cohere_api_key"])
+
+@st.cache_resource
+def get_summary_cache():
+    return SummaryCache()
+
+@st.cache_resource
+def get_dedup_index():
+    return DedupIndex()
+
+@st.cache_resource
+def get_tender_store():
+    return TenderStore()
+
+@st.cache_resource
+def get_gmail_service():
+    write_google_credentials()
+    return gmail_authenticate()
+
+@st.cache_resource
+def get_message_store():
+    return MessageStore()
+
+@st.cache_resource
+def get_prefetcher():
+    write_google_credentials()
+    return Prefetcher(co, thread_local_service(gmail_credentials()), cache=summary_cache, dedup=get_dedup_index())
+
+@st.cache_resource
+def get_job_queue():
+    write_google_credentials()
+    prefetcher = get_prefetcher()
+    queue = JobQueue(co, thread_local_service(gmail_credentials()), cache=summary_cache, dedup=get_dedup_index(),
+                     tenders=get_tender_store(), prefetch=prefetcher)
+    # Prefetching only uses time when no Generate job is running.
+    prefetcher.start(busy=queue.active_count)
+    return queue
+
+@st.cache_resource
+def startup_timings():
+    return {}
+
+@st.cache_data(ttl=INBOX_TTL, show_spinner=False)
+def load_inbox():
+    store = get_message_store()
+    trace = Trace("inbox")
+    stats = store.sync(get_gmail_service(), trace=trace)
+    trace.finish(TRACE_LOG, mode=stats["mode"])
+    return store.recent(PAGE_SIZE)
+
+@st.cache_data(ttl=INBOX_TTL, show_spinner=False)
+def load_inbox_page(query, page_token):
+    # One page of a Gmail-filtered listing: only this page's ids are listed, and only
+    # those not already in the local store are fetched.
+    service = get_gmail_service()
+    trace = Trace("inbox_page", query=query)
+    with trace.span("gmail.list_messages") as counters:
+        message_ids, next_token, estimate = list_message_ids(service, query, PAGE_SIZE, page_token)
+        counters["messages"] = len(message_ids)
+    emails = get_message_store().messages(service, message_ids, trace=trace)
+    trace.finish(TRACE_LOG)
+    return emails, next_token, estimate
+
+@st.cache_data(show_spinner=False)
+def report_docx(summary):
+    # Built once per summary rather than on every rerun that shows the download button.
+    start = time.perf_counter()
+    data = generate_table_word(summary).getvalue()
+    METRICS.observe("report.docx", time.perf_counter() - start, bytes=len(data))
+    return data
+
+@st.cache_data(show_spinner=False)
+def pipeline_report(tenders, report_format):
+    start = time.perf_counter()
+    data = generate_pipeline_report(list(tenders), report_format).getvalue()
+    METRICS.observe(f"report.pipeline_{report_format}", time.perf_counter() - start, bytes=len(data),
+                    tenders=len(tenders))
+    return data
+
+co = get_cohere_client()
+summary_cache = get_summary_cache()
 
 data = None
 
@@ -216,310 +308,306 @@ with st.sidebar:
             </ul>
         </div>
     """, unsafe_allow_html=True)
-
-def extract_text_from_scanned_pdf(pdf_file):
-    images = convert_from_bytes(pdf_file.read())
-    text = ""
-    for i, image in enumerate(images):
-        page_text = pytesseract.image_to_string(image, lang='eng')
-        text += f"\n--- Page {i+1} ---\n{page_text}"
-    return text
-
-def extract_text_from_image(image_file):
-    image = Image.open(image_file)
-    return pytesseract.image_to_string(image, lang='eng')
-
-def extract_text_from_pdf(pdf_file):
-    reader = PyPDF2.PdfReader(pdf_file)
-    return "".join(page.extract_text() or "" for page in reader.pages)
-
-def extract_text_from_docx(docx_file):
-    doc = Document(docx_file)
-    text = "\n".join(para.text for para in doc.paragraphs)
-    for table in doc.tables:
-        for row in table.rows:
-            text += "\n" + " ".join(cell.text for cell in row.cells)
-    return text
-
-def generate_table_word(summary_text):
-    lines = summary_text.splitlines()
-    heading = next((l.strip().lstrip('#').strip() for l in lines if l.strip().startswith('#')), 'Table')
-    data = []
-    key = None
-    values = []
-    i = 0
-    while i < len(lines):
-        line = lines[i].lstrip('#').strip()
-        if re.match(r'^\*\*.*\*\*$', line):
-            if key:
-                data.append((key, values))
-            key = line.strip('*').strip()
-            values = []
-        elif key and (line.startswith('-') or re.match(r'^\d+\.', line)):
-            cleaned = re.sub(r'^[-\d.]+\s*', '', line)
-            if cleaned not in values:
-                values.append(cleaned)
-        i += 1
-    if key:
-        data.append((key, values))
-    doc = Document()
-    title_para = doc.add_heading(level=1)
-    run_title = title_para.add_run(heading)
-    run_title.bold = True
-    run_title.font.size = Pt(16)
-    table = doc.add_table(rows=1, cols=2)
-    table.style = 'Table Grid'
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = 'Parameter'
-    hdr_cells[1].text = 'Description'
-    for key, vals in data:
-        row_cells = table.add_row().cells
-        row_cells[0].text = key
-        row_cells[1].text = "\n".join(vals)
-    buf = BytesIO()
-    doc.save(buf)
-    buf.seek(0)
-    return buf
-
-def stream_summary_from_cohere(text):
-    global data
-    x = ""
-    prompt = (
-        """You are an expert in analyzing and summarizing government and institutional tender documents.
-
-            Summarize the following tender document by extracting and presenting all important and relevant information that may be present. Only include the sections that are explicitly mentioned or applicable in the document. **Do not include sections that are not present, not mentioned, or not relevant to the specific tender type.**
-
-            **Make sure to use bullet points and headings to organize the information clearly and concisely.**
-            
-            1. AI Analyzed Lead Qualification and WIN Probability **MANDATORY**:
-            -According to you Calculate the Lead Qualification (High Value Lead or Low Value Lead) and WIN Probability (High, Medium, Low) based on the information provided in the document.
-            
-            2. Extract details under the following categories, underline and increase the font by 2 of the categories compared to its description. **ONLY IF AVAILABLE ELSE DO NOT GIVE**:
-            - Tender Name
-            - Tender Reference Number and ID  
-            - Name of the Issuing Organization or Authority  
-            - Tender Fee (amount, mode of payment)  
-            - EMD (Earnest Money Deposit) Details (amount, mode of payment)  
-            - Estimated Tender Value or Project Cost  
-            - Pre-bid Meeting Dates, Venue, and Registration/Link  
-            - Tender Meeting Dates and Venues (if different from Pre-bid)  
-            - Scope of Work  
-            - Modules or Work Packages  
-            - Workforce Requirements (specify onsite manpower and training manpower, if any)  
-            - Human Resource Details  
-            - Technical and Financial Eligibility Criteria  
-            - Technical and Financial Marking/Scoring Criteria  
-            - Performance Security Requirements  
-            - Implementation Timeline and Phases (Turnaround Time or TAT)  
-            - Contract Duration/Period  
-            - Project Location(s)  
-            - Existing IHMS or Software Application Details (if mentioned)  
-            - Payment Terms and Schedule  
-            - Submission Method (Online, Physical, or Hybrid)  
-            - Selection Methodology (e.g., QCBS, L1)  
-            - Cloud Service Provider (CSP) Details (if applicable)  
-            - Hardware Details (especially for hospital/lab tenders—CT/MRI/X-ray/Pathology equipment)  
-            - Technical Specifications  
-            - Radiology/Pathology Scope (if applicable)  
-            - Checklists (All the documents required, if provided)  
-            - Declarations, Undertakings, and Affidavits  
-            - OEM (Original Equipment Manufacturer) Document Requirements  
-            - Penalty Clauses and Bidder Obligations  
-            - Financial Bid Structure  
-            - Viability Gap Funding (VGF)  
-            - Special Purpose Vehicle (SPV) clauses  
-            - Land Border Sharing Clause  
-            - Mode of Payments for Tender Fee, EMD, and Other Charges  
-            - Contact Details of the Tender Issuer (email, phone, address)
-            Again, include **only the sections that are actually present in the document** and dont say not mentioned in the document, instead skip that section.
-
-            3. Check for the following criteria based on the document: **COMPULSORY**
-            -Mention if Criteria is yes or no or not able to find
-            -Mention the line/statement to provide proof for "Yes" or "No" criteria.
-            -If criteria is "not able to find", mention any similar statement that can be used as a proof if possible
-
-                1.If the Make in India clause is yes, then we are not able to participate in tender.
-                2.If the Average turnover  for last 3 Financial year is above is  30 Crore, then we cannot  participate. 
-                3.If the GEM bid is in the BOQ category, then we can participate in the BID
-                4.If the GEM Bid is in V2 Q2 category, then we cannot participate in the BID
-                5.We have only ISO certififcate ISO9001 2015 and ISO20000 2028
-                6.We have range of ADF Scanners from 20 PPM to 110 PM for A4 & A3 size documents
-                7.Overhead Scanners up to A3 size
-
-            Present the summary in a clean, organized format using clear headings or bullet points.
-            
-            4. At last give me these details seperate again: Tender Name, Tender Type (HIMS, Radiology Lab etc.), Tender registration start date and end date)
-            Finally give a Final Summary using the information extracted from the document. The summary should be concise, clear, and easy to understand. It should provide a high-level overview of the tender document, highlighting the most important aspects without going into excessive detail. Make Sure to mention if the Bid is worth to chase or not along with the reason as to why it is worth or not worth to chase the bid.
-            
-            Tender Document:\n\n"""
-        f"{text}"
-    )
-    response = co.chat_stream(
-        model="command-a-03-2025",
-        message=prompt
-    )
-    for chunk in response:
-        if hasattr(chunk, "text") and chunk.text:
-            yield chunk.text
-
-def stream_email_summary_from_cohere(email_text, has_attachment):
-    if not has_attachment:
-        # Use tender-style prompt if no attachment is present
-        prompt =(
-            """You are an expert in analyzing and summarizing government and institutional tender emails.
-
-            Summarize the following tender email by extracting and presenting all important and relevant information that may be present. Only include the sections that are explicitly mentioned or applicable in the email. **Do not include sections that are not present, not mentioned, or not relevant to the specific tender type.**
-
-            **Make sure to use bullet points and headings to organize the information clearly and concisely.**
-            
-            1. AI Analyzed Lead Qualification and WIN Probability **MANDATORY**:
-            -According to you Calculate the Lead Qualification (High Value Lead or Low Value Lead) and WIN Probability (High, Medium, Low) based on the information provided in the email.
-            
-            2. Extract details under the following categories, underline and increase the font by 2 of the categories compared to its description. **ONLY IF AVAILABLE ELSE DO NOT GIVE**:
-            - Tender Name
-            - Tender Reference Number and ID  
-            - Name of the Issuing Organization or Authority  
-            - Tender Fee (amount, mode of payment)  
-            - EMD (Earnest Money Deposit) Details (amount, mode of payment)  
-            - Estimated Tender Value or Project Cost  
-            - Pre-bid Meeting Dates, Venue, and Registration/Link  
-            - Tender Meeting Dates and Venues (if different from Pre-bid)  
-            - Scope of Work  
-            - Modules or Work Packages  
-            - Workforce Requirements (specify onsite manpower and training manpower, if any)  
-            - Human Resource Details  
-            - Technical and Financial Eligibility Criteria  
-            - Technical and Financial Marking/Scoring Criteria  
-            - Performance Security Requirements  
-            - Implementation Timeline and Phases (Turnaround Time or TAT)  
-            - Contract Duration/Period  
-            - Project Location(s)  
-            - Existing IHMS or Software Application Details (if mentioned)  
-            - Payment Terms and Schedule  
-            - Submission Method (Online, Physical, or Hybrid)  
-            - Selection Methodology (e.g., QCBS, L1)  
-            - Cloud Service Provider (CSP) Details (if applicable)  
-            - Hardware Details (especially for hospital/lab tenders—CT/MRI/X-ray/Pathology equipment)  
-            - Technical Specifications  
-            - Radiology/Pathology Scope (if applicable)  
-            - Checklists (All the documents required, if provided)  
-            - Declarations, Undertakings, and Affidavits  
-            - OEM (Original Equipment Manufacturer) Document Requirements  
-            - Penalty Clauses and Bidder Obligations  
-            - Financial Bid Structure  
-            - Viability Gap Funding (VGF)  
-            - Special Purpose Vehicle (SPV) clauses  
-            - Land Border Sharing Clause  
-            - Mode of Payments for Tender Fee, EMD, and Other Charges  
-            - Contact Details of the Tender Issuer (email, phone, address)
-            Again, include **only the sections that are actually present in the email** and dont say not mentioned in the email, instead skip that section.
-
-            3. Check for the following criteria based on the email: **COMPULSORY**
-            -Mention if Criteria is yes or no or not able to find
-            -Mention the line/statement to provide proof for "Yes" or "No" criteria.
-            -If criteria is "not able to find", mention any similar statement that can be used as a proof if possible
-
-                1.If the Make in India clause is yes, then we are not able to participate in tender.
-                2.If the Average turnover  for last 3 Financial year is above is  30 Crore, then we cannot  participate. 
-                3.If the GEM bid is in the BOQ category, then we can participate in the BID
-                4.If the GEM Bid is in V2 Q2 category, then we cannot participate in the BID
-                5.We have only ISO certififcate ISO9001 2015 and ISO20000 2028
-                6.We have range of ADF Scanners from 20 PPM to 110 PM for A4 & A3 size documents
-                7.Overhead Scanners up to A3 size
-
-            Present the summary in a clean, organized format using clear headings or bullet points.
-            
-            4. At last give me these details seperate again: Tender Name, Tender Type (HIMS, Radiology Lab etc.), Tender registration start date and end date)
-            Finally give a Final Summary using the information extracted from the email. The summary should be concise, clear, and easy to understand. It should provide a high-level overview of the tender email, highlighting the most important aspects without going into excessive detail. Make Sure to mention if the Bid is worth to chase or not along with the reason as to why it is worth or not worth to chase the bid.
-            
-            Tender Email:\n\n"""
-            f"{email_text}"
-        )
-    else:
-        # Use simple business email summary prompt
-        prompt = (
-            """Summarize the following business email in a clean and concise manner. 
-            Highlight key intent, sender, and any mentioned attachments, deadlines, required actions or any *important details* in clean bullet points .\n\n"""
-            f"Email:\n{email_text}"
-        )
-
-    response = co.chat_stream(
-        model="command-a-03-2025",
-        message=prompt
-    )
-
-    x = ""
-    for chunk in response:
-        if hasattr(chunk, "text") and chunk.text:
-            yield chunk.text
+    cache_stats = summary_cache.stats()
+    st.caption(f"Summary cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+               f"({cache_stats['entries']} cached)")
 
 # Streamlit App
 st.title("📄 Tender Document Summarizer")
 
-service = gmail_authenticate()
-emails = get_recent_emails(service)
+job_queue = get_job_queue()
+
+with st.sidebar:
+    skip_disqualified = st.toggle(
+        "Skip AI summary for disqualified tenders",
+        help="Tenders the local pre-screen finds clearly disqualified (a Make in India restriction, a minimum "
+             "turnover above 30 Crore, GEM V2 Q2) get the pre-screen report instead of a full AI summary."
+    )
+    prescreen_stats = job_queue.prescreen_stats()
+    st.caption(f"Pre-screen: {prescreen_stats['screened']} tenders screened, "
+               f"{prescreen_stats['llm_calls_saved']} LLM calls saved")
+    dedup_threshold = st.slider(
+        "Duplicate tender similarity", min_value=0.5, max_value=1.0, value=THRESHOLD, step=0.05,
+        help="Tenders at least this similar to one summarized before reuse its summary, or update it from "
+             "the changed lines only. 1.0 reuses exact copies only."
+    )
+    dedup_stats = get_dedup_index().stats()
+    st.caption(f"Duplicates: {dedup_stats['hit_rate']:.0%} of {dedup_stats['lookups']} tenders "
+               f"({dedup_stats['exact']} exact, {dedup_stats['near']} near, {dedup_stats['diff']} updated from changes); "
+               f"{dedup_stats['file_hits']} attachments reused")
+    with st.expander("⚡ Prefetch"):
+        prefetch_enabled = st.toggle(
+            "Pre-warm likely tenders", value=True,
+            help="While nothing else runs, the listed emails that look most like tenders are downloaded, extracted "
+                 "and summarized into the cache, so Generate on them returns almost at once."
+        )
+        cpu_budget = st.number_input("Extraction seconds per hour", min_value=0, value=int(CPU_BUDGET), step=60)
+        llm_budget = st.number_input("LLM calls per hour", min_value=0, value=LLM_BUDGET, step=5)
+    prefetcher = get_prefetcher()
+    prefetcher.configure(enabled=prefetch_enabled, cpu_budget=cpu_budget, llm_budget=llm_budget,
+                         skip_disqualified=skip_disqualified, dedup_threshold=dedup_threshold)
+    prefetch_stats = prefetcher.stats()
+    st.caption(f"Prefetch: {prefetch_stats['hit_rate']:.0%} of {prefetch_stats['clicks']} Generate clicks pre-warmed, "
+               f"{prefetch_stats['saved_seconds']:.1f}s saved; {prefetch_stats['ready']} ready. Wasted on unclicked "
+               f"emails: {prefetch_stats['wasted_cpu_seconds']:.0f}s extraction, {prefetch_stats['wasted_llm_calls']} LLM "
+               f"calls. This hour: {prefetch_stats['cpu_seconds']:.0f}/{prefetch_stats['cpu_budget']}s extraction, "
+               f"{prefetch_stats['llm_calls']}/{prefetch_stats['llm_budget']} LLM calls")
+    debug = st.toggle("🐞 Debug panel", help="Show per-stage timings for each job and process-wide stage metrics.")
 
 st.markdown("### ✉️ Recent Emails")
+with st.expander("🔎 Filters"):
+    col1, col2 = st.columns(2)
+    only_attachments = col1.checkbox("Only emails with attachments")
+    only_tenders = col1.checkbox("Only tender emails", help="Subject or body mentions " + ", ".join(TENDER_TERMS))
+    dates = col2.date_input("Received between", value=(), max_value=datetime.date.today())
+    domains = col2.text_input("Sender domains", placeholder="nic.in, gem.gov.in")
+query = build_query(
+    has_attachment=only_attachments,
+    after=dates[0] if dates else None,
+    # Gmail's before: is exclusive; the picked end date is not.
+    before=dates[1] + datetime.timedelta(days=1) if len(dates) > 1 else None,
+    domains=domains.split(','),
+    keywords=TENDER_TERMS if only_tenders else (),
+)
+
+# Page tokens of the pages visited so far for this query; the last one is the current page.
+if st.session_state.get("inbox_query") != query:
+    st.session_state["inbox_query"] = query
+    st.session_state["inbox_tokens"] = [None]
+page_tokens = st.session_state["inbox_tokens"]
+
+def next_page():
+    _, next_token, _ = load_inbox_page(query, page_tokens[-1])
+    if next_token:
+        page_tokens.append(next_token)
+
+def previous_page():
+    if len(page_tokens) > 1:
+        page_tokens.pop()
+
+if query == LISTING_QUERY and page_tokens == [None]:
+    # The unfiltered first page comes from the history-synced local store.
+    emails, estimate = load_inbox(), None
+else:
+    emails, _, estimate = load_inbox_page(query, page_tokens[-1])
+
 if emails:
+    existing = job_queue.latest_for_many(email['id'] for email in emails)
+    prefetcher.offer([email for email in emails if email['id'] not in existing])
     for email in emails:
         col1, col2, col3, col4 = st.columns([4, 3, 2, 2])
         col1.write(email['subject'])
         col2.write(email['from'])
         col3.write("✅ Yes" if email['has_attachment'] else "❌ No")
         if col4.button("Generate", key=email['id']):
-            with st.spinner("Processing email and attachment..."):
-                # 📧 Always show Email Summary
-                email_text = email.get('snippet') or "No snippet available."
-                email_summary_placeholder = st.empty()
-                email_summary_output = ""
-                for chunk in stream_email_summary_from_cohere(email_text, has_attachment=bool(email.get('has_attachment', False))):
-                    email_summary_output += chunk
-                    email_summary_placeholder.markdown("### 📖 Email Summary\n" + email_summary_output + "\n\n---\n")
-
-                # 📎 Try to process the attachment (if any)
-                filename, file_data = get_attachment(service, email['id'])
-                if filename and file_data:
-                    file_ext = filename.split('.')[-1].lower()
-                    file_obj = BytesIO(file_data)
-
-                    try:
-                        if file_ext == 'pdf':
-                            text = extract_text_from_pdf(file_obj)
-                            if len(text.strip()) < 100:
-                                file_obj.seek(0)
-                                text = extract_text_from_scanned_pdf(file_obj)
-                        elif file_ext == 'docx':
-                            text = extract_text_from_docx(file_obj)
-                        elif file_ext in ['png', 'jpg', 'jpeg', 'tiff']:
-                            text = extract_text_from_image(file_obj)
-                        else:
-                            st.warning(f"Unsupported attachment type: {file_ext}")
-                            text = ""
-
-                        if text.strip():
-                            summary_placeholder = st.empty()
-                            summary_text = ""
-                            for chunk in stream_summary_from_cohere(text):
-                                summary_text += chunk
-                                summary_placeholder.markdown("### 📄 Tender Summary\n" + summary_text)
-                            st.session_state["summary"] = email_summary_output + summary_text
-
-                            table_buffer = generate_table_word(email_summary_output + summary_text)
-                            st.download_button(
-                                "⬇️ Download Tender Summary",
-                                data=table_buffer,
-                                file_name=f"{filename}_summary.docx",
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                            )
-                        else:
-                            st.warning("Could not extract valid text from the attachment.")
-                    except Exception as e:
-                        st.error(f"Error processing attachment: {str(e)}")
-                else:
-                    st.info("No attachment found. Email summary above.")
+            job_queue.submit(email, skip_disqualified=skip_disqualified, dedup_threshold=dedup_threshold)
+            st.toast(f"Queued: {email['subject']}")
 
 else:
     st.info("No recent emails found or authorized.")
 
+col1, col2, col3 = st.columns([2, 6, 2])
+col1.button("← Newer", on_click=previous_page, disabled=len(page_tokens) == 1)
+col2.caption(f"Page {len(page_tokens)}" + (f" of about {-(-estimate // PAGE_SIZE)} ({estimate} emails)" if estimate else ""))
+col3.button("Older →", on_click=next_page, disabled=len(emails) < PAGE_SIZE)
+
+JOB_ICONS = {'queued': "⏳", 'running': "⚙️", 'done': "✅", 'error': "❌"}
+
+def render_job(job):
+    email = job['email']
+    details = job['details']
+    with st.container(border=True):
+        st.markdown(f"**{JOB_ICONS[job['status']]} {email['subject']}** — {job['stage']}")
+        if job['email_summary']:
+            st.markdown("### 📖 Email Summary\n" + job['email_summary'] + "\n\n---\n")
+        files = details.get('files') or []
+        if len(files) > 1:
+            with st.expander(f"📎 {len(files)} attachments ({sum(f['size'] for f in files) / 1024:.0f} KB), "
+                             f"downloaded and extracted in parallel"):
+                st.dataframe(files, hide_index=True)
+        pages = details.get('pages')
+        if pages:
+            ocr_pages = [p for p in pages if p['method'] == 'ocr']
+            with st.expander(f"Extracted {len(pages)} pages "
+                             f"({len(pages) - len(ocr_pages)} text layer, {len(ocr_pages)} OCR) "
+                             f"in {sum(p['seconds'] for p in pages):.1f}s"):
+                st.dataframe(pages, hide_index=True)
+        if details.get('warning'):
+            st.warning(details['warning'])
+        normalization = details.get('normalization')
+        if normalization and normalization['tokens_before']:
+            st.caption(
+                f"🧹 Cleaned text: ~{normalization['tokens_before']} → ~{normalization['tokens_after']} tokens "
+                f"({1 - normalization['tokens_after'] / normalization['tokens_before']:.0%} fewer; "
+                f"{normalization['boilerplate_lines']} boilerplate and {normalization['noise_lines']} noise lines dropped "
+                f"in {normalization['seconds'] * 1000:.0f} ms)"
+            )
+        screen = details.get('prescreen')
+        if screen:
+            verdict = (f"disqualified by {', '.join(screen['criteria'][name]['label'] for name in screen['disqualified'])}"
+                       if screen['disqualified'] else "no disqualifying clause found")
+            with st.expander(f"🔎 Pre-screen ({screen['seconds'] * 1000:.1f} ms): {verdict}"
+                             + (f" — {details['llm_calls_saved']} LLM call(s) saved" if details.get('llm_calls_saved') else "")):
+                for criterion in screen['criteria'].values():
+                    st.markdown(f"**{criterion['label']}**: {criterion['verdict']}")
+                    for line in criterion['evidence']:
+                        st.caption(line)
+        dedup = details.get('dedup')
+        if dedup and dedup['kind'] != 'miss':
+            source = f"\"{dedup['subject']}\"" if dedup['subject'] else "an earlier tender"
+            if dedup['kind'] == 'diff':
+                st.caption(f"♻️ {dedup['similarity']:.0%} similar to {source}: summary updated from "
+                           f"{dedup['added_lines']} added and {dedup['removed_lines']} removed lines")
+            else:
+                st.caption(f"♻️ {'Exact' if dedup['kind'] == 'exact' else 'Near'} copy of {source} "
+                           f"({dedup['similarity']:.0%} similar): summary reused")
+        if details.get('prefetched'):
+            st.caption("⚡ Attachment pre-warmed in the background")
+        read_files = [f for f in files if f['size']]
+        if read_files and all(f.get('cached') for f in read_files):
+            st.caption("♻️ Attachment text reused from identical files read before")
+        if job['summary']:
+            st.markdown("### 📄 Tender Summary\n" + job['summary'])
+        summary_stats = details.get('summary_stats')
+        if summary_stats:
+            stages = summary_stats.get("stages", [])
+            with st.expander(f"Summarized in {summary_stats.get('chunks', 1)} chunk(s): "
+                             f"{sum(s.get('input_tokens', 0) for s in stages)} input / "
+                             f"{sum(s.get('output_tokens', 0) for s in stages)} output tokens"):
+                retrieval = summary_stats.get("retrieval")
+                if retrieval:
+                    st.caption(
+                        f"🔍 Sent {retrieval['selected']} of {retrieval['passages']} passages "
+                        f"({retrieval['chars_after']:,} of {retrieval['chars_before']:,} chars) covering "
+                        f"{retrieval['categories_matched']} categories; indexed in {retrieval['index_seconds'] * 1000:.0f} ms"
+                    )
+                st.dataframe(stages, hide_index=True)
+
+        if job['status'] == 'error':
+            st.error(f"Error processing attachment: {job['error']}")
+        elif job['status'] == 'done':
+            if job['filename'] and job['summary']:
+                st.session_state["summary"] = job['email_summary'] + job['summary']
+                st.download_button(
+                    "⬇️ Download Tender Summary",
+                    data=report_docx(job['email_summary'] + job['summary']),
+                    file_name=f"{job['filename']}_summary.docx",
+                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                    key=f"download-{job['id']}"
+                )
+            elif job['filename']:
+                st.warning("Could not extract valid text from the attachment.")
+            else:
+                st.info("No attachment found. Email summary above.")
+            st.caption(
+                f"⏱️ Done in {details['total_seconds']:.1f}s — email summary {details['email_summary_seconds']:.1f}s, "
+                f"attachment download {details['download_seconds']:.1f}s + "
+                f"extraction {details['extract_seconds']:.1f}s "
+                f"(ready at {details['attachment_ready_seconds']:.1f}s, overlapped with the email summary)"
+            )
+        trace = details.get('trace')
+        if debug and trace:
+            with st.expander(f"🐞 Trace: {len(trace['spans'])} spans in {trace['seconds']:.2f}s"):
+                st.dataframe(trace['spans'], hide_index=True)
+
+# Poll while work is in flight; finished jobs stay readable across reruns and sessions.
+# `run_every` is only read on a full rerun, so the last poll reruns the app to stop polling.
+polling = job_queue.active_count() > 0
+
+@st.fragment(run_every=1 if polling else None)
+def jobs_panel():
+    if polling and not job_queue.active_count():
+        st.rerun()
+    jobs = job_queue.recent()
+    if jobs:
+        st.markdown("### 📋 Summaries")
+        for job in jobs:
+            render_job(job)
+
+jobs_panel()
+
+completed = [job for job in job_queue.completed() if job['summary'] or job['email_summary']]
+if completed:
+    with st.expander(f"📦 Export pipeline report ({len(completed)} tenders)"):
+        col1, col2 = st.columns([1, 3])
+        report_format = col1.selectbox("Format", REPORT_FORMATS, format_func=str.upper)
+        tenders = tuple({'subject': job['email']['subject'], 'from': job['email']['from'], 'filename': job['filename'],
+                         'summary': job['email_summary'] + job['summary']} for job in completed)
+        col2.download_button(
+            f"⬇️ Download {report_format.upper()} pipeline report",
+            data=pipeline_report(tenders, report_format),
+            file_name=f"tender_pipeline.{report_format}",
+            mime=REPORT_MIME_TYPES[report_format],
+        )
+
+tender_store = get_tender_store()
+if tender_store.count():
+    st.markdown("### 🗂️ Past Tenders")
+    col1, col2, col3, col4 = st.columns([4, 2, 2, 2])
+    search_text = col1.text_input("Search past tenders", placeholder="EMD 5,00,000, AIIMS, GEM/2026/B/…",
+                                  help="Searches every stored summary; no LLM calls.")
+    win = col2.selectbox("WIN probability", ["Any", "High", "Medium", "Low"])
+    lead = col3.selectbox("Lead", ["Any", "High Value Lead", "Low Value Lead"])
+    screened = col4.selectbox("Pre-screen", ["Any", "Passed", "Disqualified"])
+    received = st.date_input("Received between", value=(), max_value=datetime.date.today(), key="past_tenders_received")
+    since = until = None
+    if len(received) >= 1:
+        since = datetime.datetime.combine(received[0], datetime.time()).timestamp()
+    if len(received) == 2:
+        until = datetime.datetime.combine(received[1] + datetime.timedelta(days=1), datetime.time()).timestamp()
+    search_start = time.perf_counter()
+    results, total = tender_store.search(
+        search_text,
+        win_probability=None if win == "Any" else win,
+        lead_qualification=None if lead == "Any" else lead,
+        disqualified=None if screened == "Any" else screened == "Disqualified",
+        since=since,
+        until=until,
+    )
+    st.caption(f"{total} of {tender_store.count()} tenders in {(time.perf_counter() - search_start) * 1000:.1f} ms"
+               + (f", showing the best {len(results)}" if total > len(results) else ""))
+    if results:
+        st.dataframe([
+            {
+                "Received": datetime.datetime.fromtimestamp(r['received_at']).strftime("%Y-%m-%d"),
+                "Subject": r['subject'],
+                "Organization": r['organization'],
+                "EMD": r['emd'],
+                "Bid dates": r['bid_dates'],
+                "WIN": r['win_probability'],
+                "Lead": r['lead_qualification'],
+                "Disqualified": None if r['disqualified'] is None else bool(r['disqualified']),
+                "Match": r['snippet'],
+            }
+            for r in results
+        ], hide_index=True)
+        chosen = st.selectbox("Open a past summary", [None] + results,
+                              format_func=lambda r: "—" if r is None else r['subject'])
+        if chosen:
+            with st.container(border=True):
+                verdicts = [f"{v['label']}: {v['summary'] or v['prescreen']}" for v in chosen['verdicts'].values()
+                            if v['summary'] or v['prescreen']]
+                if verdicts:
+                    st.caption(" · ".join(verdicts))
+                st.markdown(chosen['summary'])
+
+if debug:
+    st.markdown("### 🐞 Stage Metrics")
+    st.dataframe(METRICS.snapshot(), hide_index=True)
+    col1, col2 = st.columns(2)
+    col1.download_button("Export Prometheus metrics", data=METRICS.prometheus(), file_name="metrics.prom",
+                         mime="text/plain")
+    if os.path.exists(TRACE_LOG):
+        with open(TRACE_LOG, "rb") as f:
+            col2.download_button("Export traces (JSON lines)", data=f.read(), file_name=TRACE_LOG,
+                                 mime="application/x-ndjson")
+
+# The first run in a process pays for imports, auth and client setup; later reruns should not.
+rerun_seconds = time.perf_counter() - rerun_started
+timings = startup_timings()
+timings.setdefault("cold", rerun_seconds)
+with st.sidebar:
+    st.caption(f"Startup: cold {timings['cold'] * 1000:.0f} ms, this rerun {rerun_seconds * 1000:.0f} ms")
+
 st.markdown("---")
 st.markdown("<p style='text-align:center; color: gray;'>Designed by Medimaze AI Team</p>", unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,103 @@
+# attachment_store.py
+# Attachments are spooled to temp files instead of being held as bytes: the base64 text
+# from the Gmail API is decoded a chunk at a time straight to disk, and extractors get
+# a file handle, so a large tender is never in memory as several full copies.
+import hashlib
+import os
+import re
+import tempfile
+from base64 import urlsafe_b64decode
+
+# Base64 characters decoded per step; a multiple of 4 so chunks decode independently.
+CHUNK_CHARS = 4 * 1024 * 1024
+SPOOL_PREFIX = 'attachment-'
+DATA_FIELD = re.compile(rb'"data"\s*:\s*"')
+
+
+class SpooledAttachment:
+    def __init__(self, filename, path, size, sha256=None):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        # Hex digest of the decoded bytes, taken while spooling.
+        self.sha256 = sha256
+
+    def open(self):
+        return open(self.path, 'rb')
+
+    def close(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def spool_base64(filename, data, directory=None, chunk_chars=CHUNK_CHARS):
+    # `data` is the URL-safe base64 string from attachments.get.
+    suffix = os.path.splitext(filename)[1]
+    fd, path = tempfile.mkstemp(prefix=SPOOL_PREFIX, suffix=suffix, dir=directory)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for offset in range(0, len(data), chunk_chars):
+                chunk = data[offset:offset + chunk_chars]
+                # Only the final chunk can be short of padding.
+                chunk += '=' * (-len(chunk) % 4)
+                decoded = urlsafe_b64decode(chunk)
+                digest.update(decoded)
+                size += f.write(decoded)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledAttachment(filename, path, size, digest.hexdigest())
+
+
+def spool_base64_stream(filename, chunks, directory=None):
+    # `chunks` are the raw bytes of an attachments.get JSON response as they arrive.
+    # Base64 in the "data" field is decoded to disk as it streams in, so the response
+    # is never held whole.
+    suffix = os.path.splitext(filename)[1]
+    fd, path = tempfile.mkstemp(prefix=SPOOL_PREFIX, suffix=suffix, dir=directory)
+    size = 0
+    digest = hashlib.sha256()
+    head = b''
+    carry = b''
+    started = finished = False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if finished:
+                    continue
+                if not started:
+                    head += chunk
+                    match = DATA_FIELD.search(head)
+                    if not match:
+                        continue
+                    started = True
+                    chunk = head[match.end():]
+                    head = b''
+                end = chunk.find(b'"')
+                if end != -1:
+                    chunk = chunk[:end]
+                    finished = True
+                chunk = carry + chunk
+                if finished:
+                    chunk += b'=' * (-len(chunk) % 4)
+                    carry = b''
+                else:
+                    usable = len(chunk) - len(chunk) % 4
+                    chunk, carry = chunk[:usable], chunk[usable:]
+                decoded = urlsafe_b64decode(chunk)
+                digest.update(decoded)
+                size += f.write(decoded)
+        if not finished:
+            raise ValueError('attachment response ended before the data field was complete')
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledAttachment(filename, path, size, digest.hexdigest())
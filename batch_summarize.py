@@ -0,0 +1,326 @@
+# batch_summarize.py
+# Headless entry point: summarize every unprocessed tender email in the inbox and write
+# a Word report per message, so the inbox can be worked through unattended overnight.
+#   python batch_summarize.py --output reports --concurrency 4 --llm-rate 20
+#   python batch_summarize.py --fake --messages 200 --concurrency 8     (offline benchmark)
+import argparse
+import datetime
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dedup import DB_PATH as DEDUP_DB_PATH, THRESHOLD, DedupIndex, match_details
+from gmail_utils import TENDER_TERMS, build_query, get_recent_emails
+from pipeline import fetch_and_extract
+from prescreen import prescreen, prescreen_summary
+from report import REPORT_FORMATS, generate_pipeline_report, generate_table_word
+from summarizer import (planned_llm_calls, stream_email_summary_from_cohere, stream_summary_from_cohere,
+                        stream_updated_summary)
+from tender_store import DB_PATH as TENDER_DB_PATH, TenderStore
+from tracing import METRICS, TRACE_LOG, Trace, llm_totals
+
+# The same terms as the app's "Only tender emails" filter.
+TENDER_KEYWORDS = re.compile(r'\b(?:' + '|'.join(TENDER_TERMS) + r')\b', re.I)
+MANIFEST = 'manifest.jsonl'
+METRICS_FILE = 'metrics.prom'
+PIPELINE_REPORT = 'pipeline_report.{format}'
+# The app reads the Cohere key from here (st.secrets); batch runs fall back to it.
+SECRETS_FILE = os.path.join('.streamlit', 'secrets.toml')
+# Network-level failures from the HTTP clients under the Gmail and Cohere SDKs.
+TRANSIENT_MODULES = ('httplib2', 'httpx', 'httpcore', 'requests', 'urllib3')
+
+
+class RateLimiter:
+    # Token bucket shared by all workers: at most `rate` calls per `per` seconds.
+    def __init__(self, rate, per=60.0):
+        self.capacity = max(1.0, float(rate))
+        self.fill_rate = rate / per
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, calls=1):
+        # One token per model call. A request for more than the bucket holds waits for a
+        # full bucket and leaves it in debt, so the long-run rate still holds.
+        needed = min(calls, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= needed:
+                    self.tokens -= calls
+                    return
+                wait = (needed - self.tokens) / self.fill_rate
+            time.sleep(wait)
+
+
+def is_transient(error):
+    # API and network failures are worth another attempt; anything else (a bug, a bad
+    # document) fails the email at once.
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # cohere's ApiError carries status_code, googleapiclient's HttpError resp.status.
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'resp', None), 'status', None)
+    if status is not None:
+        return int(status) == 429 or int(status) >= 500
+    return type(error).__module__.split('.')[0] in TRANSIENT_MODULES
+
+
+def with_retries(fn, retries, backoff, what):
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            delay = backoff * 2 ** attempt * (1 + random.random())
+            print(f"⚠️ {what} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def cohere_api_key():
+    key = os.environ.get('COHERE_API_KEY')
+    if not key and os.path.exists(SECRETS_FILE):
+        import tomllib
+        with open(SECRETS_FILE, 'rb') as f:
+            key = tomllib.load(f).get('cohere_api_key')
+    if not key:
+        raise SystemExit(f"Set COHERE_API_KEY (or cohere_api_key in {SECRETS_FILE}) to run without --fake.")
+    return key
+
+
+def is_tender(email):
+    return email['has_attachment'] or bool(TENDER_KEYWORDS.search(email['subject']))
+
+
+def load_processed(output_dir):
+    processed = set()
+    path = os.path.join(output_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record['status'] == 'ok':
+                    processed.add(record['id'])
+    return processed
+
+
+def safe_filename(name):
+    return re.sub(r'[^\w.-]+', '_', name).strip('_') or 'email'
+
+
+def process_email(email, get_service, co, cache, dedup, tender_store, limiter, args):
+    start = time.perf_counter()
+    message_id = email['id']
+    record = {'id': message_id, 'subject': email['subject'], 'from': email['from']}
+    trace = Trace('batch', message_id=message_id)
+
+    attachment = {'filename': None, 'text': '', 'warning': None}
+    if email['has_attachment']:
+        attachment = with_retries(
+            lambda: fetch_and_extract(get_service(), message_id, trace, email.get('attachments'), dedup),
+            args.retries, args.backoff, f"attachment {message_id}")
+
+    def llm(name, stream_factory, totals=None, calls=1):
+        with trace.span('llm.rate_limit_wait', calls=calls):
+            limiter.acquire(calls)
+        return ''.join(trace.stream(name, stream_factory(), totals=totals))
+
+    email_summary = with_retries(
+        lambda: llm('llm.email_summary', lambda: stream_email_summary_from_cohere(
+            co, email.get('snippet') or "No snippet available.", email['has_attachment'], cache=cache)),
+        args.retries, args.backoff, f"email summary {message_id}")
+
+    summary_text = ''
+    stats = {}
+    screen = None
+    match = None
+    if attachment['text'].strip():
+        with trace.span('prescreen'):
+            screen = prescreen(attachment['text'])
+    if screen and args.skip_disqualified and screen['disqualified']:
+        summary_text = prescreen_summary(screen)
+        record['llm_calls_saved'] = planned_llm_calls(attachment['text'], args.summary_mode)
+    elif screen:
+        if dedup is not None:
+            with trace.span('dedup.lookup') as counters:
+                match = dedup.match(attachment['text'], args.dedup_threshold)
+                counters['similarity'] = match['similarity']
+        if match and match['kind'] in ('exact', 'near'):
+            summary_text = match['document']['summary']
+        else:
+            if match and match['kind'] == 'diff':
+                calls = 1
+                factory = lambda stats: stream_updated_summary(co, match['document']['summary'], match['added'],
+                                                               match['removed'], cache=cache, stats=stats)
+            else:
+                calls = planned_llm_calls(attachment['text'], args.summary_mode)
+                factory = lambda stats: stream_summary_from_cohere(co, attachment['text'], cache=cache, stats=stats,
+                                                                   mode=args.summary_mode)
+
+            def summarize():
+                # Stages and tokens of a failed attempt stay out of the report.
+                attempt = {}
+                text = llm('llm.tender_summary', lambda: factory(attempt), totals=lambda: llm_totals(attempt),
+                           calls=calls)
+                return text, attempt
+
+            summary_text, stats = with_retries(summarize, args.retries, args.backoff, f"tender summary {message_id}")
+            if match is not None:
+                dedup.add(match['fingerprint'], attachment['text'], summary_text, message_id, email['subject'])
+
+    report_name = f"{message_id}_{safe_filename(attachment['filename'] or 'email')}_summary.docx"
+    with trace.span('report.docx') as counters:
+        data = generate_table_word(email_summary + summary_text).getvalue()
+        counters['bytes'] = len(data)
+    with open(os.path.join(args.output, report_name), 'wb') as f:
+        f.write(data)
+    if tender_store is not None and (summary_text or email_summary):
+        with trace.span('tender_store.add'):
+            tender_store.add(email, summary_text or email_summary, attachment['filename'], screen,
+                             body=email_summary + '\n' + summary_text)
+
+    stages = stats.get('stages', [])
+    record.update(
+        status='ok',
+        filename=attachment['filename'],
+        attachments=attachment.get('filenames', []),
+        warning=attachment['warning'],
+        disqualified=screen['disqualified'] if screen else None,
+        prescreen_ms=round(screen['seconds'] * 1000, 2) if screen else None,
+        normalization=attachment.get('normalization'),
+        dedup=match_details(match) if match else None,
+        cached_attachments=sum(1 for f in attachment.get('files', []) if f.get('cached')),
+        summary_mode=stats.get('mode'),
+        prompt_chars=sum(s['prompt_chars'] for s in stages) if stages else None,
+        report=report_name,
+        input_tokens=sum(s.get('input_tokens', 0) for s in stages),
+        output_tokens=sum(s.get('output_tokens', 0) for s in stages),
+        seconds=round(time.perf_counter() - start, 3),
+    )
+    trace.finish(os.path.join(args.output, TRACE_LOG), status='ok')
+    # Kept for the pipeline report; main() takes it out before writing the manifest.
+    record['summary'] = email_summary + summary_text
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize every unprocessed tender email in the inbox.")
+    parser.add_argument('--output', default='reports', help='directory for reports and the manifest')
+    parser.add_argument('--max-results', type=int, default=500, help='how many recent inbox messages to consider')
+    parser.add_argument('--concurrency', type=int, default=4, help='emails processed in parallel')
+    parser.add_argument('--llm-rate', type=float, default=20, help='LLM calls allowed per minute')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=2.0, help='initial retry delay in seconds')
+    parser.add_argument('--all', action='store_true', help='include emails that do not look like tenders')
+    parser.add_argument('--since', type=lambda d: datetime.datetime.strptime(d, '%Y-%m-%d').date(),
+                        help='only emails received on or after this date (YYYY-MM-DD), filtered by Gmail')
+    parser.add_argument('--sender-domain', action='append', default=[],
+                        help='only emails from this domain, filtered by Gmail (repeatable)')
+    parser.add_argument('--skip-disqualified', action='store_true',
+                        help='write the local pre-screen report instead of an AI summary for disqualified tenders')
+    parser.add_argument('--summary-mode', choices=['retrieval', 'map_reduce'], default='retrieval',
+                        help='how tenders too long for one prompt are summarized')
+    parser.add_argument('--dedup-threshold', type=float, default=THRESHOLD,
+                        help='similarity at which a tender reuses (or updates) the summary of one seen before')
+    parser.add_argument('--no-dedup', action='store_true', help='summarize every tender even if seen before')
+    parser.add_argument('--no-tender-store', action='store_true',
+                        help='do not add the summaries to the searchable past-tender store')
+    parser.add_argument('--pipeline-report', nargs='+', choices=REPORT_FORMATS, default=[],
+                        help='also write one consolidated report of every tender processed in this run')
+    parser.add_argument('--fake', action='store_true', help='use the offline fake Gmail and Cohere clients')
+    parser.add_argument('--messages', type=int, default=100, help='(fake) number of inbox messages')
+    parser.add_argument('--gmail-latency', type=float, default=0.05, help='(fake) seconds per Gmail round trip')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='(fake) seconds to first LLM token')
+    parser.add_argument('--llm-failure-rate', type=float, default=0.0, help='(fake) share of LLM calls that fail')
+    args = parser.parse_args()
+    os.makedirs(args.output, exist_ok=True)
+
+    if args.fake:
+        from fakes import FakeCohereClient, FakeGmailService
+        service = FakeGmailService(num_messages=args.messages, latency=args.gmail_latency)
+        co = FakeCohereClient(first_token_latency=args.llm_latency, failure_rate=args.llm_failure_rate)
+        cache = None
+        get_service = lambda: service
+    else:
+        import cohere
+        from dotenv import load_dotenv
+        from gmail_utils import gmail_authenticate, gmail_credentials, thread_local_service
+        from summary_cache import SummaryCache
+        load_dotenv()
+        service = gmail_authenticate()
+        creds = gmail_credentials()
+        co = cohere.Client(cohere_api_key())
+        cache = SummaryCache()
+        get_service = thread_local_service(creds)
+
+    dedup = None
+    if not args.no_dedup:
+        # The offline fakes keep their own index so benchmark runs do not touch the real one.
+        dedup = DedupIndex(os.path.join(args.output, DEDUP_DB_PATH) if args.fake else DEDUP_DB_PATH)
+    tender_store = None
+    if not args.no_tender_store:
+        tender_store = TenderStore(os.path.join(args.output, TENDER_DB_PATH) if args.fake else TENDER_DB_PATH)
+
+    processed = load_processed(args.output)
+    query = build_query(after=args.since, domains=args.sender_domain)
+    emails = get_recent_emails(service, max_results=args.max_results, query=query)
+    todo = [e for e in emails if e['id'] not in processed and (args.all or is_tender(e))]
+    print(f"📬 {len(emails)} inbox emails, {len(todo)} to process ({len(processed)} already done)")
+
+    limiter = RateLimiter(args.llm_rate)
+    start = time.perf_counter()
+    done = failed = 0
+    tokens = saved = 0
+    tenders = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool, \
+            open(os.path.join(args.output, MANIFEST), 'a') as manifest:
+        futures = {pool.submit(process_email, e, get_service, co, cache, dedup, tender_store, limiter, args): e
+                   for e in todo}
+        for future in as_completed(futures):
+            email = futures[future]
+            try:
+                record = future.result()
+                tenders.append({'subject': record['subject'], 'from': record['from'], 'filename': record['filename'],
+                                'summary': record.pop('summary')})
+                done += 1
+                tokens += record['input_tokens'] + record['output_tokens']
+                saved += record.get('llm_calls_saved', 0)
+                print(f"✅ {record['subject'][:60]} -> {record['report']} ({record['seconds']:.1f}s)")
+            except Exception as e:
+                failed += 1
+                record = {'id': email['id'], 'subject': email['subject'], 'status': 'error', 'error': str(e)}
+                print(f"❌ {email['subject'][:60]}: {e}")
+            manifest.write(json.dumps(record) + '\n')
+            manifest.flush()
+
+    elapsed = time.perf_counter() - start
+    for report_format in args.pipeline_report:
+        name = PIPELINE_REPORT.format(format=report_format)
+        report_start = time.perf_counter()
+        data = generate_pipeline_report(tenders, report_format).getvalue()
+        METRICS.observe(f'report.pipeline_{report_format}', time.perf_counter() - report_start, bytes=len(data),
+                        tenders=len(tenders))
+        with open(os.path.join(args.output, name), 'wb') as f:
+            f.write(data)
+        print(f"📦 {len(tenders)} tenders -> {name}")
+    with open(os.path.join(args.output, METRICS_FILE), 'w') as f:
+        f.write(METRICS.prometheus())
+    print(f"🏁 {done} processed, {failed} failed in {elapsed:.1f}s "
+          f"({done / elapsed * 60 if elapsed else 0:.1f} emails/min, {tokens} tokens, {saved} LLM calls saved by pre-screen)")
+    if dedup is not None:
+        stats = dedup.stats()
+        print(f"♻️ Duplicates: {stats['hit_rate']:.0%} hit rate over {stats['lookups']} lookups "
+              f"({stats['exact']} exact, {stats['near']} near, {stats['diff']} updated from changes, "
+              f"{stats['misses']} new); attachments reused {stats['file_hits']}/{stats['file_hits'] + stats['file_misses']}")
+    if tender_store is not None:
+        print(f"🗂️ {tender_store.count()} past tenders searchable")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_attachment.py
+# Peak memory of fetching and extracting one large PDF attachment: decoded to bytes
+# and wrapped in BytesIO (get_attachment) against spooled to a temp file and read from
+# disk (get_attachment_spooled). Each mode runs in a fresh process.
+#   python -m benchmarks.bench_attachment --size-mb 200
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from benchmarks.bench_pipeline import _peak_rss_mib, _reset_peak_rss
+from fakes import FakeGmailService, make_text_pdf, synthetic_tender_text
+
+MODES = ['in-memory', 'spooled']
+
+
+def run(mode, size_mb, pages):
+    import random
+    from extractors import extract_text_from_pdf_hybrid
+    from gmail_utils import get_attachment, get_attachment_spooled
+
+    rng = random.Random(0)
+    service = FakeGmailService(num_messages=0, latency=0)
+    pdf = make_text_pdf([synthetic_tender_text(rng) for _ in range(pages)], padding=size_mb * 2 ** 20)
+    message_id = service.add_message(has_attachment=True, filename='tender.pdf', attachment_data=pdf)
+    del pdf  # the fake keeps its own copy, as Gmail would
+    _reset_peak_rss()
+    baseline, _ = _peak_rss_mib()
+
+    start = time.perf_counter()
+    if mode == 'in-memory':
+        filename, data = get_attachment(service, message_id)
+        text, _ = extract_text_from_pdf_hybrid(BytesIO(data))
+    else:
+        with get_attachment_spooled(service, message_id) as spooled, spooled.open() as f:
+            text, _ = extract_text_from_pdf_hybrid(f)
+    seconds = time.perf_counter() - start
+    peak, _ = _peak_rss_mib()
+    return seconds, baseline, peak, len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=int, default=200, help='attachment size')
+    parser.add_argument('--pages', type=int, default=10, help='text pages in the PDF')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'mode':<10} {'seconds':>8} {'baseline RSS':>13} {'peak RSS':>10} {'growth':>9}")
+    for mode in MODES:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            seconds, baseline, peak, chars = pool.submit(run, mode, args.size_mb, args.pages).result()
+        print(f"{mode:<10} {seconds:>8.2f} {baseline:>9.0f} MiB {peak:>6.0f} MiB {peak - baseline:>5.0f} MiB")
+
+
+if __name__ == '__main__':
+    main()
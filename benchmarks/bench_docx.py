@@ -0,0 +1,49 @@
+# benchmarks/bench_docx.py
+# The python-docx extractor against the streaming one on BOQ-heavy DOCX files of growing
+# size. Each run is in a fresh process so peak RSS is comparable.
+#   python -m benchmarks.bench_docx --rows 1000 5000 20000
+import argparse
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from benchmarks.bench_pipeline import _peak_rss_mib, _reset_peak_rss
+from fakes import make_boq_docx
+
+EXTRACTORS = ['extract_text_from_docx', 'extract_text_from_docx_streaming']
+
+
+def run(extractor, data):
+    import extractors
+    _reset_peak_rss()
+    baseline, _ = _peak_rss_mib()
+    start = time.perf_counter()
+    text = getattr(extractors, extractor)(BytesIO(data))
+    seconds = time.perf_counter() - start
+    peak, _ = _peak_rss_mib()
+    return seconds, peak - baseline, sorted(text.split('\n'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 5000, 20000], help='rows per BOQ table')
+    parser.add_argument('--tables', type=int, default=2)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'rows':>7} {'size':>9} {'python-docx':>12} {'RSS':>8} {'streaming':>10} {'RSS':>8} {'speedup':>8}  same lines")
+    for rows in args.rows:
+        data = make_boq_docx(random.Random(rows), tables=args.tables, rows=rows)
+        results = []
+        for extractor in EXTRACTORS:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results.append(pool.submit(run, extractor, data).result())
+        (old, old_rss, old_lines), (new, new_rss, new_lines) = results
+        print(f"{rows * args.tables:>7} {len(data) / 2 ** 20:>6.1f} MiB {old:>10.2f} s {old_rss:>4.0f} MiB "
+              f"{new:>8.2f} s {new_rss:>4.0f} MiB {old / new:>7.1f}x  {old_lines == new_lines}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# benchmarks/bench_inbox.py
+# Compare serial vs batched inbox listing against the offline fake Gmail service, and
+# the one page (optionally Gmail-filtered) the app lists at a time.
+#   python -m benchmarks.bench_inbox --messages 50 --latency 0.08
+import argparse
+import time
+
+from fakes import FakeGmailService
+from gmail_utils import PAGE_SIZE, build_query, get_message_metadata, get_recent_emails, list_message_ids
+
+
+def first_page(service, query, page_size):
+    message_ids, _, _ = list_message_ids(service, query, page_size)
+    return get_message_metadata(service, message_ids)
+
+
+def run(label, service, fetch=get_recent_emails, **kwargs):
+    service.reset_counters()
+    start = time.perf_counter()
+    emails = fetch(service, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(emails):>5} emails  {elapsed * 1000:>8.1f} ms  "
+          f"{service.round_trips:>4} round trips  {service.bytes_sent / 1024:>9.1f} KiB  {dict(service.calls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.08, help='seconds per HTTP round trip')
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    service = FakeGmailService(num_messages=args.messages, latency=args.latency)
+    run('serial full-payload', service, max_results=args.messages, batched=False)
+    run('batched metadata', service, max_results=args.messages, batched=True,
+        batch_size=args.batch_size, max_workers=1)
+    run(f'batched x{args.workers} workers', service, max_results=args.messages, batched=True,
+        batch_size=min(args.batch_size, max(1, args.messages // args.workers)), max_workers=args.workers)
+    run(f'one page of {args.page_size}', service, first_page, query=build_query(), page_size=args.page_size)
+    run('one filtered page', service, first_page, query=build_query(has_attachment=True, domains=['nic.in']),
+        page_size=args.page_size)
+
+
+if __name__ == '__main__':
+    main()
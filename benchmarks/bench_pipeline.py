@@ -0,0 +1,208 @@
+# benchmarks/bench_pipeline.py
+# Offline end-to-end benchmark over a synthetic tender corpus: text PDFs, scanned PDFs,
+# DOCX files with large BOQ tables and PNG/TIFF scans go through the real extractors,
+# generate_table_word and the streaming summary loops (fake Gmail and Cohere clients).
+# Each stage runs in a fresh process so its peak RSS is its own.
+#   python -m benchmarks.bench_pipeline --iterations 5 --pages 20 --boq-rows 2000
+#   python -m benchmarks.bench_pipeline --json results.json --compare baseline.json
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from fakes import make_boq_docx, make_scan_image, make_scanned_pdf, make_text_pdf, synthetic_tender_text
+
+STAGES = ['text_pdf', 'scanned_pdf', 'docx_boq', 'docx_boq_stream', 'png_scan', 'tiff_scan', 'report', 'end_to_end']
+
+
+def build_corpus(directory, args):
+    # Written once per run so every stage process reads identical inputs from disk.
+    rng = random.Random(args.seed)
+    pages = [synthetic_tender_text(rng, args.lines) for _ in range(args.pages)]
+    files = {
+        'text_pdf': ('tender.pdf', lambda: make_text_pdf(pages)),
+        'scanned_pdf': ('scanned.pdf', lambda: make_scanned_pdf(pages[:args.scanned_pages])),
+        'docx_boq': ('boq.docx', lambda: make_boq_docx(rng, tables=args.boq_tables, rows=args.boq_rows)),
+        'docx_boq_stream': ('boq.docx', None),
+        'png_scan': ('scan.png', lambda: make_scan_image(pages[:1], 'PNG')),
+        'tiff_scan': ('scan.tiff', lambda: make_scan_image(pages[:args.scanned_pages], 'TIFF')),
+        'end_to_end': ('tender.pdf', lambda: make_text_pdf(pages)),
+    }
+    paths = {}
+    for stage, (filename, build) in files.items():
+        path = os.path.join(directory, filename)
+        if build and not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(build())
+        paths[stage] = path
+    return paths
+
+
+def _peak_rss_mib():
+    # Linux carries ru_maxrss over from the parent across exec, so prefer this process's
+    # own high-water mark (VmHWM). ru_maxrss is KiB on Linux and bytes on macOS; OCR
+    # workers are child processes.
+    scale = 1 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    try:
+        with open('/proc/self/status') as f:
+            own = next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmHWM:'))
+    except (OSError, StopIteration):
+        pass
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return own / 2 ** 20, children / 2 ** 20
+
+
+def _reset_peak_rss():
+    # Linux only: start the VmHWM high-water mark again from the current RSS, so setup
+    # work (building inputs, imports) does not hide the peak of what is measured.
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _stage_runner(stage, path, args):
+    # Returns (run, pages) where run() processes one document.
+    from extractors import (extract_text_from_docx, extract_text_from_docx_streaming, extract_text_from_image,
+                            extract_text_from_pdf_hybrid)
+    from report import generate_table_word
+
+    data = open(path, 'rb').read() if path else b''
+    if stage in ('text_pdf', 'scanned_pdf'):
+        pages = args.pages if stage == 'text_pdf' else args.scanned_pages
+        return lambda: extract_text_from_pdf_hybrid(BytesIO(data)), pages
+    if stage == 'docx_boq':
+        return lambda: extract_text_from_docx(BytesIO(data)), 1
+    if stage == 'docx_boq_stream':
+        return lambda: extract_text_from_docx_streaming(BytesIO(data)), 1
+    if stage in ('png_scan', 'tiff_scan'):
+        return lambda: extract_text_from_image(BytesIO(data)), 1
+    if stage == 'report':
+        from fakes import FakeCohereClient
+        co = FakeCohereClient(first_token_latency=0, token_latency=0, output_tokens=args.output_tokens)
+        summary = ''.join(chunk.text for chunk in co.chat_stream(message='') if hasattr(chunk, 'text'))
+        return lambda: generate_table_word(summary * args.report_repeat), 1
+
+    # end_to_end: Gmail download, extraction, normalization, both streamed summaries, report.
+    from fakes import FakeCohereClient, FakeGmailService
+    from pipeline import fetch_and_extract
+    from summarizer import stream_email_summary_from_cohere, stream_summary_from_cohere
+    service = FakeGmailService(num_messages=0, latency=args.gmail_latency)
+    message_id = service.add_message(has_attachment=True, filename='tender.pdf', attachment_data=data)
+    co = FakeCohereClient(first_token_latency=args.llm_latency, token_latency=args.token_latency,
+                          output_tokens=args.output_tokens)
+
+    def run():
+        attachment = fetch_and_extract(service, message_id)
+        email_summary = ''.join(stream_email_summary_from_cohere(co, 'Tender notice', has_attachment=True))
+        summary = ''.join(stream_summary_from_cohere(co, attachment['text']))
+        return generate_table_word(email_summary + summary)
+    return run, args.pages
+
+
+def run_stage(stage, path, args):
+    try:
+        run, pages = _stage_runner(stage, path, args)
+        _reset_peak_rss()
+        rss_before, _ = _peak_rss_mib()
+        latencies = []
+        for _ in range(args.warmup):
+            run()
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            run()
+            latencies.append(time.perf_counter() - start)
+    except Exception as e:
+        # e.g. tesseract or poppler not installed for the OCR stages.
+        return {'stage': stage, 'skipped': f'{type(e).__name__}: {e}'.splitlines()[0][:100]}
+    rss_peak, rss_children = _peak_rss_mib()
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'stage': stage,
+        'iterations': len(latencies),
+        'docs_per_second': len(latencies) / total,
+        'pages_per_second': len(latencies) * pages / total,
+        'p50_seconds': latencies[len(latencies) // 2],
+        'p95_seconds': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        'peak_rss_mib': rss_peak,
+        'rss_growth_mib': rss_peak - rss_before,
+        'children_peak_rss_mib': rss_children,
+    }
+
+
+def compare(results, baseline_path, max_regression):
+    with open(baseline_path) as f:
+        baseline = {r['stage']: r for r in json.load(f)['results'] if 'skipped' not in r}
+    regressions = []
+    for result in results:
+        before = baseline.get(result['stage'])
+        if before and 'skipped' not in result:
+            for metric in ('p50_seconds', 'p95_seconds', 'peak_rss_mib'):
+                if result[metric] > before[metric] * (1 + max_regression):
+                    regressions.append(f"{result['stage']} {metric}: {before[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--pages', type=int, default=20, help='pages in the text PDF')
+    parser.add_argument('--lines', type=int, default=40, help='lines per page')
+    parser.add_argument('--scanned-pages', type=int, default=3, help='pages in the scanned PDF and TIFF')
+    parser.add_argument('--boq-tables', type=int, default=2)
+    parser.add_argument('--boq-rows', type=int, default=1000, help='rows per BOQ table')
+    parser.add_argument('--output-tokens', type=int, default=400, help='(fake) tokens per LLM summary')
+    parser.add_argument('--report-repeat', type=int, default=1, help='repeat the summary to make a bigger report')
+    parser.add_argument('--gmail-latency', type=float, default=0.05, help='(fake) seconds per Gmail round trip')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='(fake) seconds to first LLM token')
+    parser.add_argument('--token-latency', type=float, default=0.001, help='(fake) seconds per streamed token')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus', help='directory to keep the generated corpus in (default: a temp dir)')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results file from an earlier run to check for regressions')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='allowed slowdown/growth before failing')
+    args = parser.parse_args()
+
+    corpus = args.corpus or tempfile.mkdtemp(prefix='tender-corpus-')
+    os.makedirs(corpus, exist_ok=True)
+    paths = build_corpus(corpus, args)
+
+    results = []
+    print(f"{'stage':<16} {'docs/s':>8} {'pages/s':>9} {'p50':>9} {'p95':>9} {'peak RSS':>10} {'growth':>9}")
+    context = multiprocessing.get_context('spawn')
+    for stage in args.stages:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_stage, stage, paths.get(stage), args).result()
+        results.append(result)
+        if 'skipped' in result:
+            print(f"{stage:<16} skipped ({result['skipped']})")
+            continue
+        print(f"{stage:<16} {result['docs_per_second']:>8.2f} {result['pages_per_second']:>9.1f} "
+              f"{result['p50_seconds'] * 1000:>6.0f} ms {result['p95_seconds'] * 1000:>6.0f} ms "
+              f"{result['peak_rss_mib']:>6.0f} MiB {result['rss_growth_mib']:>5.0f} MiB")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        for line in regressions:
+            print(f"⚠️ regression: {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_prefetch.py
+# Generate latency with and without the prefetch scheduler on a fake inbox where every
+# attachment is a different document. The user idles for a while after the inbox loads,
+# then clicks Generate on some of the tender emails, one after another. Prints click
+# latency, the scheduler's hit rate and the work it spent on emails nobody clicked.
+#   python -m benchmarks.bench_prefetch --messages 50 --idle 20 --click-rate 0.5
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from fakes import ORGS, SUBJECTS, FakeCohereClient, FakeGmailService, make_text_pdf, synthetic_tender_text
+from gmail_utils import get_recent_emails
+from jobs import JobQueue
+from prefetch import Prefetcher
+from summary_cache import SummaryCache
+
+# The fake subjects before these are tenders; the rest are newsletters and notes.
+TENDER_SUBJECTS = SUBJECTS[:5]
+
+
+def build_inbox(args):
+    rng = random.Random(args.seed)
+    service = FakeGmailService(num_messages=0, latency=args.gmail_latency)
+    for _ in range(args.messages):
+        data = None
+        if rng.random() < args.attachment_rate:
+            data = make_text_pdf(synthetic_tender_text(rng, args.lines) for _ in range(args.pages))
+        service.add_message(subject=rng.choice(SUBJECTS).format(org=rng.choice(ORGS)), attachment_data=data)
+    emails = get_recent_emails(service, max_results=args.messages)
+    tenders = [e for e in emails if any(e['subject'].startswith(s.split('{')[0]) for s in TENDER_SUBJECTS)]
+    clicks = [e for e in tenders if rng.random() < args.click_rate]
+    rng.shuffle(clicks)
+    return service, emails, clicks
+
+
+def run(args, service, emails, clicks, prefetch):
+    co = FakeCohereClient(first_token_latency=args.llm_latency, token_latency=args.token_latency,
+                          output_tokens=args.output_tokens)
+    with tempfile.TemporaryDirectory() as directory:
+        trace_log = os.path.join(directory, 'traces.jsonl')
+        cache = SummaryCache(os.path.join(directory, 'summary_cache.db'))
+        prefetcher = None
+        if prefetch:
+            prefetcher = Prefetcher(co, lambda: service, cache=cache, cpu_budget=args.cpu_budget,
+                                    llm_budget=args.llm_budget, trace_log=trace_log)
+        queue = JobQueue(co, lambda: service, cache=cache, path=os.path.join(directory, 'jobs.db'),
+                         trace_log=trace_log, prefetch=prefetcher)
+        if prefetcher:
+            prefetcher.offer(emails)
+            prefetcher.start(busy=queue.active_count)
+            time.sleep(args.idle)
+        latencies = []
+        for email in clicks:
+            start = time.perf_counter()
+            job_id = queue.submit(email)
+            while queue.get(job_id)['status'] not in ('done', 'error'):
+                time.sleep(0.01)
+            latencies.append(time.perf_counter() - start)
+            time.sleep(args.think)
+        stats = prefetcher.stats() if prefetcher else None
+        if prefetcher:
+            prefetcher.stop()
+    return sorted(latencies), stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--attachment-rate', type=float, default=0.6)
+    parser.add_argument('--pages', type=int, default=10, help='pages per attachment')
+    parser.add_argument('--lines', type=int, default=40, help='lines per page')
+    parser.add_argument('--click-rate', type=float, default=0.5, help='share of tender emails clicked')
+    parser.add_argument('--idle', type=float, default=20, help='seconds between loading the inbox and the first click')
+    parser.add_argument('--think', type=float, default=0.5, help='seconds between clicks')
+    parser.add_argument('--cpu-budget', type=float, default=300)
+    parser.add_argument('--llm-budget', type=int, default=20)
+    parser.add_argument('--gmail-latency', type=float, default=0.05)
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='fake time to first token')
+    parser.add_argument('--token-latency', type=float, default=0.005)
+    parser.add_argument('--output-tokens', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    service, emails, clicks = build_inbox(args)
+    print(f"📬 {len(emails)} emails, {len(clicks)} Generate clicks after {args.idle:.0f}s idle")
+    print(f"{'mode':>10} {'p50':>8} {'p95':>8} {'mean':>8}")
+    for prefetch in (False, True):
+        latencies, stats = run(args, service, emails, clicks, prefetch)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{'prefetch' if prefetch else 'cold':>10} {p50:>7.2f}s {p95:>7.2f}s {sum(latencies) / len(latencies):>7.2f}s")
+    print(f"hit rate {stats['hit_rate']:.0%}: {stats['hits']} ready ({stats['warm_hits']} with warm summaries), "
+          f"{stats['partial_hits']} in flight, {stats['misses']} missed")
+    print(f"spent {stats['cpu_seconds']:.1f}s extraction CPU and {stats['llm_calls']} LLM calls on "
+          f"{stats['prefetched']} emails; unclicked: {stats['ready']} emails, {stats['unused_cpu_seconds']:.1f}s "
+          f"extraction CPU and {stats['unused_llm_calls']} LLM calls")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/bench_report.py
+# Report generation time from 1 to 1,000 tenders: the original row-at-a-time writer (one
+# DOCX per tender) against the bulk writer, and the consolidated DOCX/XLSX/CSV pipeline
+# report. A second sweep grows one summary's bullet lists, where the old duplicate check
+# was quadratic.
+#   python -m benchmarks.bench_report --tenders 1 10 100 1000 --bullets 10 100 1000
+import argparse
+import re
+import time
+from io import BytesIO
+
+from fakes import FakeCohereClient
+from report import REPORT_FORMATS, generate_pipeline_report, generate_table_word
+
+
+def generate_table_word_rowwise(summary_text):
+    # The writer report.py used before: regexes per line, a list membership check per
+    # bullet and one table.add_row() per parameter.
+    from docx import Document
+    from docx.shared import Pt
+    lines = summary_text.splitlines()
+    heading = next((l.strip().lstrip('#').strip() for l in lines if l.strip().startswith('#')), 'Table')
+    data = []
+    key = None
+    values = []
+    for raw in lines:
+        line = raw.lstrip('#').strip()
+        if re.match(r'^\*\*.*\*\*$', line):
+            if key:
+                data.append((key, values))
+            key = line.strip('*').strip()
+            values = []
+        elif key and (line.startswith('-') or re.match(r'^\d+\.', line)):
+            cleaned = re.sub(r'^[-\d.]+\s*', '', line)
+            if cleaned not in values:
+                values.append(cleaned)
+    if key:
+        data.append((key, values))
+    doc = Document()
+    title_para = doc.add_heading(level=1)
+    run_title = title_para.add_run(heading)
+    run_title.bold = True
+    run_title.font.size = Pt(16)
+    table = doc.add_table(rows=1, cols=2)
+    table.style = 'Table Grid'
+    hdr_cells = table.rows[0].cells
+    hdr_cells[0].text = 'Parameter'
+    hdr_cells[1].text = 'Description'
+    for key, vals in data:
+        row_cells = table.add_row().cells
+        row_cells[0].text = key
+        row_cells[1].text = "\n".join(vals)
+    buf = BytesIO()
+    doc.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def make_summary(bullets, sections=40):
+    lines = ['# Tender Summary']
+    for s in range(sections):
+        lines.append(f'**Category {s + 1}**')
+        lines.extend(f'- Category {s + 1} detail {i + 1} & clause <{i % 7}> taken from the document.'
+                     for i in range(bullets))
+    return '\n'.join(lines)
+
+
+def table_text(data):
+    from docx import Document
+    return [[cell.text for cell in row.cells] for table in Document(BytesIO(data)).tables for row in table.rows]
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenders', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--bullets', type=int, nargs='+', default=[10, 100, 1000], help='bullets per category')
+    parser.add_argument('--output-tokens', type=int, default=400, help='(fake) tokens per tender summary')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-rowwise-above', type=int, default=1000,
+                        help='skip the old writer for larger tender counts (it is slow)')
+    args = parser.parse_args()
+
+    print(f"{'bullets/category':>16} {'row-wise':>10} {'bulk':>10} {'speedup':>8}  same table")
+    for bullets in args.bullets:
+        summary = make_summary(bullets)
+        old_seconds, old = timed(lambda: generate_table_word_rowwise(summary).getvalue(), args.repeat)
+        new_seconds, new = timed(lambda: generate_table_word(summary).getvalue(), args.repeat)
+        print(f"{bullets:>16} {old_seconds * 1000:>7.0f} ms {new_seconds * 1000:>7.0f} ms "
+              f"{old_seconds / new_seconds:>7.1f}x  {table_text(old) == table_text(new)}")
+
+    co = FakeCohereClient(first_token_latency=0, token_latency=0, output_tokens=args.output_tokens)
+    summary = ''.join(chunk.text for chunk in co.chat_stream(message='') if hasattr(chunk, 'text'))
+    print()
+    print(f"{'tenders':>8} {'row-wise docx each':>19} {'bulk docx each':>15} "
+          + ' '.join(f"{'pipeline ' + f:>14}" for f in REPORT_FORMATS) + '   sizes')
+    for n in args.tenders:
+        tenders = [{'subject': f'Tender {i + 1}', 'from': 'eproc@nic.in', 'filename': f'tender_{i + 1}.pdf',
+                    'summary': summary} for i in range(n)]
+        repeat = 1 if n >= 100 else args.repeat
+        if n <= args.skip_rowwise_above:
+            rowwise, _ = timed(lambda: [generate_table_word_rowwise(t['summary']) for t in tenders], repeat)
+            rowwise = f"{rowwise:>17.2f} s"
+        else:
+            rowwise = f"{'skipped':>19}"
+        bulk, _ = timed(lambda: [generate_table_word(t['summary']) for t in tenders], repeat)
+        cells = []
+        sizes = []
+        for report_format in REPORT_FORMATS:
+            seconds, data = timed(lambda: generate_pipeline_report(tenders, report_format).getvalue(), repeat)
+            cells.append(f"{seconds:>12.2f} s")
+            sizes.append(f"{report_format} {len(data) / 1024:.0f} KiB")
+        print(f"{n:>8} {rowwise} {bulk:>13.2f} s " + ' '.join(cells) + '   ' + ', '.join(sizes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+# benchmarks/bench_retrieval.py
+# Prompt size and index build time for the retrieval summary as tenders get longer,
+# against sending the whole document.
+#   python -m benchmarks.bench_retrieval --pages 10 50 100 500
+import argparse
+import random
+
+from fakes import synthetic_tender_text
+from retrieval import select_passages
+from summarizer import RETRIEVAL_BUDGET_CHARS, TENDER_PROMPT
+
+
+def synthetic_document(rng, pages, lines=40):
+    return ''.join(f"\n--- Page {page} ---\n" + '\n'.join(synthetic_tender_text(rng, lines))
+                   for page in range(1, pages + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 50, 100, 500])
+    parser.add_argument('--budget', type=int, default=RETRIEVAL_BUDGET_CHARS, help='retrieved characters per prompt')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'pages':>6} {'document':>12} {'whole prompt':>13} {'retrieval':>10} {'passages':>10} {'index':>9} {'total':>9}")
+    for pages in args.pages:
+        text = synthetic_document(rng, pages)
+        selected, report = select_passages(text, args.budget)
+        print(f"{pages:>6} {len(text):>12,} {len(TENDER_PROMPT) + len(text):>13,} "
+              f"{len(TENDER_PROMPT) + len(selected):>10,} {report['selected']:>4}/{report['passages']:<5} "
+              f"{report['index_seconds'] * 1000:>6.0f} ms {report['seconds'] * 1000:>6.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
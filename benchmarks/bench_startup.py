@@ -0,0 +1,61 @@
+# benchmarks/bench_startup.py
+# Measure cold start and warm rerun time of the Streamlit app offline: Gmail and Cohere
+# are replaced by the fakes and the script is driven through Streamlit's AppTest.
+#   python -m benchmarks.bench_startup --reruns 10 --gmail-latency 0.08
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cohere
+
+import gmail_utils
+from fakes import FakeCohereClient, FakeGmailService
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Salesapp2.py')
+HEAVY_MODULES = ['pytesseract', 'pdf2image', 'PyPDF2', 'docx']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reruns', type=int, default=10)
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--gmail-latency', type=float, default=0.08, help='seconds per Gmail round trip')
+    args = parser.parse_args()
+
+    service = FakeGmailService(num_messages=args.messages, latency=args.gmail_latency)
+    gmail_utils.gmail_authenticate = lambda: service
+    gmail_utils.gmail_credentials = lambda: None
+    gmail_utils.thread_local_service = lambda creds: (lambda: service)
+    cohere.Client = lambda api_key: FakeCohereClient()
+
+    from streamlit.testing.v1 import AppTest
+    os.chdir(tempfile.mkdtemp())
+    app = AppTest.from_file(APP, default_timeout=60)
+    app.secrets['credentials'] = '{}'
+    app.secrets['token'] = '{}'
+    app.secrets['cohere_api_key'] = 'fake'
+
+    start = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - start
+    if app.exception:
+        sys.exit(f"app raised: {app.exception[0].value}")
+    cold_calls = service.round_trips
+
+    warm = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        app.run()
+        warm.append(time.perf_counter() - start)
+    warm.sort()
+
+    print(f"cold start      {cold * 1000:8.1f} ms  ({cold_calls} Gmail round trips)")
+    print(f"warm rerun p50  {warm[len(warm) // 2] * 1000:8.1f} ms  "
+          f"({service.round_trips - cold_calls} Gmail round trips over {args.reruns} reruns)")
+    print(f"heavy modules imported without a document: {[m for m in HEAVY_MODULES if m in sys.modules] or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
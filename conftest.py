@@ -0,0 +1,2 @@
+# conftest.py
+# Lets pytest import the app's top-level modules from tests/.
@@ -0,0 +1,253 @@
+# dedup.py
+# Local index of tenders already summarized, so forwarded copies, portal re-sends and
+# corrigenda do not pay for extraction and the LLM again. Attachment bytes are keyed by
+# SHA-256 (an identical file skips extraction and OCR); the combined text is fingerprinted
+# with a bottom-k MinHash sketch over word shingles, and a close enough match reuses the
+# stored summary or sends only the changed lines to the LLM.
+import hashlib
+import heapq
+import json
+import re
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+DB_PATH = 'dedup_index.db'
+# Estimated Jaccard similarity of word shingles at or above which a tender counts as a copy.
+THRESHOLD = 0.8
+SHINGLE_WORDS = 5
+SKETCH_SIZE = 128
+# A near match whose changes are bigger than this is summarized from scratch.
+MAX_DIFF_CHARS = 24000
+MAX_DOCUMENTS = 5000
+MAX_FILES = 5000
+
+TOKEN = re.compile(r'\w+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text_hash TEXT,
+    sketch BLOB,
+    text BLOB,
+    summary TEXT,
+    message_id TEXT,
+    subject TEXT,
+    created_at REAL,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS documents_by_hash ON documents (text_hash);
+CREATE INDEX IF NOT EXISTS documents_by_use ON documents (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    digest TEXT PRIMARY KEY,
+    filename TEXT,
+    text BLOB,
+    details TEXT,
+    created_at REAL,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS files_by_use ON files (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+
+def fingerprint(text, shingle_words=SHINGLE_WORDS, sketch_size=SKETCH_SIZE):
+    # (hash of the word sequence, the `sketch_size` smallest 64-bit shingle hashes).
+    # Case, punctuation and whitespace do not change either.
+    words = TOKEN.findall(text.lower())
+    text_hash = hashlib.sha256(' '.join(words).encode('utf-8')).hexdigest()
+    hashes = set()
+    for i in range(max(1, len(words) - shingle_words + 1)):
+        shingle = ' '.join(words[i:i + shingle_words]).encode('utf-8')
+        hashes.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), 'little'))
+    return text_hash, sorted(heapq.nsmallest(sketch_size, hashes))
+
+
+def similarity(a, b, sketch_size=SKETCH_SIZE):
+    # Bottom-k estimate of the Jaccard similarity of the two shingle sets: the share of
+    # the union's smallest hashes that both sets contain. Exact for short documents.
+    union = heapq.nsmallest(sketch_size, set(a) | set(b))
+    if not union:
+        return 1.0
+    a, b = set(a), set(b)
+    return sum(1 for h in union if h in a and h in b) / len(union)
+
+
+def changed_lines(old_text, new_text):
+    # Lines of the new copy that the old one lacks, and the other way round, in order.
+    def lines(text):
+        return [' '.join(line.split()) for line in text.splitlines() if line.strip()]
+    old, new = lines(old_text), lines(new_text)
+    old_set, new_set = set(old), set(new)
+    return [line for line in new if line not in old_set], [line for line in old if line not in new_set]
+
+
+def _pack(sketch):
+    return struct.pack(f'<{len(sketch)}Q', *sketch)
+
+
+def _unpack(blob):
+    return list(struct.unpack(f'<{len(blob) // 8}Q', blob))
+
+
+class DedupIndex:
+    def __init__(self, path=DB_PATH, threshold=THRESHOLD, max_diff_chars=MAX_DIFF_CHARS,
+                 max_documents=MAX_DOCUMENTS, max_files=MAX_FILES):
+        self.threshold = threshold
+        self.max_diff_chars = max_diff_chars
+        self.max_documents = max_documents
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        # Sketches are small (1 KiB each), so near-match lookups scan them in memory.
+        self._sketches = {row[0]: set(_unpack(row[1]))
+                          for row in self._conn.execute('SELECT id, sketch FROM documents')}
+
+    def _count(self, name):
+        self._conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,)
+        )
+
+    # -- attachment files -------------------------------------------------
+    def get_file(self, digest):
+        # The extraction result for an attachment with these bytes, or None.
+        with self._lock:
+            row = self._conn.execute('SELECT text, details FROM files WHERE digest = ?', (digest,)).fetchone()
+            if row:
+                self._conn.execute('UPDATE files SET last_used = ? WHERE digest = ?', (time.time(), digest))
+            self._count('file_hits' if row else 'file_misses')
+            self._conn.commit()
+        if not row:
+            return None
+        return dict(json.loads(row[1]), text=zlib.decompress(row[0]).decode('utf-8'))
+
+    def put_file(self, digest, filename, text, **details):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO files (digest, filename, text, details, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (digest, filename, zlib.compress(text.encode('utf-8')), json.dumps(details), now, now)
+            )
+            self._conn.execute(
+                'DELETE FROM files WHERE digest IN '
+                '(SELECT digest FROM files ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_files,)
+            )
+            self._conn.commit()
+
+    # -- summarized documents ---------------------------------------------
+    def match(self, text, threshold=None, count=True):
+        # Returns a dict whose 'kind' says what to do with the tender:
+        #   exact  same words as a stored tender: reuse its summary
+        #   near   similar, and no line of text changed: reuse its summary
+        #   diff   similar with a few changed lines: update its summary from `added`/`removed`
+        #   miss   nothing close enough (or too much changed): summarize from scratch
+        # Pass `fingerprint` back to add() once the new summary exists. Lookups that are
+        # not a tender being processed (prefetch) pass count=False to stay out of stats().
+        start = time.perf_counter()
+        threshold = self.threshold if threshold is None else threshold
+        text_hash, sketch = fingerprint(text)
+        result = {'kind': 'miss', 'similarity': 0.0, 'threshold': threshold, 'document': None,
+                  'fingerprint': (text_hash, sketch), 'added': [], 'removed': []}
+        with self._lock:
+            row = self._conn.execute('SELECT id FROM documents WHERE text_hash = ? ORDER BY created_at DESC LIMIT 1',
+                                     (text_hash,)).fetchone()
+            exact = row is not None
+            if exact:
+                best_id, best = row[0], 1.0
+            else:
+                best_id, best = None, 0.0
+                for doc_id, other in self._sketches.items():
+                    score = similarity(sketch, other)
+                    if score > best:
+                        best_id, best = doc_id, score
+            result['similarity'] = best
+            if best_id is not None and best >= threshold:
+                row = self._conn.execute(
+                    'SELECT id, text, summary, message_id, subject, created_at FROM documents WHERE id = ?', (best_id,)
+                ).fetchone()
+                result['document'] = {'id': row[0], 'text': zlib.decompress(row[1]).decode('utf-8'),
+                                      'summary': row[2], 'message_id': row[3], 'subject': row[4],
+                                      'created_at': row[5]}
+                self._conn.execute('UPDATE documents SET last_used = ? WHERE id = ?', (time.time(), best_id))
+
+        document = result['document']
+        if document and exact:
+            result['kind'] = 'exact'
+        elif document:
+            added, removed = changed_lines(document['text'], text)
+            if not added and not removed:
+                result['kind'] = 'near'
+            elif sum(len(line) + 1 for line in added + removed) <= self.max_diff_chars:
+                result.update(kind='diff', added=added, removed=removed)
+        if result['kind'] == 'miss':
+            result['document'] = None
+        result['seconds'] = time.perf_counter() - start
+        with self._lock:
+            if count:
+                self._count(result['kind'])
+            self._conn.commit()
+        return result
+
+    def add(self, fingerprint, text, summary, message_id=None, subject=None):
+        text_hash, sketch = fingerprint
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO documents (text_hash, sketch, text, summary, message_id, subject, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (text_hash, _pack(sketch), zlib.compress(text.encode('utf-8')), summary, message_id, subject, now, now)
+            )
+            self._sketches[cursor.lastrowid] = set(sketch)
+            expired = self._conn.execute(
+                'SELECT id FROM documents ORDER BY last_used DESC LIMIT -1 OFFSET ?', (self.max_documents,)
+            ).fetchall()
+            self._conn.executemany('DELETE FROM documents WHERE id = ?', expired)
+            for (doc_id,) in expired:
+                self._sketches.pop(doc_id, None)
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._conn.execute('SELECT name, value FROM counters').fetchall())
+            documents = self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+            files = self._conn.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        exact, near, diff, misses = (counters.get(k, 0) for k in ('exact', 'near', 'diff', 'miss'))
+        lookups = exact + near + diff + misses
+        file_hits, file_misses = counters.get('file_hits', 0), counters.get('file_misses', 0)
+        return {
+            'lookups': lookups,
+            'exact': exact,
+            'near': near,
+            'diff': diff,
+            'misses': misses,
+            'hit_rate': (exact + near + diff) / lookups if lookups else 0.0,
+            'file_hits': file_hits,
+            'file_misses': file_misses,
+            'file_hit_rate': file_hits / (file_hits + file_misses) if file_hits + file_misses else 0.0,
+            'documents': documents,
+            'files': files,
+        }
+
+
+def match_details(match):
+    # The JSON-friendly part of a match() result for job details and manifests.
+    document = match['document'] or {}
+    return {
+        'kind': match['kind'],
+        'similarity': round(match['similarity'], 4),
+        'threshold': match['threshold'],
+        'message_id': document.get('message_id'),
+        'subject': document.get('subject'),
+        'added_lines': len(match['added']),
+        'removed_lines': len(match['removed']),
+        'seconds': match['seconds'],
+    }
@@ -0,0 +1,138 @@
+# extractors.py
+# PyPDF2, pytesseract, python-docx, Pillow and the OCR engine are imported inside the
+# functions that need them, so importing this module (and the app) stays cheap until
+# a document is actually processed.
+import time
+
+# Pages whose text layer yields fewer characters than this are treated as scanned.
+MIN_PAGE_CHARS = 20
+
+
+def extract_text_from_scanned_pdf(pdf_file):
+    from ocr_engine import iter_scanned_pdf_pages
+    return "".join(f"\n--- Page {page_number} ---\n{page_text}"
+                   for page_number, page_text, _, _ in iter_scanned_pdf_pages(pdf_file))
+
+
+def extract_text_from_image(image_file):
+    import pytesseract
+    from PIL import Image
+    image = Image.open(image_file)
+    return pytesseract.image_to_string(image, lang='eng')
+
+
+def extract_text_from_pdf(pdf_file):
+    import PyPDF2
+    reader = PyPDF2.PdfReader(pdf_file)
+    return "".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_text_from_docx(docx_file):
+    from docx import Document
+    doc = Document(docx_file)
+    text = "\n".join(para.text for para in doc.paragraphs)
+    for table in doc.tables:
+        for row in table.rows:
+            text += "\n" + " ".join(cell.text for cell in row.cells)
+    return text
+
+
+def extract_text_from_pdf_hybrid(pdf_file, min_chars=MIN_PAGE_CHARS, ocr_workers=None):
+    # Returns the combined text plus one report per page: method ('text' or 'ocr'),
+    # characters extracted and seconds spent (plus the OCR processes' CPU seconds).
+    # `ocr_workers` caps the OCR processes (default: one per core).
+    import PyPDF2
+    reader = PyPDF2.PdfReader(pdf_file)
+    pages = []
+    for page_number, page in enumerate(reader.pages, 1):
+        start = time.perf_counter()
+        page_text = page.extract_text() or ""
+        pages.append({'page': page_number, 'method': 'text', 'text': page_text,
+                      'seconds': time.perf_counter() - start})
+
+    scanned = [p['page'] for p in pages if len(p['text'].strip()) < min_chars]
+    if scanned:
+        from ocr_engine import iter_scanned_pdf_pages
+        pdf_file.seek(0)
+        for page_number, page_text, seconds, cpu in iter_scanned_pdf_pages(pdf_file, page_numbers=scanned,
+                                                                           max_workers=ocr_workers):
+            report = pages[page_number - 1]
+            report.update(method='ocr', text=page_text, seconds=report['seconds'] + seconds, cpu_seconds=cpu)
+
+    text = "".join(f"\n--- Page {p['page']} ---\n{p['text']}" for p in pages)
+    for p in pages:
+        p['chars'] = len(p.pop('text'))
+    return text, pages
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def _paragraph_text(paragraph):
+    parts = []
+    for node in paragraph.iter(W + 't', W + 'tab', W + 'br', W + 'cr'):
+        if node.tag == W + 't':
+            parts.append(node.text or '')
+        elif node.tag == W + 'tab':
+            parts.append('\t')
+        elif node.tag in (W + 'br', W + 'cr'):
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _is_merge_continuation(cell):
+    # Vertically merged cells repeat the first cell's content; only the first is kept.
+    props = cell.find(W + 'tcPr')
+    merge = props.find(W + 'vMerge') if props is not None else None
+    return merge is not None and merge.get(W + 'val', 'continue') != 'restart'
+
+
+def iter_docx_blocks(docx_file):
+    # Streams word/document.xml and yields paragraphs and table rows in document order.
+    # A row is its cells joined by spaces; a nested table's rows become lines of the
+    # cell that holds it. Processed elements are dropped from the tree as soon as they
+    # are read, so memory stays bounded however long the tables are.
+    import zipfile
+    from lxml import etree
+
+    with zipfile.ZipFile(docx_file) as archive, archive.open('word/document.xml') as xml:
+        cells = []
+        rows = []
+        # lxml (already required by python-docx) only reports the four tags of interest.
+        for event, element in etree.iterparse(xml, events=('start', 'end'),
+                                              tag=(W + 'p', W + 'tr', W + 'tc', W + 'tbl')):
+            tag = element.tag
+            if event == 'start':
+                if tag == W + 'tr':
+                    rows.append([])
+                elif tag == W + 'tc':
+                    cells.append([])
+                continue
+
+            if tag == W + 'p':
+                text = _paragraph_text(element)
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif tag == W + 'tc':
+                cell = cells.pop()
+                if not _is_merge_continuation(element):
+                    rows[-1].append('\n'.join(cell))
+            elif tag == W + 'tr':
+                row = ' '.join(rows.pop())
+                if cells:
+                    cells[-1].append(row)
+                else:
+                    yield row
+            element.clear()
+            if tag == W + 'tr' or not cells:
+                # Earlier rows / body blocks are finished too; dropping them keeps the
+                # tree small. (Inside a cell the tcPr sibling is still needed.)
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+
+
+def extract_text_from_docx_streaming(docx_file):
+    return '\n'.join(iter_docx_blocks(docx_file))
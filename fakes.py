@@ -0,0 +1,511 @@
+# fakes.py
+# In-process stand-ins for the Gmail API and the Cohere client so listing, sync,
+# extraction and summarization can be exercised and benchmarked offline with
+# controllable latency, failures and request counts.
+import calendar
+import json
+import random
+import re
+import threading
+import time
+from base64 import urlsafe_b64encode
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+SUBJECTS = [
+    'Tender Notice: Supply of ADF Scanners for {org}',
+    'RFP for Hospital Information Management System - {org}',
+    'Corrigendum: Digitization of Records at {org}',
+    'GEM Bid for Overhead Scanners - {org}',
+    'Invitation to Bid: Radiology Lab Equipment, {org}',
+    'Weekly newsletter from {org}',
+    'Meeting notes and follow-up ({org})',
+]
+ORGS = ['AIIMS Delhi', 'NIC Pune', 'PGIMER Chandigarh', 'CDAC Noida', 'KGMU Lucknow', 'ISRO Bengaluru']
+# A search term: an optional '-', then a {..} OR group, a quoted phrase or a word.
+QUERY_TERM = re.compile(r'-?(?:\{[^}]*\}|"[^"]*"|\S+)')
+SENDERS = ['tenders@gem.gov.in', 'eproc@nic.in', 'procurement@aiims.edu', 'colleague@s3ktech.ai', 'news@example.com']
+
+
+TENDER_CLAUSES = [
+    'Tender Reference No. {ref} issued by {org} for {item}.',
+    'Earnest Money Deposit (EMD) of Rs. {emd},000 shall be paid online through the e-procurement portal.',
+    'Tender fee of Rs. 5,000 (non-refundable) is payable by demand draft.',
+    'The bidder shall have an average annual turnover of Rs. {turnover} Crore during the last 3 financial years.',
+    'The bidder must hold valid ISO 9001:2015 and ISO 20000 certificates.',
+    'Preference to Make in India shall be applicable as per the Public Procurement Order.',
+    'Scope of work: supply, installation and commissioning of {item} at {org}.',
+    'Pre-bid meeting will be held on {day}-08-2026 at 11:00 hrs in the conference hall.',
+    'Penalty of 0.5% of the contract value per week of delay, subject to a maximum of 10%.',
+    'Contract period shall be 3 years, extendable by 2 years on satisfactory performance.',
+    'Bid submission end date: {day}-09-2026 15:00 hrs. Technical bid opening the next working day.',
+    'Contact: Procurement Officer, {org}, email tenders@example.gov.in, phone 011-2658{emd}.',
+]
+ITEMS = ['ADF scanners (A3/A4)', 'overhead book scanners', 'hospital information management system',
+         'digitization of medical records', 'PACS for the radiology lab']
+
+
+def synthetic_tender_text(rng, lines=40):
+    values = {'ref': f'GEM/2026/B/{rng.randint(1000000, 9999999)}', 'org': rng.choice(ORGS),
+              'item': rng.choice(ITEMS), 'emd': rng.randint(10, 99), 'turnover': rng.choice([5, 10, 30, 50]),
+              'day': rng.randint(10, 28)}
+    return [rng.choice(TENDER_CLAUSES).format(**values) for _ in range(lines)]
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_text_pdf(pages, padding=0):
+    # Minimal but valid PDF with a Helvetica text layer; each page is a list of lines.
+    # `padding` bytes of unreferenced binary stream stand in for the bulk of a large
+    # tender (embedded scans, fonts) without making extraction slower.
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', b'', b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for lines in pages:
+        ops = ['BT /F1 10 Tf 12 TL 50 780 Td'] + [f'({_pdf_escape(line)}) Tj T*' for line in lines] + ['ET']
+        content = '\n'.join(ops).encode('latin-1', 'replace')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R '
+                       b'/Resources << /Font << /F1 3 0 R >> >> >>' % len(objects))
+        kids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % k for k in kids), len(kids))
+    if padding:
+        blob = random.Random(padding).randbytes(padding)
+        objects.append(b'<< /Length %d >>\nstream\n' % padding + blob + b'\nendstream')
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_page(lines, size=(1240, 1754)):
+    # A page of black text on white at roughly 150 dpi A4, as a scanner would produce.
+    from PIL import Image, ImageDraw, ImageFont
+    image = Image.new('L', size, 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=18)
+    for i, line in enumerate(lines):
+        draw.text((80, 100 + i * 36), line, fill=0, font=font)
+    return image
+
+
+def make_scanned_pdf(pages):
+    # Image-only PDF (no text layer), one rendered page per list of lines.
+    from io import BytesIO
+    images = [render_page(lines) for lines in pages]
+    out = BytesIO()
+    images[0].save(out, format='PDF', save_all=True, append_images=images[1:], resolution=150)
+    return out.getvalue()
+
+
+def make_scan_image(pages, format='PNG'):
+    # PNG of the first page, or a multi-page TIFF of all of them.
+    from io import BytesIO
+    images = [render_page(lines) for lines in pages]
+    out = BytesIO()
+    if format.upper() == 'TIFF':
+        images[0].save(out, format='TIFF', save_all=True, append_images=images[1:], compression='tiff_lzw')
+    else:
+        images[0].save(out, format=format)
+    return out.getvalue()
+
+
+def make_boq_docx(rng, paragraphs=40, tables=2, rows=500):
+    # Tender DOCX with clause paragraphs and large bill-of-quantities tables.
+    from io import BytesIO
+    from docx import Document
+    document = Document()
+    document.add_heading('Notice Inviting Tender', 0)
+    for line in synthetic_tender_text(rng, paragraphs):
+        document.add_paragraph(line)
+    for number in range(1, tables + 1):
+        document.add_heading(f'Bill of Quantities - Schedule {number}', 1)
+        table = document.add_table(rows=1, cols=6)
+        for cell, title in zip(table.rows[0].cells, ['S.No', 'Item', 'Description', 'Unit', 'Qty', 'Rate (Rs.)']):
+            cell.text = title
+        for row in range(1, rows + 1):
+            cells = table.add_row().cells
+            values = [str(row), rng.choice(ITEMS), f'Supply and installation as per specification {row}',
+                      rng.choice(['Nos', 'Set', 'Lot']), str(rng.randint(1, 50)), f'{rng.randint(1000, 900000):,}']
+            for cell, value in zip(cells, values):
+                cell.text = value
+    out = BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def _b64(data):
+    return urlsafe_b64encode(data).decode('ascii')
+
+
+def _http_error(status, content):
+    from googleapiclient.errors import HttpError
+    import httplib2
+    return HttpError(httplib2.Response({'status': status}), content)
+
+
+def _strip_body_data(node):
+    if isinstance(node, dict):
+        return {k: _strip_body_data(v) for k, v in node.items() if k != 'data'}
+    if isinstance(node, list):
+        return [_strip_body_data(v) for v in node]
+    return node
+
+
+def _has_filename(part):
+    return bool(part.get('filename')) or any(_has_filename(p) for p in part.get('parts', []))
+
+
+class FakeRequest:
+    def __init__(self, service, method, handler, stream=None):
+        self.service = service
+        self.method = method
+        self.handler = handler
+        self._stream = stream
+
+    def execute(self, http=None, num_retries=0):
+        self.service._round_trip(self.method)
+        self.service.connections[self.method].append(http)
+        response = self.handler()
+        self.service._account(response)
+        return response
+
+    def stream(self):
+        # The raw JSON body in chunks, as a streamed HTTP download would deliver it.
+        self.service._round_trip(self.method)
+        for chunk in self._stream():
+            with self.service._lock:
+                self.service.bytes_sent += len(chunk)
+            yield chunk
+
+
+class FakeBatch:
+    def __init__(self, service, callback=None):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request, callback or self.callback, request_id or str(len(self.requests))))
+
+    def execute(self, http=None):
+        self.service._round_trip('batch', items=len(self.requests))
+        self.service.connections['batch'].append(http)
+        for request, callback, request_id in self.requests:
+            self.service.calls[request.method] += 1
+            try:
+                if request_id in self.service.batch_failures:
+                    self.service.batch_failures.discard(request_id)
+                    raise _http_error(429, b'Rate Limit Exceeded')
+                response, exception = request.handler(), None
+                self.service._account(response)
+            except Exception as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class _Resource:
+    def __init__(self, **methods):
+        self.__dict__.update(methods)
+
+
+class FakeGmailService:
+    def __init__(self, num_messages=50, latency=0.05, per_item_latency=0.002, attachment_rate=0.6,
+                 attachment_pages=3, body_size=16 * 1024, seed=0):
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.calls = Counter()
+        self.round_trips = 0
+        self.bytes_sent = 0
+        # The `http` each call was executed with, per method ('batch' for batches).
+        self.connections = defaultdict(list)
+        # Message ids whose next batched get fails with a 429, as Gmail does under load.
+        self.batch_failures = set()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._messages = {}
+        self._attachments = {}
+        self._history = []
+        self._history_id = 0
+        self._oldest_history_id = 0
+        self._epoch_ms = int(time.time() * 1000) - 365 * 24 * 3600 * 1000
+        self.attachment_data = make_text_pdf(synthetic_tender_text(self._random) for _ in range(attachment_pages))
+        self.body_size = body_size
+        for _ in range(num_messages):
+            self.add_message(has_attachment=self._random.random() < attachment_rate)
+
+    # -- fixtures ---------------------------------------------------------
+    def add_message(self, subject=None, sender=None, has_attachment=False, filename=None,
+                    attachment_data=None, labels=('INBOX',), extra_attachments=(), inline_images=()):
+        # `extra_attachments` are (filename, data) pairs placed one level down, in a
+        # multipart/related sub-part, the way corrigenda and annexures often arrive.
+        # `inline_images` are (filename, data) pairs in the same sub-part with a
+        # Content-ID, like a signature logo referenced from the HTML body.
+        with self._lock:
+            n = len(self._messages) + 1
+            self._history_id += 1
+            history_id = self._history_id
+        message_id = f'{n:016x}'
+        org = self._random.choice(ORGS)
+        subject = subject or self._random.choice(SUBJECTS).format(org=org)
+        sender = sender or self._random.choice(SENDERS)
+        body = (f'Dear Sir/Madam, please find the details of "{subject}". ' * 64).encode()[:self.body_size]
+        parts = [{'partId': '0', 'mimeType': 'text/plain', 'filename': '',
+                  'body': {'size': len(body), 'data': _b64(body)}}]
+        if has_attachment or attachment_data is not None:
+            data = attachment_data if attachment_data is not None else self.attachment_data
+            attachment_id = f'att-{message_id}'
+            self._attachments[attachment_id] = data
+            parts.append({'partId': '1', 'mimeType': 'application/pdf', 'filename': filename or f'tender_{n}.pdf',
+                          'body': {'attachmentId': attachment_id, 'size': len(data)}})
+        if extra_attachments or inline_images:
+            nested = []
+            for i, (extra_name, extra_data) in enumerate(extra_attachments):
+                attachment_id = f'att-{message_id}-{i + 1}'
+                self._attachments[attachment_id] = extra_data
+                nested.append({'partId': f'2.{i}', 'mimeType': 'application/octet-stream', 'filename': extra_name,
+                               'body': {'attachmentId': attachment_id, 'size': len(extra_data)}})
+            for i, (image_name, image_data) in enumerate(inline_images, len(nested)):
+                attachment_id = f'att-{message_id}-{i + 1}'
+                self._attachments[attachment_id] = image_data
+                nested.append({'partId': f'2.{i}', 'mimeType': 'image/png', 'filename': image_name,
+                               'headers': [
+                                   {'name': 'Content-ID', 'value': f'<{image_name}@01D0>'},
+                                   {'name': 'Content-Disposition', 'value': f'inline; filename="{image_name}"'},
+                               ],
+                               'body': {'attachmentId': attachment_id, 'size': len(image_data)}})
+            parts.append({'partId': '2', 'mimeType': 'multipart/related', 'filename': '', 'body': {'size': 0},
+                          'parts': nested})
+        message = {
+            'id': message_id,
+            'threadId': message_id,
+            'labelIds': list(labels),
+            'snippet': body.decode()[:200],
+            'historyId': str(history_id),
+            'internalDate': str(self._epoch_ms + n * 60000),
+            'sizeEstimate': len(body) + sum(p['body'].get('size', 0) for p in parts[1:]),
+            'payload': {
+                'mimeType': 'multipart/mixed',
+                'filename': '',
+                'headers': [
+                    {'name': 'Subject', 'value': subject},
+                    {'name': 'From', 'value': sender},
+                    {'name': 'To', 'value': 'sales@s3ktech.ai'},
+                    {'name': 'Date', 'value': time.strftime('%a, %d %b %Y %H:%M:%S +0000', time.gmtime())},
+                ] + [{'name': 'Received', 'value': f'from mx{i}.example.com by relay'} for i in range(6)],
+                'body': {'size': 0},
+                'parts': parts,
+            },
+        }
+        with self._lock:
+            self._messages[message_id] = message
+            self._history.append({'id': str(history_id), 'messagesAdded': [{'message': self._stub(message)}]})
+        return message_id
+
+    def _stub(self, message):
+        return {'id': message['id'], 'threadId': message['threadId'], 'labelIds': list(message['labelIds'])}
+
+    def _record(self, key, message, **extra):
+        self._history_id += 1
+        message['historyId'] = str(self._history_id)
+        self._history.append({'id': str(self._history_id), key: [dict({'message': self._stub(message)}, **extra)]})
+
+    def delete_message(self, message_id):
+        with self._lock:
+            message = self._messages.pop(message_id)
+            self._record('messagesDeleted', message)
+
+    def set_labels(self, message_id, add=(), remove=()):
+        with self._lock:
+            message = self._messages[message_id]
+            message['labelIds'] = [l for l in message['labelIds'] if l not in remove] + list(add)
+            if add:
+                self._record('labelsAdded', message, labelIds=list(add))
+            if remove:
+                self._record('labelsRemoved', message, labelIds=list(remove))
+
+    def expire_history(self):
+        # Gmail keeps roughly a week of history; older startHistoryIds return 404. The
+        # current historyId (from getProfile) stays a valid start.
+        with self._lock:
+            self._oldest_history_id = self._history_id
+            self._history.clear()
+
+    # -- accounting -------------------------------------------------------
+    def _round_trip(self, method, items=0):
+        with self._lock:
+            self.round_trips += 1
+            self.calls[method] += 1
+        time.sleep(self.latency + self.per_item_latency * items)
+
+    def _account(self, response):
+        size = len(json.dumps(response))
+        with self._lock:
+            self.bytes_sent += size
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.connections.clear()
+            self.round_trips = 0
+            self.bytes_sent = 0
+
+    # -- API surface ------------------------------------------------------
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def users(self):
+        return _Resource(
+            getProfile=self._get_profile,
+            history=lambda: _Resource(list=self._history_list),
+            messages=lambda: _Resource(
+                list=self._messages_list,
+                get=self._messages_get,
+                attachments=lambda: _Resource(get=self._attachments_get),
+            ),
+        )
+
+    def _term_matches(self, message, term):
+        # The subset of Gmail search syntax build_query() produces.
+        headers = {h['name']: h['value'] for h in message['payload']['headers']}
+        if term.startswith('{'):
+            return any(self._term_matches(message, t) for t in QUERY_TERM.findall(term[1:-1]))
+        if term.startswith('in:'):
+            return term[3:].upper() in message['labelIds']
+        if term == 'has:attachment':
+            return _has_filename(message['payload'])
+        if term.startswith(('after:', 'before:')):
+            name, _, day = term.partition(':')
+            midnight = calendar.timegm(time.strptime(day, '%Y/%m/%d')) * 1000
+            return (int(message['internalDate']) >= midnight) == (name == 'after')
+        if term.startswith('from:'):
+            return term[5:].lower() in headers.get('From', '').lower()
+        text = f"{headers.get('Subject', '')} {headers.get('From', '')} {message['snippet']}".lower()
+        return re.search(r'\b' + re.escape(term.strip('"').lower()) + r'\b', text) is not None
+
+    def _matches(self, message, q):
+        for term in QUERY_TERM.findall(q or ''):
+            negate = term.startswith('-')
+            if self._term_matches(message, term.lstrip('-')) == negate:
+                return False
+        return True
+
+    def _messages_list(self, userId='me', q=None, maxResults=100, pageToken=None, **kwargs):
+        def handler():
+            with self._lock:
+                messages = sorted(self._messages.values(), key=lambda m: -int(m['internalDate']))
+            matched = [m for m in messages if self._matches(m, q)]
+            start = int(pageToken or 0)
+            page = matched[start:start + maxResults]
+            response = {'messages': [{'id': m['id'], 'threadId': m['threadId']} for m in page],
+                        'resultSizeEstimate': len(matched)}
+            if start + maxResults < len(matched):
+                response['nextPageToken'] = str(start + maxResults)
+            return response
+        return FakeRequest(self, 'messages.list', handler)
+
+    def _get_profile(self, userId='me', **kwargs):
+        def handler():
+            with self._lock:
+                return {'emailAddress': 'sales@s3ktech.ai', 'messagesTotal': len(self._messages),
+                        'historyId': str(self._history_id)}
+        return FakeRequest(self, 'getProfile', handler)
+
+    def _history_list(self, userId='me', startHistoryId=None, maxResults=100, pageToken=None, **kwargs):
+        def handler():
+            with self._lock:
+                if int(startHistoryId) < self._oldest_history_id:
+                    raise _http_error(404, b'Requested entity was not found.')
+                records = [h for h in self._history if int(h['id']) > int(startHistoryId)]
+                current = str(self._history_id)
+            start = int(pageToken or 0)
+            response = {'history': records[start:start + maxResults], 'historyId': current}
+            if start + maxResults < len(records):
+                response['nextPageToken'] = str(start + maxResults)
+            return response
+        return FakeRequest(self, 'history.list', handler)
+
+    def _messages_get(self, userId='me', id=None, format='full', metadataHeaders=None, fields=None, **kwargs):
+        def handler():
+            with self._lock:
+                message = self._messages.get(id)
+                if message is None:
+                    raise _http_error(404, b'Requested entity was not found.')
+                message = json.loads(json.dumps(message))
+            if format == 'metadata':
+                headers = message['payload']['headers']
+                if metadataHeaders:
+                    headers = [h for h in headers if h['name'] in metadataHeaders]
+                message['payload'] = {'mimeType': message['payload']['mimeType'], 'headers': headers}
+            elif format == 'minimal':
+                message.pop('payload')
+            elif fields and 'payload(' in fields:
+                message = _strip_body_data(message)
+            return message
+        return FakeRequest(self, 'messages.get', handler)
+
+    def _attachments_get(self, userId='me', messageId=None, id=None, **kwargs):
+        def handler():
+            data = self._attachments[id]
+            return {'attachmentId': id, 'size': len(data), 'data': _b64(data)}
+
+        def stream(chunk_bytes=3 * 256 * 1024):
+            data = self._attachments[id]
+            yield json.dumps({'attachmentId': id, 'size': len(data)})[:-1].encode() + b', "data": "'
+            for offset in range(0, len(data), chunk_bytes):
+                yield urlsafe_b64encode(data[offset:offset + chunk_bytes])
+            yield b'"}'
+        return FakeRequest(self, 'attachments.get', handler, stream)
+
+
+class FakeCohereError(Exception):
+    # Shaped like cohere's ApiError so callers can tell a rate limit from a bug.
+    status_code = 429
+
+
+class FakeCohereClient:
+    # Streams a canned, tender-shaped summary with configurable time to first token,
+    # per-token delay and transient failure rate, reporting token usage like Cohere.
+    def __init__(self, first_token_latency=0.5, token_latency=0.005, output_tokens=400, failure_rate=0.0, seed=0):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.output_tokens = output_tokens
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.input_tokens = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def _summary(self):
+        sections = ['Tender Name', 'EMD Details', 'Scope of Work', 'Eligibility Criteria', 'Penalty Clauses',
+                    'Contact Details', 'Final Summary']
+        lines = ['# Tender Summary']
+        for section in sections:
+            lines.append(f'**{section}**')
+            lines.extend(f'- {section} detail {i + 1} taken from the document.' for i in range(3))
+        words = '\n'.join(lines).split(' ')
+        while len(words) < self.output_tokens:
+            words += words
+        return [w + ' ' for w in words[:self.output_tokens]]
+
+    def chat_stream(self, model=None, message='', **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += len(message) // 4
+            fail = self._random.random() < self.failure_rate
+        time.sleep(self.first_token_latency)
+        if fail:
+            raise FakeCohereError('429 Too Many Requests')
+        for token in self._summary():
+            yield SimpleNamespace(event_type='text-generation', text=token)
+            time.sleep(self.token_latency)
+        billed = SimpleNamespace(input_tokens=len(message) // 4, output_tokens=self.output_tokens)
+        yield SimpleNamespace(event_type='stream-end', response=SimpleNamespace(meta=SimpleNamespace(billed_units=billed)))
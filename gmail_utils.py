@@ -1,14 +1,19 @@
 # gmail_utils.py
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from base64 import urlsafe_b64decode
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from attachment_store import spool_base64, spool_base64_stream
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
-def gmail_authenticate():
+def gmail_credentials():
     creds = None
     if os.path.exists('token.json'):
         creds = Credentials.from_authorized_user_file('token.json', SCOPES)
@@ -20,26 +25,201 @@ def gmail_authenticate():
             creds = flow.run_local_server(port=0)
         with open('token.json', 'w') as token:
             token.write(creds.to_json())
+    return creds
+
 
+def gmail_authenticate():
+    creds = gmail_credentials()
     print("✅ Gmail authentication successful.")
     return build('gmail', 'v1', credentials=creds)
 
 
-def get_recent_emails(service, max_results=50):
-    results = service.users().messages().list(userId='me', q='in:inbox -in:sent', maxResults=max_results).execute()
-    messages = results.get('messages', [])
+def thread_local_service(creds):
+    # Discovery services are not thread-safe; each worker thread builds its own.
+    local = threading.local()
+
+    def get_service():
+        if not hasattr(local, 'service'):
+            local.service = build('gmail', 'v1', credentials=creds, cache_discovery=False)
+        return local.service
+    return get_service
+
+
+LISTING_QUERY = 'in:inbox -in:sent'
+BATCH_SIZE = 50
+MAX_WORKERS = 4
+# Messages per page in the app; messages.list itself allows up to 500.
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+TENDER_TERMS = ('tender', 'rfp', 'rfq', 'rfe', 'eoi', 'bid', 'gem', 'corrigendum', 'quotation', 'boq')
+
+
+def _parts_fields(depth):
+    fields = 'partId,mimeType,filename,headers,body(attachmentId,size)'
+    if depth > 1:
+        fields += f',parts({_parts_fields(depth - 1)})'
+    return fields
+
+
+# Headers plus MIME part metadata only; body data is never transferred.
+# format=metadata would be smaller still, but it drops the part tree the
+# attachment list is computed from. Five levels cover attachments inside
+# multipart/mixed > multipart/related > multipart/alternative nesting and
+# forwarded messages.
+MESSAGE_FIELDS = (
+    'id,threadId,historyId,labelIds,snippet,sizeEstimate,internalDate,'
+    f'payload(mimeType,filename,headers,body(attachmentId,size),parts({_parts_fields(5)}))'
+)
+
+
+def _is_inline_image(part):
+    # Signature logos and pasted pictures ("image001.png") referenced by cid: from the
+    # HTML body rather than attached.
+    headers = {h['name'].lower(): h['value'] for h in part.get('headers', [])}
+    return part.get('mimeType', '').startswith('image/') and (
+        'content-id' in headers or headers.get('content-disposition', '').lower().startswith('inline'))
+
+
+def iter_attachment_parts(part, related=False):
+    # Every part with a filename anywhere in the MIME tree, in document order, except
+    # inline images of a multipart/related body.
+    if part.get('filename') and not (related and _is_inline_image(part)):
+        yield part
+    related = related or part.get('mimeType') == 'multipart/related'
+    for child in part.get('parts', []):
+        yield from iter_attachment_parts(child, related)
+
+
+def _email_from_message(msg_detail):
+    headers = {d['name']: d['value'] for d in msg_detail.get('payload', {}).get('headers', [])}
+    attachments = [
+        {
+            'filename': part['filename'],
+            'mime_type': part.get('mimeType', ''),
+            'size': part.get('body', {}).get('size', 0),
+            'attachment_id': part.get('body', {}).get('attachmentId'),
+            'part_id': part.get('partId'),
+        }
+        for part in iter_attachment_parts(msg_detail.get('payload', {}))
+    ]
+    return {
+        'id': msg_detail['id'],
+        'subject': headers.get('Subject', 'No Subject'),
+        'from': headers.get('From', 'Unknown Sender'),
+        'snippet': msg_detail.get('snippet', ''),
+        'has_attachment': bool(attachments),
+        'attachments': attachments,
+        'thread_id': msg_detail.get('threadId'),
+        'label_ids': msg_detail.get('labelIds', []),
+        'internal_date': int(msg_detail.get('internalDate', 0)),
+    }
+
+
+def _thread_http(service):
+    # googleapiclient/httplib2 are not thread-safe, so each worker thread
+    # gets its own authorized connection built from the service credentials.
+    credentials = getattr(getattr(service, '_http', None), 'credentials', None)
+    if credentials is None:
+        return None
+    import google_auth_httplib2
+    import httplib2
+    return google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+
+
+def _get_message_batch(service, message_ids):
+    results = {}
+    failed = []
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            failed.append(request_id)
+        else:
+            results[request_id] = response
+
+    batch = service.new_batch_http_request(callback=callback)
+    for message_id in message_ids:
+        batch.add(
+            service.users().messages().get(userId='me', id=message_id, format='full', fields=MESSAGE_FIELDS),
+            request_id=message_id
+        )
+    # Retries go over the same per-thread connection: this runs on pool threads and the
+    # service's own connection is not thread-safe.
+    http = _thread_http(service)
+    batch.execute(http=http)
+
+    # Batched calls fail individually (usually 429s); retry those one at a time.
+    # Messages deleted since they were listed are skipped.
+    for message_id in failed:
+        try:
+            results[message_id] = service.users().messages().get(
+                userId='me', id=message_id, format='full', fields=MESSAGE_FIELDS
+            ).execute(http=http)
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+    return results
+
+
+def get_message_metadata(service, message_ids, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+    chunks = [message_ids[i:i + batch_size] for i in range(0, len(message_ids), batch_size)]
+    details = {}
+    if len(chunks) <= 1 or max_workers <= 1:
+        for chunk in chunks:
+            details.update(_get_message_batch(service, chunk))
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for result in pool.map(lambda chunk: _get_message_batch(service, chunk), chunks):
+                details.update(result)
+    return [details[message_id] for message_id in message_ids if message_id in details]
+
+
+def build_query(has_attachment=False, after=None, before=None, domains=(), keywords=(), base=LISTING_QUERY):
+    # Filters as Gmail search terms, so Gmail does the filtering and paging. `after` and
+    # `before` are dates (`before` is exclusive); {a b} is Gmail's OR group.
+    terms = [base]
+    if has_attachment:
+        terms.append('has:attachment')
+    if after:
+        terms.append(f'after:{after:%Y/%m/%d}')
+    if before:
+        terms.append(f'before:{before:%Y/%m/%d}')
+    domains = [d.strip().lstrip('@') for d in domains if d.strip()]
+    if domains:
+        terms.append('{' + ' '.join(f'from:{d}' for d in domains) + '}')
+    keywords = [f'"{k.strip()}"' if ' ' in k.strip() else k.strip() for k in keywords if k.strip()]
+    if keywords:
+        terms.append('{' + ' '.join(keywords) + '}')
+    return ' '.join(terms)
+
+
+def list_message_ids(service, query=LISTING_QUERY, page_size=PAGE_SIZE, page_token=None):
+    # One page of a listing: (message ids, token for the next page or None, Gmail's estimate of the total).
+    response = service.users().messages().list(
+        userId='me', q=query, maxResults=min(page_size, MAX_PAGE_SIZE), pageToken=page_token
+    ).execute()
+    return ([m['id'] for m in response.get('messages', [])], response.get('nextPageToken'),
+            response.get('resultSizeEstimate', 0))
+
+
+def get_recent_emails(service, max_results=50, batched=True, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS,
+                      query=LISTING_QUERY):
+    # Follows page tokens until `max_results` messages are listed or the listing ends.
+    messages = []
+    page_token = None
+    while len(messages) < max_results:
+        message_ids, page_token, _ = list_message_ids(service, query, max_results - len(messages), page_token)
+        messages.extend({'id': message_id} for message_id in message_ids)
+        if not page_token:
+            break
+
+    if batched:
+        details = get_message_metadata(service, [msg['id'] for msg in messages], batch_size, max_workers)
+        return [_email_from_message(msg_detail) for msg_detail in details]
 
     email_data = []
     for msg in messages:
         msg_detail = service.users().messages().get(userId='me', id=msg['id']).execute()
-        headers = {d['name']: d['value'] for d in msg_detail['payload']['headers']}
-        email_data.append({
-            'id': msg['id'],
-            'subject': headers.get('Subject', 'No Subject'),
-            'from': headers.get('From', 'Unknown Sender'),
-            'snippet': msg_detail.get('snippet', ''),
-            'has_attachment': any(part.get('filename') for part in msg_detail.get('payload', {}).get('parts', []))
-        })
+        email_data.append(_email_from_message(msg_detail))
     return email_data
 
 
@@ -59,6 +239,59 @@ def get_attachment(service, message_id):
     return None, None
 
 
+# Bytes read per step when an attachment response is streamed.
+DOWNLOAD_CHUNK = 1024 * 1024
+
+
+def _stream_response(request):
+    # Yields the raw JSON body of an un-executed API request as it downloads. The
+    # discovery client would read the whole body (and decode it to a str) first.
+    if hasattr(request, 'stream'):
+        yield from request.stream()  # offline fake
+        return
+    from google.auth.transport.requests import AuthorizedSession
+    with AuthorizedSession(request.http.credentials) as session, \
+            session.get(request.uri, stream=True, timeout=300) as response:
+        response.raise_for_status()
+        yield from response.iter_content(DOWNLOAD_CHUNK)
+
+
+def list_attachments(service, message_id):
+    # The attachment list for one message, from part metadata only.
+    msg = service.users().messages().get(userId='me', id=message_id, format='full', fields=MESSAGE_FIELDS).execute()
+    return _email_from_message(msg)['attachments']
+
+
+def download_attachment(service, message_id, attachment, directory=None, lock=None):
+    # Decodes one attachment (an entry of an email's 'attachments') to a temp file as it
+    # downloads (see attachment_store.py) and returns a SpooledAttachment. Streamed
+    # downloads use their own HTTP session and can run concurrently; calls that go
+    # through the shared discovery client are serialized on `lock`.
+    lock = lock or threading.Lock()
+    if not attachment.get('attachment_id'):
+        # Small parts can arrive inline in the message body instead.
+        with lock:
+            msg = service.users().messages().get(userId='me', id=message_id, format='full').execute()
+        part = next(p for p in iter_attachment_parts(msg['payload']) if p.get('partId') == attachment['part_id'])
+        return spool_base64(attachment['filename'], part['body'].get('data', ''), directory)
+    request = service.users().messages().attachments().get(
+        userId='me',
+        messageId=message_id,
+        id=attachment['attachment_id']
+    )
+    if hasattr(request, 'stream') or getattr(request.http, 'credentials', None) is not None:
+        return spool_base64_stream(attachment['filename'], _stream_response(request), directory)
+    with lock:
+        data = request.execute().pop('data')
+    return spool_base64(attachment['filename'], data, directory)
+
+
+def get_attachment_spooled(service, message_id, directory=None):
+    # Same lookup as get_attachment (first attachment only), spooled to disk.
+    attachments = list_attachments(service, message_id)
+    return download_attachment(service, message_id, attachments[0], directory) if attachments else None
+
+
 if __name__ == "__main__":
     service = gmail_authenticate()
     emails = get_recent_emails(service)
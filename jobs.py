@@ -0,0 +1,267 @@
+# jobs.py
+# Background job queue for "Generate". Work runs on a process-wide worker pool and
+# every state change (including partial summaries) is persisted to SQLite, so
+# Streamlit reruns, refreshes and other sessions can keep reading the same jobs.
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from dedup import match_details
+from pipeline import start_attachment_processing
+from prescreen import prescreen, prescreen_summary
+from summarizer import (SUMMARY_MODE, planned_llm_calls, stream_email_summary_from_cohere, stream_summary_from_cohere,
+                        stream_updated_summary)
+from tracing import TRACE_LOG, Trace, llm_totals
+
+DB_PATH = 'jobs.db'
+WORKERS = 2
+# Partial summaries are written back at most this often while a stream is running, and
+# only once the text has grown by this share since the last write, so a long stream is
+# written a bounded number of times (total bytes written stay linear in its length).
+FLUSH_INTERVAL = 0.5
+FLUSH_GROWTH = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    message_id TEXT,
+    email TEXT,
+    status TEXT,
+    stage TEXT,
+    email_summary TEXT DEFAULT '',
+    summary TEXT DEFAULT '',
+    filename TEXT,
+    details TEXT DEFAULT '{}',
+    error TEXT,
+    created_at REAL,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_message ON jobs (message_id, created_at DESC);
+"""
+
+ACTIVE = ('queued', 'running')
+ACTIVE_SQL = f"status IN ({', '.join('?' * len(ACTIVE))})"
+# Older SQLite builds allow at most 999 bound parameters per statement.
+MAX_QUERY_IDS = 500
+COLUMNS = ['id', 'message_id', 'email', 'status', 'stage', 'email_summary', 'summary', 'filename', 'details',
+           'error', 'created_at', 'updated_at']
+
+
+class JobQueue:
+    def __init__(self, co, get_service, cache=None, path=DB_PATH, workers=WORKERS, trace_log=TRACE_LOG, dedup=None,
+                 tenders=None, prefetch=None, summary_mode=SUMMARY_MODE):
+        self.co = co
+        self.summary_mode = summary_mode
+        self.get_service = get_service
+        self.cache = cache
+        self.dedup = dedup
+        self.tenders = tenders
+        self.prefetch = prefetch
+        self.trace_log = trace_log
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        # Jobs finished before there was a tender store are parsed into it once.
+        if tenders is not None:
+            for job in self.completed():
+                if (job['summary'] or job['email_summary']) and not tenders.has(job['message_id']):
+                    self._store_tender(job['email'], job['email_summary'] or '', job['summary'] or '', job['filename'],
+                                       job['details'].get('prescreen'))
+        # Jobs interrupted by a restart are picked up again.
+        for job in self._query(f"SELECT * FROM jobs WHERE {ACTIVE_SQL} ORDER BY created_at", ACTIVE):
+            self._update(job['id'], status='queued', stage='queued')
+            self._pool.submit(self._run, job['id'], job['email'], job['details'].get('skip_disqualified', False),
+                              job['details'].get('dedup_threshold'))
+
+    # -- persistence ------------------------------------------------------
+    def _query(self, sql, params=()):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        jobs = [dict(zip(COLUMNS, row)) for row in rows]
+        for job in jobs:
+            job['email'] = json.loads(job['email'])
+            job['details'] = json.loads(job['details'])
+        return jobs
+
+    def _update(self, job_id, **fields):
+        if 'details' in fields:
+            fields['details'] = json.dumps(fields['details'])
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self._lock:
+            self._conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+            self._conn.commit()
+
+    # -- public API -------------------------------------------------------
+    def submit(self, email, force=False, skip_disqualified=False, dedup_threshold=None):
+        if not force:
+            existing = self.latest_for(email['id'])
+            if existing and existing['status'] != 'error':
+                return existing['id']
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (id, message_id, email, status, stage, details, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, email['id'], json.dumps(email), 'queued', 'queued',
+                 json.dumps({'skip_disqualified': skip_disqualified, 'dedup_threshold': dedup_threshold}), now, now)
+            )
+            self._conn.commit()
+        self._pool.submit(self._run, job_id, email, skip_disqualified, dedup_threshold)
+        return job_id
+
+    def get(self, job_id):
+        jobs = self._query('SELECT * FROM jobs WHERE id = ?', (job_id,))
+        return jobs[0] if jobs else None
+
+    def latest_for(self, message_id):
+        jobs = self._query('SELECT * FROM jobs WHERE message_id = ? ORDER BY created_at DESC LIMIT 1', (message_id,))
+        return jobs[0] if jobs else None
+
+    def latest_for_many(self, message_ids):
+        # The latest job per message id, in as few queries as the SQLite variable limit allows.
+        message_ids = list(message_ids)
+        latest = {}
+        for i in range(0, len(message_ids), MAX_QUERY_IDS):
+            batch = message_ids[i:i + MAX_QUERY_IDS]
+            for job in self._query(f"SELECT * FROM jobs WHERE message_id IN ({', '.join('?' * len(batch))}) "
+                                   "ORDER BY created_at DESC", batch):
+                latest.setdefault(job['message_id'], job)
+        return latest
+
+    def recent(self, limit=10):
+        return self._query('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,))
+
+    def completed(self):
+        # The latest finished job per message, newest first, for pipeline exports.
+        jobs = self._query("SELECT * FROM jobs WHERE status = 'done' ORDER BY created_at DESC")
+        latest = {}
+        for job in jobs:
+            latest.setdefault(job['message_id'], job)
+        return list(latest.values())
+
+    def prescreen_stats(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(json_extract(details, '$.prescreen')), "
+                "COALESCE(SUM(json_extract(details, '$.llm_calls_saved')), 0) FROM jobs"
+            ).fetchone()
+        return {'screened': row[0], 'llm_calls_saved': row[1]}
+
+    def active_count(self):
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM jobs WHERE {ACTIVE_SQL}', ACTIVE).fetchone()[0]
+
+    # -- worker -----------------------------------------------------------
+    def _store_tender(self, email, email_summary, summary, filename, screen):
+        # Fields come from the tender summary (the email summary when there is no
+        # attachment); both are searchable.
+        self.tenders.add(email, summary or email_summary, filename, screen, body=email_summary + '\n' + summary)
+
+    def _stream_into(self, job_id, field, stream):
+        chunks = []
+        length = written = 0
+        flushed = time.monotonic()
+        for chunk in stream:
+            chunks.append(chunk)
+            length += len(chunk)
+            if (time.monotonic() - flushed >= FLUSH_INTERVAL
+                    and length - written >= FLUSH_GROWTH * length):
+                self._update(job_id, **{field: ''.join(chunks)})
+                written, flushed = length, time.monotonic()
+        text = ''.join(chunks)
+        self._update(job_id, **{field: text})
+        return text
+
+    def _run(self, job_id, email, skip_disqualified=False, dedup_threshold=None):
+        started = time.perf_counter()
+        details = {'skip_disqualified': skip_disqualified, 'dedup_threshold': dedup_threshold}
+        trace = Trace('generate', job_id=job_id, message_id=email['id'])
+        try:
+            self._update(job_id, status='running', stage='email summary')
+            # An email pre-warmed in the background already has (or is getting) its attachment.
+            attachment_job = None
+            if self.prefetch is not None:
+                with trace.span('prefetch.take') as counters:
+                    attachment_job = self.prefetch.take(email['id'])
+                    counters['hit'] = int(attachment_job is not None)
+                details['prefetched'] = attachment_job is not None
+            if attachment_job is None:
+                attachment_job = start_attachment_processing(self.get_service, email['id'], trace,
+                                                             email.get('attachments'), self.dedup)
+            email_summary = self._stream_into(job_id, 'email_summary', trace.stream(
+                'llm.email_summary',
+                stream_email_summary_from_cohere(self.co, email.get('snippet') or "No snippet available.",
+                                                 has_attachment=bool(email.get('has_attachment', False)),
+                                                 cache=self.cache)))
+            details['email_summary_seconds'] = time.perf_counter() - started
+
+            self._update(job_id, stage='attachment')
+            with trace.span('attachment.wait'):
+                attachment = attachment_job.result()
+            details.update(
+                attachment_ready_seconds=time.perf_counter() - started,
+                download_seconds=attachment['download_seconds'],
+                extract_seconds=attachment.get('extract_seconds', 0),
+                files=attachment.get('files'),
+                pages=attachment['pages'],
+                warning=attachment['warning'],
+                normalization=attachment.get('normalization'),
+            )
+            self._update(job_id, filename=attachment['filename'], details=details)
+
+            text = attachment['text']
+            summary = ''
+            if text.strip():
+                with trace.span('prescreen'):
+                    details['prescreen'] = screen = prescreen(text)
+                self._update(job_id, details=details)
+                if skip_disqualified and screen['disqualified']:
+                    # Clearly disqualified: report the pre-screen instead of paying for the LLM.
+                    details['llm_calls_saved'] = planned_llm_calls(text, self.summary_mode)
+                    summary = prescreen_summary(screen)
+                    self._update(job_id, summary=summary)
+                else:
+                    match = None
+                    if self.dedup is not None:
+                        with trace.span('dedup.lookup') as counters:
+                            match = self.dedup.match(text, dedup_threshold)
+                            counters['similarity'] = match['similarity']
+                        details['dedup'] = match_details(match)
+                        self._update(job_id, details=details)
+                    if match and match['kind'] in ('exact', 'near'):
+                        # A copy of a tender summarized before: its summary still holds.
+                        summary = match['document']['summary']
+                        self._update(job_id, summary=summary)
+                    else:
+                        self._update(job_id, stage='tender summary')
+                        summary_stats = {}
+                        if match and match['kind'] == 'diff':
+                            stream = stream_updated_summary(self.co, match['document']['summary'], match['added'],
+                                                            match['removed'], cache=self.cache, stats=summary_stats)
+                        else:
+                            stream = stream_summary_from_cohere(self.co, text, cache=self.cache, stats=summary_stats,
+                                                                mode=self.summary_mode)
+                        summary = self._stream_into(job_id, 'summary', trace.stream(
+                            'llm.tender_summary', stream, totals=lambda: llm_totals(summary_stats)))
+                        details['summary_stats'] = summary_stats
+                        if match is not None:
+                            self.dedup.add(match['fingerprint'], text, summary, email['id'], email.get('subject'))
+
+            if self.tenders is not None and (summary or email_summary):
+                with trace.span('tender_store.add'):
+                    self._store_tender(email, email_summary, summary, attachment['filename'], details.get('prescreen'))
+
+            details['total_seconds'] = time.perf_counter() - started
+            details['trace'] = trace.finish(self.trace_log, status='done')
+            self._update(job_id, status='done', stage='done', details=details)
+        except Exception as e:
+            details['total_seconds'] = time.perf_counter() - started
+            details['trace'] = trace.finish(self.trace_log, status='error')
+            self._update(job_id, status='error', stage='error', error=str(e), details=details)
@@ -0,0 +1,177 @@
+# message_store.py
+# Local SQLite copy of the inbox listing, kept current from Gmail's history feed so
+# page loads read from disk instead of re-listing the mailbox on every run.
+import json
+import sqlite3
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from gmail_utils import LISTING_QUERY, get_message_metadata, _email_from_message
+from tracing import span
+
+DB_PATH = 'message_store.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    internal_date INTEGER,
+    subject TEXT,
+    sender TEXT,
+    snippet TEXT,
+    has_attachment INTEGER,
+    attachments TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_by_date ON messages (internal_date DESC);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+ROW_COLUMNS = 'id, subject, sender, snippet, has_attachment, attachments, thread_id, internal_date'
+
+
+def _row_email(row):
+    return {
+        'id': row[0],
+        'subject': row[1],
+        'from': row[2],
+        'snippet': row[3],
+        'has_attachment': bool(row[4]),
+        'attachments': json.loads(row[5]),
+        'thread_id': row[6],
+        'internal_date': row[7],
+    }
+
+
+def _in_listing(email):
+    labels = set(email['label_ids'])
+    return 'INBOX' in labels and 'SENT' not in labels
+
+
+class MessageStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # -- state ------------------------------------------------------------
+    def history_id(self):
+        row = self._conn.execute("SELECT value FROM state WHERE key = 'history_id'").fetchone()
+        return row[0] if row else None
+
+    def _set_history_id(self, history_id):
+        self._conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('history_id', ?)", (str(history_id),))
+
+    # -- reads ------------------------------------------------------------
+    def recent(self, limit=50):
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {ROW_COLUMNS} FROM messages ORDER BY internal_date DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return [_row_email(row) for row in rows]
+
+    def messages(self, service, message_ids, trace=None):
+        # Listing entries for a page of ids, in the given order. Only ids not stored yet
+        # are fetched from Gmail, and they are kept for the next time.
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {ROW_COLUMNS} FROM messages WHERE id IN ({", ".join("?" * len(message_ids))})',
+                list(message_ids)
+            ).fetchall()
+        found = {row[0]: _row_email(row) for row in rows}
+        missing = [message_id for message_id in message_ids if message_id not in found]
+        if missing:
+            with span(trace, 'gmail.get_messages', messages=len(missing)):
+                emails = [_email_from_message(m) for m in get_message_metadata(service, missing)]
+            with self._lock:
+                self._upsert(emails)
+                self._conn.commit()
+            found.update((e['id'], e) for e in emails)
+        return [found[message_id] for message_id in message_ids if message_id in found]
+
+    # -- writes -----------------------------------------------------------
+    def _upsert(self, emails):
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO messages '
+            '(id, thread_id, internal_date, subject, sender, snippet, has_attachment, attachments) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (e['id'], e['thread_id'], e['internal_date'], e['subject'], e['from'], e['snippet'],
+                 int(e['has_attachment']), json.dumps(e['attachments']))
+                for e in emails
+            ]
+        )
+
+    def _delete(self, message_ids):
+        self._conn.executemany('DELETE FROM messages WHERE id = ?', [(i,) for i in message_ids])
+
+    # -- sync -------------------------------------------------------------
+    def sync(self, service, max_results=50, trace=None):
+        start = time.perf_counter()
+        with self._lock, span(trace, 'gmail.sync') as counters:
+            history_id = self.history_id()
+            stats = None
+            if history_id:
+                try:
+                    stats = self._sync_incremental(service, history_id)
+                except HttpError as e:
+                    # A 404 means the start historyId is older than Gmail keeps.
+                    if e.resp.status != 404:
+                        raise
+            if stats is None:
+                stats = self._sync_full(service, max_results)
+            self._conn.commit()
+            counters.update(fetched=stats['fetched'], deleted=stats['deleted'], full=int(stats['mode'] == 'full'))
+        stats['seconds'] = time.perf_counter() - start
+        return stats
+
+    def _sync_full(self, service, max_results):
+        # Read the profile first so changes made during the listing are replayed next time.
+        history_id = service.users().getProfile(userId='me').execute()['historyId']
+        results = service.users().messages().list(userId='me', q=LISTING_QUERY, maxResults=max_results).execute()
+        message_ids = [msg['id'] for msg in results.get('messages', [])]
+        emails = [_email_from_message(m) for m in get_message_metadata(service, message_ids)]
+        self._conn.execute('DELETE FROM messages')
+        self._upsert(emails)
+        self._set_history_id(history_id)
+        return {'mode': 'full', 'fetched': len(emails), 'deleted': 0}
+
+    def _sync_incremental(self, service, history_id):
+        changed, deleted = set(), set()
+        page_token = None
+        latest = history_id
+        while True:
+            response = service.users().history().list(
+                userId='me', startHistoryId=history_id, pageToken=page_token
+            ).execute()
+            for record in response.get('history', []):
+                for key in ('messagesAdded', 'labelsAdded', 'labelsRemoved'):
+                    for item in record.get(key, []):
+                        changed.add(item['message']['id'])
+                for item in record.get('messagesDeleted', []):
+                    deleted.add(item['message']['id'])
+            latest = response.get('historyId', latest)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        changed -= deleted
+        emails = [_email_from_message(m) for m in get_message_metadata(service, sorted(changed))]
+        fetched = {e['id'] for e in emails}
+        keep = [e for e in emails if _in_listing(e)]
+        # Archived, sent or vanished messages drop out of the listing.
+        deleted |= (changed - fetched) | {e['id'] for e in emails if not _in_listing(e)}
+        self._upsert(keep)
+        self._delete(deleted)
+        self._set_history_id(latest)
+        return {'mode': 'incremental', 'fetched': len(emails), 'deleted': len(deleted)}
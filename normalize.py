@@ -0,0 +1,115 @@
+# normalize.py
+# Clean extracted tender text before it is put into a prompt: repeated page headers,
+# footers and watermarks, OCR noise and whitespace runs all cost tokens and latency
+# without adding information.
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+
+PAGE_MARKER = re.compile(r'^--- Page \d+ ---$')
+# A line on at least this share of pages (and at least MIN_PAGES of them) is boilerplate.
+BOILERPLATE_SHARE = 0.5
+MIN_PAGES = 3
+# Only the first and last few lines of a page are header/footer candidates; body lines
+# (BOQ rows, clause text) are never dropped as boilerplate.
+EDGE_LINES = 3
+# Page numbers are the only part of a header or footer that changes from page to page:
+# "Page 3", "Page 3 of 12", "3/12", "- 3 -".
+PAGE_NUMBER = re.compile(r'\bpage\s*\d+(?:\s*(?:of|/)\s*\d+)?|\b\d+\s*(?:of|/)\s*\d+\s*$|^\W*\d+\W*$')
+
+INVISIBLE = dict.fromkeys(map(ord, '​‌‍⁠﻿­'), None)
+SPACES = re.compile(r'[ \t  -  　\f\v]+')
+# A word broken across lines ("procure-\nment"); digits are left alone so "2023-\n24"
+# stays a financial year.
+HYPHENATED = re.compile(r'([^\W\d_])-\n([^\W\d_])')
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English prose; good enough to compare
+    # the same document before and after cleaning.
+    return math.ceil(len(text) / 4)
+
+
+def _line_key(line):
+    # Quantities, dates and amounts stay part of the key, so lines that differ only in
+    # their numbers are never merged.
+    return PAGE_NUMBER.sub('#', line.lower())
+
+
+def _edge_lines(lines):
+    # Indexes of the first and last EDGE_LINES non-empty lines of every page.
+    edges = set()
+    page = []
+    for i, line in enumerate(lines + ['--- Page 0 ---']):
+        if PAGE_MARKER.match(line):
+            edges.update(page[:EDGE_LINES] + page[-EDGE_LINES:])
+            page = []
+        elif line:
+            page.append(i)
+    return edges
+
+
+def _is_noise(line):
+    # Only rules, separators and stray symbols: short table answers ("No", "NA", "(a)")
+    # are eligibility evidence and stay.
+    return not any(c.isalnum() for c in line)
+
+
+def normalize_text(text):
+    start = time.perf_counter()
+    report = {'chars_before': len(text), 'tokens_before': estimate_tokens(text)}
+
+    cleaned = unicodedata.normalize('NFKC', text).translate(INVISIBLE)
+    cleaned = HYPHENATED.sub(r'\1\2', cleaned)
+    lines = [SPACES.sub(' ', line).strip() for line in cleaned.splitlines()]
+
+    pages = sum(1 for line in lines if PAGE_MARKER.match(line))
+    boilerplate = set()
+    edges = set()
+    if pages >= MIN_PAGES:
+        edges = _edge_lines(lines)
+        seen_on = Counter()
+        page_keys = set()
+        for i, line in enumerate(lines):
+            if PAGE_MARKER.match(line):
+                seen_on.update(page_keys)
+                page_keys = set()
+            elif i in edges:
+                page_keys.add(_line_key(line))
+        seen_on.update(page_keys)
+        threshold = max(MIN_PAGES, BOILERPLATE_SHARE * pages)
+        boilerplate = {key for key, count in seen_on.items() if count >= threshold}
+
+    kept = []
+    kept_boilerplate = set()
+    dropped_boilerplate = dropped_noise = 0
+    for i, line in enumerate(lines):
+        if not line:
+            # Collapse runs of blank lines into one.
+            if kept and kept[-1]:
+                kept.append('')
+            continue
+        key = _line_key(line) if i in edges and boilerplate else None
+        if key in boilerplate and key in kept_boilerplate:
+            # The first copy stays so a repeated header still names the tender once.
+            dropped_boilerplate += 1
+        elif _is_noise(line):
+            dropped_noise += 1
+        elif kept and line == kept[-1]:
+            dropped_noise += 1
+        else:
+            if key in boilerplate:
+                kept_boilerplate.add(key)
+            kept.append(line)
+
+    normalized = '\n'.join(kept).strip()
+    report.update(
+        chars_after=len(normalized),
+        tokens_after=estimate_tokens(normalized),
+        boilerplate_lines=dropped_boilerplate,
+        noise_lines=dropped_noise,
+        seconds=time.perf_counter() - start,
+    )
+    return normalized, report
@@ -0,0 +1,86 @@
+# ocr_engine.py
+# Page-parallel OCR for scanned PDFs. Each worker process renders one page at a time
+# from the PDF on disk into a temp folder and Tesseract reads the image file from
+# there, so only a bounded window of page images exists at once (on disk, not in
+# memory) and no page bitmap crosses back into the caller's process.
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from tracing import cpu_seconds
+
+DPI = 200
+LANG = 'eng'
+MAX_WORKERS = os.cpu_count() or 1
+# The app process already runs Streamlit, job, prefetch and attachment threads; forking
+# it can copy a lock some other thread holds and deadlock the worker. Workers start from
+# a clean fork server (or a fresh interpreter where there is none) instead.
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _ocr_page(pdf_path, page_number, dpi, lang, output_folder):
+    # Returns the text, wall seconds and CPU seconds (the worker's plus the renderer's
+    # and Tesseract's; the caller cannot see these processes' usage).
+    start = time.perf_counter()
+    cpu = cpu_seconds()
+    paths = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number,
+                              output_folder=output_folder, output_file=f'page-{page_number}', paths_only=True,
+                              grayscale=True)
+    try:
+        text = pytesseract.image_to_string(paths[0], lang=lang)
+        return text, time.perf_counter() - start, cpu_seconds() - cpu
+    finally:
+        for path in paths:
+            os.remove(path)
+
+
+def iter_ocr_pages(pdf_path, page_numbers=None, max_workers=None, window=None, dpi=DPI, lang=LANG):
+    # Yields (page number, text, seconds, CPU seconds) in page order. `max_workers`
+    # defaults to MAX_WORKERS.
+    max_workers = max_workers or MAX_WORKERS
+    if page_numbers is None:
+        page_numbers = range(1, pdfinfo_from_path(pdf_path)['Pages'] + 1)
+    page_numbers = iter(page_numbers)
+    window = window or max_workers * 2
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD))
+    pending = deque()
+    output_folder = tempfile.mkdtemp(prefix='ocr-pages-')
+
+    def submit():
+        page_number = next(page_numbers, None)
+        if page_number is not None:
+            pending.append((page_number, pool.submit(_ocr_page, pdf_path, page_number, dpi, lang, output_folder)))
+
+    try:
+        for _ in range(window):
+            submit()
+        while pending:
+            page_number, future = pending.popleft()
+            page_text, seconds, cpu = future.result()
+            # Refill the window before handing the page over so workers stay busy.
+            submit()
+            yield page_number, page_text, seconds, cpu
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+
+def iter_scanned_pdf_pages(pdf_file, **kwargs):
+    # A file that already lives on disk (e.g. a spooled attachment) is read in place.
+    path = getattr(pdf_file, 'name', None)
+    if isinstance(path, str) and os.path.isfile(path):
+        yield from iter_ocr_pages(path, **kwargs)
+        return
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+        shutil.copyfileobj(pdf_file, tmp)
+    try:
+        yield from iter_ocr_pages(tmp.name, **kwargs)
+    finally:
+        os.remove(tmp.name)
@@ -0,0 +1,161 @@
+# pipeline.py
+# Per-email processing pipeline. Attachment download and text extraction (including
+# OCR) do not depend on the email summary, so they run on a worker thread while the
+# caller streams the email summary; the tender summary starts as soon as both finish.
+# Every attachment of a message (corrigenda, BOQ sheets, annexures) is downloaded and
+# extracted concurrently and their texts are combined. With a `text_cache` (dedup.DedupIndex),
+# an attachment whose bytes were read before reuses its extracted text.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from extractors import extract_text_from_docx_streaming, extract_text_from_image, extract_text_from_pdf_hybrid
+from gmail_utils import download_attachment, list_attachments
+from normalize import normalize_text
+from tracing import cpu_seconds, span
+
+MAX_WORKERS = 4
+IMAGE_EXTENSIONS = ['png', 'jpg', 'jpeg', 'tiff']
+
+FILE_WORKERS = 4
+# Starts each attachment's text in the combined text when a message has several.
+ATTACHMENT_MARKER = '\n=== Attachment: {filename} ===\n'
+NORMALIZATION_TOTALS = ['chars_before', 'tokens_before', 'chars_after', 'tokens_after', 'boilerplate_lines',
+                        'noise_lines', 'seconds']
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='attachment')
+# Separate pool for per-file work so a message's job never waits on its own pool. A
+# message thread only waits on its files, so at most MAX_WORKERS + FILE_WORKERS threads
+# exist and at most FILE_WORKERS attachments are downloaded or extracted at once.
+_file_executor = ThreadPoolExecutor(max_workers=FILE_WORKERS, thread_name_prefix='attachment-file')
+
+
+def extract_attachment_text(filename, file_obj, ocr_workers=None):
+    # `file_obj` is a binary file; extractors read from it rather than from bytes.
+    file_ext = filename.split('.')[-1].lower()
+    pages = None
+    warning = None
+    if file_ext == 'pdf':
+        text, pages = extract_text_from_pdf_hybrid(file_obj, ocr_workers=ocr_workers)
+    elif file_ext == 'docx':
+        text = extract_text_from_docx_streaming(file_obj)
+    elif file_ext in IMAGE_EXTENSIONS:
+        text = extract_text_from_image(file_obj)
+    else:
+        warning = f"Unsupported attachment type: {file_ext}"
+        text = ""
+    return text, pages, warning
+
+
+def _download_and_extract(service, message_id, attachment, trace, lock, text_cache=None, ocr_workers=None):
+    result = {'filename': attachment['filename'], 'text': "", 'pages': None, 'warning': None, 'size': 0,
+              'normalization': None, 'extract_seconds': 0, 'cpu_seconds': 0, 'cached': False}
+    start = time.perf_counter()
+    with span(trace, 'gmail.download_attachment') as counters:
+        spooled = download_attachment(service, message_id, attachment, lock=lock)
+        counters['bytes'] = result['size'] = spooled.size
+    result['download_seconds'] = time.perf_counter() - start
+    with spooled:
+        if not spooled.size:
+            return result
+        if text_cache is not None:
+            with span(trace, 'dedup.file_lookup', bytes=spooled.size) as counters:
+                cached = text_cache.get_file(spooled.sha256)
+                counters['hit'] = int(cached is not None)
+            if cached is not None:
+                # Same bytes as an attachment read before: no extraction or OCR.
+                result.update(cached, cached=True)
+                return result
+        start = time.perf_counter()
+        cpu = cpu_seconds()
+        with spooled.open() as file_obj, span(trace, 'extract') as counters:
+            text, result['pages'], result['warning'] = extract_attachment_text(spooled.filename, file_obj,
+                                                                               ocr_workers)
+            counters['chars'] = len(text)
+            if result['pages']:
+                ocr_pages = [p for p in result['pages'] if p['method'] == 'ocr']
+                counters.update(pages=len(result['pages']), ocr_pages=len(ocr_pages))
+    if trace is not None and result['pages']:
+        # Text-layer pages are read first, then scanned pages are OCR'd; these are summed
+        # per-page times (an OCR page includes its text-layer attempt), not wall time.
+        for method in ('text', 'ocr'):
+            pages = [p for p in result['pages'] if p['method'] == method]
+            if pages:
+                trace.record(f'extract.{method}_pages', sum(p['seconds'] for p in pages), start=start,
+                             pages=len(pages))
+    # Boilerplate and OCR noise are stripped once here, before any prompt is built.
+    with span(trace, 'normalize') as counters:
+        result['text'], result['normalization'] = normalize_text(text)
+        counters['chars'] = len(result['text'])
+    result['extract_seconds'] = time.perf_counter() - start
+    # OCR workers are not this process's children, so their pages report their own CPU time.
+    result['cpu_seconds'] = cpu_seconds() - cpu + sum(p.get('cpu_seconds', 0) for p in result['pages'] or [])
+    if text_cache is not None:
+        text_cache.put_file(spooled.sha256, result['filename'], result['text'], pages=result['pages'],
+                            warning=result['warning'], normalization=result['normalization'])
+    return result
+
+
+def fetch_and_extract(service, message_id, trace=None, attachments=None, text_cache=None, ocr_workers=None):
+    # `attachments` is the email's attachment list when the listing already has it.
+    # `ocr_workers` caps the OCR processes per scanned PDF (default: one per core).
+    result = {'filename': None, 'filenames': [], 'files': [], 'text': "", 'pages': None, 'warning': None,
+              'size': 0, 'download_seconds': 0, 'cpu_seconds': 0}
+    start = time.perf_counter()
+    if attachments is None or any('part_id' not in a for a in attachments):
+        # Listings stored before part ids were recorded only knew top-level parts.
+        with span(trace, 'gmail.list_attachments'):
+            attachments = list_attachments(service, message_id)
+    if not attachments:
+        result['download_seconds'] = time.perf_counter() - start
+        return result
+
+    lock = threading.Lock()
+    futures = [_file_executor.submit(_download_and_extract, service, message_id, attachment, trace, lock, text_cache,
+                                     ocr_workers)
+               for attachment in attachments]
+    files = []
+    errors = []
+    for attachment, future in zip(attachments, futures):
+        try:
+            files.append(future.result())
+        except Exception as e:
+            errors.append(e)
+            files.append({'filename': attachment['filename'], 'text': "", 'pages': None, 'size': 0,
+                          'warning': f"Could not read {attachment['filename']}: {e}", 'normalization': None,
+                          'download_seconds': 0, 'extract_seconds': 0, 'cpu_seconds': 0, 'cached': False})
+    if len(errors) == len(files):
+        raise errors[0]
+
+    read = [f for f in files if f['size']]
+    if len(read) == 1:
+        result['text'] = read[0]['text']
+    else:
+        result['text'] = ''.join(ATTACHMENT_MARKER.format(filename=f['filename']) + f['text']
+                                 for f in read if f['text'])
+    pages = [dict(page, file=f['filename']) if len(read) > 1 else page for f in read for page in f['pages'] or []]
+    warnings = [f['warning'] for f in files if f['warning']]
+    normalized = [f['normalization'] for f in files if f['normalization']]
+    result.update(
+        filename=read[0]['filename'] if read else None,
+        filenames=[f['filename'] for f in read],
+        files=[{k: v for k, v in f.items() if k not in ('text', 'pages', 'normalization')} for f in files],
+        pages=pages or None,
+        warning='; '.join(warnings) or None,
+        size=sum(f['size'] for f in files),
+        # Files download and extract side by side; report the slowest download and
+        # the rest of the wall time as extraction.
+        download_seconds=max(f['download_seconds'] for f in files),
+        cpu_seconds=sum(f['cpu_seconds'] for f in files),
+    )
+    if normalized:
+        result['normalization'] = {key: sum(n[key] for n in normalized) for key in NORMALIZATION_TOTALS}
+    result['extract_seconds'] = time.perf_counter() - start - result['download_seconds']
+    return result
+
+
+def start_attachment_processing(get_service, message_id, trace=None, attachments=None, text_cache=None):
+    # `get_service` returns a Gmail service for the calling thread (see
+    # gmail_utils.thread_local_service). It is called on the worker, so the caller's own
+    # service is never used from two threads at once.
+    return _executor.submit(lambda: fetch_and_extract(get_service(), message_id, trace, attachments, text_cache))
@@ -0,0 +1,302 @@
+# prefetch.py
+# Background pre-warming for "Generate". Listed emails are scored with a cheap heuristic
+# (sender domain, subject keywords, attachment type and size). While no job is running,
+# the best candidates are downloaded and extracted ahead of time, then the LLM calls their
+# jobs would make are run into the summary cache, best first, within rolling CPU and LLM
+# budgets. A job for a pre-warmed email takes the extracted attachment instead of
+# fetching it, and its LLM calls replay from the cache.
+import math
+import re
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+from gmail_utils import TENDER_TERMS
+from pipeline import IMAGE_EXTENSIONS, fetch_and_extract
+from prescreen import prescreen
+from summarizer import (SUMMARY_MODE, planned_llm_calls, stream_email_summary_from_cohere, stream_summary_from_cohere,
+                        stream_updated_summary)
+from tracing import TRACE_LOG, Trace
+
+# Emails scoring below this are never prefetched.
+MIN_SCORE = 4.0
+# CPU seconds (extraction threads plus OCR processes) and LLM calls spent on speculation
+# per rolling window.
+BUDGET_WINDOW = 3600
+CPU_BUDGET = 300.0
+LLM_BUDGET = 20
+# OCR processes per scanned PDF for speculative work, so a Generate clicked while one
+# runs still gets the other cores.
+OCR_WORKERS = 1
+# Pre-warmed emails held for a Generate click, and for how long.
+MAX_READY = 20
+MAX_AGE = 3600
+MAX_CANDIDATES = 200
+# Attachments this large are left for an explicit Generate.
+MAX_ATTACHMENT_BYTES = 25 * 1024 * 1024
+POLL_INTERVAL = 1.0
+
+TENDER_SUBJECT = re.compile(r'\b(?:' + '|'.join(TENDER_TERMS) + r'|e-?procurement|invitation to bid|nit)\b', re.I)
+SENDER_DOMAIN = re.compile(r'@([\w.-]+)')
+# Government and e-procurement portals send most tenders; hospitals and institutes the rest.
+TENDER_DOMAINS = ('gov.in', 'nic.in', 'eprocure', 'etender', 'tenderwizard', 'nprocure', 'ireps')
+INSTITUTION_DOMAINS = ('.edu', '.ac.in', '.res.in', '.org.in')
+EXTENSION_WEIGHTS = {'pdf': 2.0, 'docx': 1.5, **dict.fromkeys(IMAGE_EXTENSIONS, 1.0)}
+# Inline logos and signatures are not worth a download.
+MIN_ATTACHMENT_BYTES = 10 * 1024
+# Outlook names pasted pictures and signature logos image001.png, image002.jpg, ...; they
+# still show up as attachments on forwarded mail and on listings stored before inline
+# parts were skipped.
+INLINE_IMAGE = re.compile(r'^image\d{3}\.(?:png|jpe?g|gif)$', re.I)
+
+
+def score(email):
+    # Higher is more likely a tender worth pre-warming; 0 for ones never to prefetch.
+    total = 0.0
+    domain = SENDER_DOMAIN.search(email.get('from') or '')
+    domain = domain.group(1).lower() if domain else ''
+    if any(d in domain for d in TENDER_DOMAINS):
+        total += 3.0
+    elif domain.endswith(INSTITUTION_DOMAINS):
+        total += 1.5
+    if TENDER_SUBJECT.search(email.get('subject') or ''):
+        total += 3.0
+    if email.get('has_attachment'):
+        files = [(a['filename'].rsplit('.', 1)[-1].lower(), a.get('size') or 0) for a in email.get('attachments') or []
+                 if not INLINE_IMAGE.match(a['filename'])]
+        readable = [(ext, size) for ext, size in files if ext in EXTENSION_WEIGHTS and size >= MIN_ATTACHMENT_BYTES]
+        size = sum(size for _, size in readable)
+        if size > MAX_ATTACHMENT_BYTES:
+            return 0.0
+        if readable:
+            # Bigger documents take longest to extract on a click, so gain the most.
+            total += 1.0 + max(EXTENSION_WEIGHTS[ext] for ext, _ in readable)
+            total += min(1.5, math.log10(size / MIN_ATTACHMENT_BYTES))
+        elif files:
+            total -= 2.0
+    return total
+
+
+class Prefetcher:
+    def __init__(self, co, get_service, cache=None, dedup=None, cpu_budget=CPU_BUDGET, llm_budget=LLM_BUDGET,
+                 min_score=MIN_SCORE, max_ready=MAX_READY, max_age=MAX_AGE, trace_log=TRACE_LOG,
+                 summary_mode=SUMMARY_MODE):
+        self.co = co
+        self.summary_mode = summary_mode
+        self.get_service = get_service
+        self.cache = cache
+        self.dedup = dedup
+        self.cpu_budget = cpu_budget
+        self.llm_budget = llm_budget
+        self.min_score = min_score
+        self.max_ready = max_ready
+        self.max_age = max_age
+        self.trace_log = trace_log
+        self.enabled = True
+        # What the next job will be submitted with, so the warmed LLM calls are its calls.
+        self.skip_disqualified = False
+        self.dedup_threshold = None
+        self._lock = threading.Lock()
+        self._candidates = {}
+        self._entries = {}
+        self._spent = deque()
+        self._counts = Counter()
+        self._busy = lambda: False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, busy=None):
+        # `busy()` is true while user jobs run; prefetching waits for it to be false.
+        if busy is not None:
+            self._busy = busy
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='prefetch', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def configure(self, **settings):
+        for name, value in settings.items():
+            setattr(self, name, value)
+
+    # -- public API -------------------------------------------------------
+    def offer(self, emails):
+        # Listed emails without a job yet; the ones scoring high enough become candidates.
+        now = time.time()
+        with self._lock:
+            for email in emails:
+                if email['id'] in self._entries:
+                    continue
+                value = score(email)
+                if value >= self.min_score:
+                    self._candidates[email['id']] = (value, now, email)
+            stale = sorted(self._candidates, key=lambda m: self._candidates[m][1])[:-MAX_CANDIDATES]
+            for message_id in stale:
+                del self._candidates[message_id]
+
+    def take(self, message_id):
+        # For a Generate click: the future of this email's pre-warmed attachment (possibly
+        # still running), or None when it was not prefetched.
+        with self._lock:
+            self._candidates.pop(message_id, None)
+            entry = self._entries.pop(message_id, None)
+            if entry is None:
+                self._counts['misses'] += 1
+                return None
+            entry['taken'] = True
+            if entry['future'].done():
+                self._counts['hits'] += 1
+                self._counts['warm_hits'] += int(entry['warmed'])
+                self._counts['saved_seconds'] += entry['seconds']
+            else:
+                self._counts['partial_hits'] += 1
+        return entry['future']
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            cpu_seconds, llm_calls = self._spent_since(now - BUDGET_WINDOW)
+            entries = list(self._entries.values())
+            counts = Counter(self._counts)
+            candidates = len(self._candidates)
+        hits, partial, misses = counts['hits'], counts['partial_hits'], counts['misses']
+        clicks = hits + partial + misses
+        return {
+            'candidates': candidates,
+            'prefetched': counts['prefetched'],
+            'ready': sum(1 for e in entries if e['future'].done()),
+            'warmed': sum(1 for e in entries if e['warmed']),
+            'failed': counts['failed'],
+            'clicks': clicks,
+            'hits': hits,
+            'warm_hits': counts['warm_hits'],
+            'partial_hits': partial,
+            'misses': misses,
+            'hit_rate': (hits + partial) / clicks if clicks else 0.0,
+            'saved_seconds': counts['saved_seconds'],
+            # Work on emails that expired unclicked; `unused_*` is work still waiting for a click.
+            'wasted': counts['wasted'],
+            'wasted_cpu_seconds': counts['wasted_cpu_seconds'],
+            'wasted_llm_calls': counts['wasted_llm_calls'],
+            'unused_cpu_seconds': sum(e['cpu_seconds'] for e in entries),
+            'unused_llm_calls': sum(e['llm_calls'] for e in entries),
+            'cpu_seconds': cpu_seconds,
+            'cpu_budget': self.cpu_budget,
+            'llm_calls': llm_calls,
+            'llm_budget': self.llm_budget,
+        }
+
+    # -- scheduling -------------------------------------------------------
+    def _spent_since(self, since):
+        while self._spent and self._spent[0][0] < since:
+            self._spent.popleft()
+        return sum(s[1] for s in self._spent), sum(s[2] for s in self._spent)
+
+    def _charge(self, entry, cpu_seconds=0.0, llm_calls=0):
+        with self._lock:
+            self._spent.append((time.time(), cpu_seconds, llm_calls))
+            entry['cpu_seconds'] += cpu_seconds
+            entry['llm_calls'] += llm_calls
+
+    def _next(self):
+        # The next piece of work: extracting the best candidate, or, once every candidate
+        # is extracted, warming the LLM calls of the best extracted email. None when there
+        # is nothing to do or no budget left.
+        now = time.time()
+        with self._lock:
+            for message_id, entry in list(self._entries.items()):
+                if entry['future'].done() and now - entry['created_at'] > self.max_age:
+                    del self._entries[message_id]
+                    self._counts.update(wasted=1, wasted_cpu_seconds=entry['cpu_seconds'],
+                                        wasted_llm_calls=entry['llm_calls'])
+            cpu_seconds, llm_calls = self._spent_since(now - BUDGET_WINDOW)
+            if self._candidates and len(self._entries) < self.max_ready and cpu_seconds < self.cpu_budget:
+                message_id = max(self._candidates, key=lambda m: self._candidates[m][:2])
+                value, _, email = self._candidates.pop(message_id)
+                entry = {'email': email, 'future': Future(), 'score': value, 'created_at': now, 'seconds': 0.0,
+                         'cpu_seconds': 0.0, 'llm_calls': 0, 'taken': False, 'warm_checked': False, 'warmed': False}
+                self._entries[message_id] = entry
+                return self._extract, entry
+            waiting = [e for e in self._entries.values() if e['future'].done() and not e['warm_checked']]
+            if waiting and self.cache is not None and llm_calls < self.llm_budget:
+                entry = max(waiting, key=lambda e: (e['score'], e['created_at']))
+                entry['warm_checked'] = True
+                return self._warm, entry
+        return None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            task = self._next() if self.enabled and not self._busy() else None
+            if task is None:
+                self._stop.wait(POLL_INTERVAL)
+                continue
+            work, entry = task
+            try:
+                work(entry)
+            except Exception:
+                # Warming is best effort; a failed LLM call only leaves the cache cold.
+                with self._lock:
+                    self._counts['failed'] += 1
+
+    def _extract(self, entry):
+        email = entry['email']
+        trace = Trace('prefetch', message_id=email['id'])
+        start = time.perf_counter()
+        try:
+            attachment = fetch_and_extract(self.get_service(), email['id'], trace, email.get('attachments'),
+                                           self.dedup, ocr_workers=OCR_WORKERS)
+        except Exception as e:
+            with self._lock:
+                if self._entries.get(email['id']) is entry:
+                    del self._entries[email['id']]
+                self._counts['failed'] += 1
+            entry['future'].set_exception(e)
+            trace.finish(self.trace_log, status='error')
+            return
+        entry['seconds'] = time.perf_counter() - start
+        self._charge(entry, cpu_seconds=attachment['cpu_seconds'])
+        with self._lock:
+            self._counts['prefetched'] += 1
+        entry['future'].set_result(attachment)
+        trace.finish(self.trace_log, status='done')
+
+    def _warm(self, entry):
+        # Runs the job's LLM calls (same prompts, same dedup decision) into the cache.
+        email = entry['email']
+        text = entry['future'].result()['text']
+        summary = None
+        calls = 1
+        if text.strip() and not (self.skip_disqualified and prescreen(text)['disqualified']):
+            match = self.dedup.match(text, self.dedup_threshold, count=False) if self.dedup is not None else None
+            if match is None or match['kind'] == 'miss':
+                summary = lambda stats: stream_summary_from_cohere(self.co, text, cache=self.cache, stats=stats,
+                                                                   mode=self.summary_mode)
+                calls += planned_llm_calls(text, self.summary_mode)
+            elif match['kind'] == 'diff':
+                summary = lambda stats: stream_updated_summary(self.co, match['document']['summary'], match['added'],
+                                                               match['removed'], cache=self.cache, stats=stats)
+                calls += 1
+        with self._lock:
+            _, llm_calls = self._spent_since(time.time() - BUDGET_WINDOW)
+        # A clicked email's own job is already making these calls.
+        if entry['taken'] or llm_calls + calls > self.llm_budget:
+            return
+        trace = Trace('prefetch', message_id=email['id'])
+        with trace.span('prefetch.email_summary'):
+            for _ in stream_email_summary_from_cohere(self.co, email.get('snippet') or "No snippet available.",
+                                                      has_attachment=bool(email.get('has_attachment', False)),
+                                                      cache=self.cache):
+                pass
+        # The email summary counts as one call; cache hits in the tender summary do not count.
+        self._charge(entry, llm_calls=1)
+        if summary is not None and not entry['taken']:
+            stats = {}
+            with trace.span('prefetch.tender_summary') as counters:
+                for _ in summary(stats):
+                    pass
+                counters['llm_calls'] = sum(1 for s in stats.get('stages', []) if not s['cached'])
+            self._charge(entry, llm_calls=counters['llm_calls'])
+        entry['warmed'] = True
+        trace.finish(self.trace_log, status='done')
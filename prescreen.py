@@ -0,0 +1,164 @@
+# prescreen.py
+# Local eligibility pre-screen for the fixed criteria the prompts ask the LLM to check.
+# The text is scanned once with a compiled index of literal anchor keywords; only the
+# lines an anchor lands on are checked against the full criterion patterns and kept
+# as evidence.
+import re
+import string
+import time
+from bisect import bisect_right
+
+MAX_TURNOVER_CRORE = 30
+HELD_ISO = {'9001', '20000'}
+MAX_EVIDENCE = 3
+
+PATTERNS = {
+    'make_in_india': r'make\s*in\s*india|\bMII\b|preference\s+to\s+make|class[\s-]*i+\s+local\s+supplier',
+    'turnover': r'turn[\s-]*over',
+    'gem_boq': r'\bbo[qQ]\s+bid|\bbid\s+type\s*:?\s*bo[qQ]|\bBOQ\b',
+    'gem_v2q2': r'\bV\s*2\s*[-/,]?\s*Q\s*2\b',
+    'iso': r'\bISO\s*[:/-]?\s*(?:IEC\s*)?\d{4,5}',
+}
+LABELS = {
+    'make_in_india': 'Make in India clause',
+    'turnover': f'Average turnover above {MAX_TURNOVER_CRORE} Crore',
+    'gem_boq': 'GEM bid in BOQ category',
+    'gem_v2q2': 'GEM bid in V2 Q2 category',
+    'iso': 'ISO certificates beyond ISO 9001 / ISO 20000',
+}
+# Lowercase keywords every match of the criterion pattern must contain, once runs of
+# spaces and tabs are collapsed to one space.
+ANCHORS = {
+    'make': 'make_in_india', 'mii': 'make_in_india', 'local': 'make_in_india',
+    'turn': 'turnover',
+    'boq': 'gem_boq',
+    'q2': 'gem_v2q2', 'q 2': 'gem_v2q2',
+    'iso': 'iso',
+}
+SPACES = re.compile(r'[^\S\n]+')
+COMPILED = {name: re.compile(pattern, re.I) for name, pattern in PATTERNS.items()}
+# Literal alternation over ASCII-lowercased text; far faster than running the
+# case-insensitive criterion patterns over the whole document.
+INDEX = re.compile('|'.join(re.escape(anchor) for anchor in ANCHORS))
+# ASCII-only lowercasing keeps character offsets identical to the original text.
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+NEGATION = re.compile(r'not\s+applicable|shall\s+not\s+apply|\bexempt|\bN/?A\b', re.I)
+# "Not a V2 Q2 bid", "not under V2-Q2" as well.
+V2Q2_NEGATION = re.compile(NEGATION.pattern + r'|\bnot\s+(?:an?\s+|in\s+|under\s+)?(?:the\s+)?(?:gem\s+)?'
+                           r'V\s*2\s*[-/,]?\s*Q\s*2\b', re.I)
+# A mention only disqualifies when the line restricts who may bid or states a
+# requirement; anything else (a preference order cited, a certificate format) is
+# left for review.
+RESTRICTION = re.compile(r'\bonly\b|\bmust\b|\bmandatory\b|\bcompulsor|\brestricted\s+to\b|\brequired\b', re.I)
+# A line placing the bid in the V2 Q2 category states it as plainly as a restriction.
+CATEGORY = re.compile(RESTRICTION.pattern + r'|categor|bid\s+type|type\s+of\s+bid', re.I)
+REQUIREMENT = re.compile(r'\bminimum\b|\bmin\b\.?|at\s+least|not\s+less\s+than|\bmust\b|\brequired\b|'
+                         r'should\s+(?:be|have)', re.I)
+AMOUNT = re.compile(
+    r'(?P<currency>rs\.?|inr|₹)?\s*(?P<value>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>crores?|cr\b\.?|lakhs?|lacs?|million|mn\b)?',
+    re.I
+)
+ISO_NUMBER = re.compile(r'ISO\s*[:/-]?\s*(?:IEC\s*)?(\d{4,5})', re.I)
+
+
+def _amounts_in_crore(line):
+    amounts = []
+    for match in AMOUNT.finditer(line):
+        value = float(match.group('value').replace(',', ''))
+        unit = (match.group('unit') or '').lower()
+        if unit.startswith('cr'):
+            amounts.append(value)
+        elif unit.startswith(('lakh', 'lac')):
+            amounts.append(value / 100)
+        elif unit in ('million', 'mn'):
+            amounts.append(value / 10)
+        elif match.group('currency') and value >= 100000:
+            amounts.append(value / 1e7)
+    return amounts
+
+
+def _evidence_lines(text):
+    starts = [0] + [m.end() for m in re.finditer('\n', text)]
+    # Collapsing spaces moves offsets but not line breaks, so a match's line number in
+    # the scanned copy is its line number in `text`.
+    scanned = SPACES.sub(' ', text.translate(ASCII_LOWER))
+    scanned_starts = [0] + [m.end() for m in re.finditer('\n', scanned)]
+    hits = {name: [] for name in PATTERNS}
+    seen = set()
+    for match in INDEX.finditer(scanned):
+        name = ANCHORS[match.group()]
+        line_number = bisect_right(scanned_starts, match.start()) - 1
+        if (name, line_number) in seen:
+            continue
+        seen.add((name, line_number))
+        end = text.find('\n', starts[line_number])
+        line = text[starts[line_number]:end if end != -1 else len(text)].strip()[:300]
+        # Repeated boilerplate lines count once as evidence.
+        if (name, line) not in seen and COMPILED[name].search(line):
+            seen.add((name, line))
+            hits[name].append(line)
+    return hits
+
+
+def _mention_verdict(lines, explicit, negation=NEGATION):
+    # Disqualifying only when a line that is not negated matches `explicit`.
+    if not lines:
+        return 'not found'
+    if all(negation.search(line) for line in lines):
+        return 'no'
+    if any(explicit.search(line) for line in lines if not negation.search(line)):
+        return 'disqualifying'
+    return 'review'
+
+
+def prescreen(text):
+    start = time.perf_counter()
+    hits = _evidence_lines(text)
+    criteria = {}
+
+    criteria['make_in_india'] = _mention_verdict(hits['make_in_india'], RESTRICTION), hits['make_in_india']
+
+    # The bar a line sets is its smallest amount, so slabs and relaxations ("30 Cr, 15 Cr
+    # for MSEs") never raise it; lines without requirement wording only ask for review.
+    required = [min(amounts) for line in hits['turnover'] if REQUIREMENT.search(line)
+                for amounts in [_amounts_in_crore(line)] if amounts]
+    if required:
+        verdict = 'disqualifying' if max(required) > MAX_TURNOVER_CRORE else 'ok'
+    elif any(_amounts_in_crore(line) for line in hits['turnover']):
+        verdict = 'review'
+    else:
+        verdict = 'not found'
+    criteria['turnover'] = verdict, hits['turnover']
+
+    criteria['gem_boq'] = ('ok' if hits['gem_boq'] else 'not found'), hits['gem_boq']
+    criteria['gem_v2q2'] = _mention_verdict(hits['gem_v2q2'], CATEGORY, V2Q2_NEGATION), hits['gem_v2q2']
+
+    required = {n for line in hits['iso'] for n in ISO_NUMBER.findall(line)}
+    if not required:
+        verdict = 'not found'
+    else:
+        verdict = 'review' if required - HELD_ISO else 'ok'
+    criteria['iso'] = verdict, hits['iso']
+
+    result = {
+        'criteria': {
+            name: {'label': LABELS[name], 'verdict': verdict, 'evidence': lines[:MAX_EVIDENCE]}
+            for name, (verdict, lines) in criteria.items()
+        },
+    }
+    result['disqualified'] = [name for name, c in result['criteria'].items() if c['verdict'] == 'disqualifying']
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def prescreen_summary(result):
+    # Markdown in the same **Parameter** / bullet layout generate_table_word reads, used
+    # in place of the LLM summary when a disqualified tender takes the cheap path.
+    reasons = ', '.join(result['criteria'][name]['label'] for name in result['disqualified'])
+    lines = ['# Tender Pre-screen', '**Verdict**', f'- Not worth chasing: disqualified by {reasons}.',
+             '- Full AI summary skipped by the local pre-screen.']
+    for criterion in result['criteria'].values():
+        lines.append(f"**{criterion['label']}**")
+        lines.append(f"- {criterion['verdict'].capitalize()}")
+        lines.extend(f'- "{line}"' for line in criterion['evidence'])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,241 @@
+# report.py
+# Word, Excel and CSV reports built from the markdown summaries. A summary is parsed in
+# one pass into (parameter, values) rows, and table rows are written as one XML fragment
+# rather than one python-docx add_row() at a time, which slows down on large tables.
+import csv
+import re
+import zipfile
+from io import BytesIO, StringIO
+from xml.sax.saxutils import escape
+
+KEY_LINE = re.compile(r'^\*\*.*\*\*$')
+ITEM_LINE = re.compile(r'^(?:-|\d+\.)')
+ITEM_PREFIX = re.compile(r'^[-\d.]+\s*')
+# Control characters XML 1.0 does not allow; OCR text occasionally carries them.
+INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+REPORT_FORMATS = ['docx', 'xlsx', 'csv']
+REPORT_MIME_TYPES = {
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+}
+# Leading columns of a pipeline report; each summary parameter adds one after these.
+PIPELINE_COLUMNS = ['Subject', 'From', 'Attachment']
+PIPELINE_TITLE = 'Tender Pipeline Report'
+# Excel rejects longer cell text.
+XLSX_CELL_CHARS = 32767
+
+
+def parse_summary(summary_text):
+    # (heading, [(parameter, [values])]): bold lines start a parameter and the bullet or
+    # numbered lines under it are its values, duplicates dropped.
+    heading = None
+    rows = []
+    values = seen = None
+    for raw in summary_text.splitlines():
+        if heading is None and raw.strip().startswith('#'):
+            heading = raw.strip().lstrip('#').strip()
+        line = raw.lstrip('#').strip()
+        if KEY_LINE.match(line):
+            key = line.strip('*').strip()
+            values, seen = ([], set()) if key else (None, None)
+            if key:
+                rows.append((key, values))
+        elif values is not None and ITEM_LINE.match(line):
+            cleaned = ITEM_PREFIX.sub('', line)
+            if cleaned not in seen:
+                seen.add(cleaned)
+                values.append(cleaned)
+    return heading or 'Table', rows
+
+
+# -- Word -----------------------------------------------------------------
+def _run_xml(text):
+    # Line breaks and tabs become <w:br/> and <w:tab/>, as python-docx does for cell.text.
+    parts = []
+    for i, line in enumerate(INVALID_XML.sub('', text).split('\n')):
+        if i:
+            parts.append('<w:br/>')
+        for j, piece in enumerate(line.split('\t')):
+            if j:
+                parts.append('<w:tab/>')
+            if piece:
+                parts.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+    return f'<w:r>{"".join(parts)}</w:r>' if parts else ''
+
+
+def _add_table(doc, header, rows):
+    # The header row goes through python-docx; the body rows are parsed as one fragment.
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import qn
+    table = doc.add_table(rows=1, cols=len(header))
+    table.style = 'Table Grid'
+    for cell, text in zip(table.rows[0].cells, header):
+        cell.text = text
+    widths = [col.get(qn('w:w')) for col in table._tbl.tblGrid.gridCol_lst]
+    body = ''.join(
+        '<w:tr>' + ''.join(f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr><w:p>{_run_xml(text)}</w:p></w:tc>'
+                           for text, width in zip(row, widths)) + '</w:tr>'
+        for row in rows
+    )
+    if body:
+        table._tbl.extend(parse_xml(f'<w:tbl xmlns:w="{W_NS}">{body}</w:tbl>'))
+    return table
+
+
+def _add_title(doc, text, level=1, size=16):
+    from docx.shared import Pt
+    title_para = doc.add_heading(level=level)
+    run_title = title_para.add_run(text)
+    run_title.bold = True
+    run_title.font.size = Pt(size)
+
+
+def _save(doc):
+    buf = BytesIO()
+    doc.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def generate_table_word(summary_text):
+    # python-docx is only imported when a report is actually built.
+    from docx import Document
+    heading, rows = parse_summary(summary_text)
+    doc = Document()
+    _add_title(doc, heading)
+    _add_table(doc, ['Parameter', 'Description'], [(key, '\n'.join(values)) for key, values in rows])
+    return _save(doc)
+
+
+# -- pipeline reports -----------------------------------------------------
+def _pipeline_rows(tenders):
+    # One row per tender: the PIPELINE_COLUMNS, then every parameter any summary has,
+    # in the order they first appear.
+    parsed = [parse_summary(t.get('summary') or '')[1] for t in tenders]
+    parameters = list(dict.fromkeys(key for rows in parsed for key, _ in rows))
+    rows = []
+    for tender, summary_rows in zip(tenders, parsed):
+        values = {key: '\n'.join(vals) for key, vals in summary_rows}
+        rows.append([tender.get('subject') or '', tender.get('from') or '', tender.get('filename') or '']
+                    + [values.get(key, '') for key in parameters])
+    return PIPELINE_COLUMNS + parameters, rows, parsed
+
+
+def _pipeline_docx(tenders):
+    from docx import Document
+    columns, rows, parsed = _pipeline_rows(tenders)
+    doc = Document()
+    _add_title(doc, PIPELINE_TITLE)
+    _add_table(doc, PIPELINE_COLUMNS, [row[:len(PIPELINE_COLUMNS)] for row in rows])
+    for tender, summary_rows in zip(tenders, parsed):
+        _add_title(doc, tender.get('subject') or 'Tender', level=2, size=13)
+        _add_table(doc, ['Parameter', 'Description'], [(key, '\n'.join(values)) for key, values in summary_rows])
+    return _save(doc)
+
+
+def _pipeline_csv(tenders):
+    columns, rows, _ = _pipeline_rows(tenders)
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    # The BOM makes Excel open the file as UTF-8.
+    return BytesIO(out.getvalue().encode('utf-8-sig'))
+
+
+def _column_name(index):
+    name = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+
+def _pipeline_xlsx(tenders):
+    # A minimal SpreadsheetML workbook with inline strings, written directly so no Excel
+    # library is needed. The header row is frozen and bold.
+    columns, rows, _ = _pipeline_rows(tenders)
+    names = [_column_name(i) for i in range(len(columns))]
+    sheet_rows = []
+    for r, row in enumerate([columns] + rows, start=1):
+        style = ' s="1"' if r == 1 else ''
+        cells = ''.join(
+            f'<c r="{name}{r}" t="inlineStr"{style}><is><t xml:space="preserve">'
+            f'{escape(INVALID_XML.sub("", text)[:XLSX_CELL_CHARS])}</t></is></c>'
+            for name, text in zip(names, row) if text
+        )
+        sheet_rows.append(f'<row r="{r}">{cells}</row>')
+    ns = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    rel_ns = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    files = {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '</Types>'
+        ),
+        '_rels/.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{rel_ns}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/workbook.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{ns}" xmlns:r="{rel_ns}">'
+            '<sheets><sheet name="Pipeline" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{rel_ns}/worksheet" Target="worksheets/sheet1.xml"/>'
+            f'<Relationship Id="rId2" Type="{rel_ns}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/styles.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<styleSheet xmlns="{ns}">'
+            '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+            '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+            '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            '<fill><patternFill patternType="gray125"/></fill></fills>'
+            '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+            '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+            '</styleSheet>'
+        ),
+        'xl/worksheets/sheet1.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<worksheet xmlns="{ns}">'
+            '<sheetViews><sheetView workbookViewId="0">'
+            '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+            f'<sheetData>{"".join(sheet_rows)}</sheetData></worksheet>'
+        ),
+    }
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buf.seek(0)
+    return buf
+
+
+def generate_pipeline_report(tenders, format='docx'):
+    # `tenders` are dicts with 'subject', 'from', 'filename' and the markdown 'summary'.
+    # Returns one consolidated report covering all of them.
+    writers = {'docx': _pipeline_docx, 'xlsx': _pipeline_xlsx, 'csv': _pipeline_csv}
+    if format not in writers:
+        raise ValueError(f"Unsupported report format: {format}")
+    return writers[format](tenders)
@@ -0,0 +1,189 @@
+# retrieval.py
+# In-process BM25 retrieval over one tender document. Long documents are cut into short
+# passages and only the best passages for each category the tender prompt asks about
+# are kept, so the prompt stays within a fixed budget however long the tender is.
+import math
+import re
+import time
+from collections import Counter
+
+PAGE_MARKER = re.compile(r'^--- Page (\d+) ---$')
+PASSAGE_CHARS = 700
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+PER_CATEGORY = 3
+# The opening passages usually carry the tender name, number and issuer; always keep them.
+LEAD_PASSAGES = 2
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+# Query terms for the categories and criteria in TENDER_PROMPT.
+CATEGORIES = {
+    'Tender Name': 'tender name title notice inviting nit invitation bid for supply',
+    'Tender Reference Number and ID': 'tender reference number ref no id bid number gem nit',
+    'Issuing Organization': 'issued by organization authority department ministry institute hospital',
+    'Tender Fee': 'tender fee document fee cost of tender non refundable',
+    'EMD': 'emd earnest money deposit bid security exemption',
+    'Estimated Value': 'estimated value project cost estimated cost budget',
+    'Pre-bid Meeting': 'pre bid meeting venue date registration link conference',
+    'Tender Meeting Dates': 'bid opening date time venue technical financial opening',
+    'Scope of Work': 'scope of work supply installation commissioning implementation services',
+    'Modules': 'modules work packages module components',
+    'Workforce Requirements': 'manpower onsite staff deployment training resident engineer',
+    'Human Resource Details': 'human resource personnel qualification experience team key',
+    'Eligibility Criteria': 'eligibility criteria qualification bidder experience similar works pre qualification',
+    'Marking Criteria': 'marking scoring criteria marks evaluation weightage qcbs technical score',
+    'Performance Security': 'performance security bank guarantee pbg',
+    'Implementation Timeline': 'implementation timeline phase schedule delivery period weeks days tat go live',
+    'Contract Duration': 'contract period duration years extendable validity',
+    'Project Locations': 'location site address delivery place consignee',
+    'Existing Software': 'existing hims ihms software application legacy system integration',
+    'Payment Terms': 'payment terms schedule milestone invoice release percentage',
+    'Submission Method': 'submission online offline physical hard copy portal upload',
+    'Selection Methodology': 'selection method qcbs l1 lowest evaluated bidder award',
+    'Cloud Service Provider': 'cloud service provider csp meity empanelled hosting data centre',
+    'Hardware Details': 'hardware ct mri x ray equipment servers scanners printers',
+    'Technical Specifications': 'technical specifications specification requirements features compliance',
+    'Radiology/Pathology Scope': 'radiology pathology laboratory lis ris pacs',
+    'Checklists': 'checklist documents required enclosures list submitted',
+    'Declarations': 'declaration undertaking affidavit format annexure self certificate',
+    'OEM Requirements': 'oem manufacturer authorization certificate maf',
+    'Penalty Clauses': 'penalty liquidated damages delay sla deduction obligations',
+    'Financial Bid Structure': 'financial bid price schedule boq price bid format',
+    'Viability Gap Funding': 'viability gap funding vgf',
+    'SPV Clauses': 'special purpose vehicle spv consortium',
+    'Land Border Clause': 'land border sharing country restriction',
+    'Modes of Payment': 'mode of payment demand draft rtgs neft online payment',
+    'Contact Details': 'contact email phone address officer',
+    'Bid Dates': 'bid submission start end date registration closing last date',
+    'Make in India': 'make in india local supplier class preference mii',
+    'Turnover': 'average annual turnover crore financial years',
+    'GEM Category': 'gem bid boq v2 q2 category',
+    'ISO Certificates': 'iso certificate certification 9001 20000 27001',
+    'Scanners': 'scanner adf ppm a3 a4 overhead',
+}
+
+
+def tokenize(text):
+    # Lowercased alphanumeric words with a plural 's' dropped; no stemmer dependency.
+    return [t[:-1] if len(t) > 3 and t.endswith('s') else t for t in TOKEN.findall(text.lower())]
+
+
+def split_passages(text, max_chars=PASSAGE_CHARS):
+    # (page, passage) pairs; passages never cross page markers.
+    passages = []
+    page = None
+    current = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            passages.append((page, '\n'.join(current)))
+        current, size = [], 0
+
+    for line in text.splitlines():
+        marker = PAGE_MARKER.match(line.strip())
+        if marker:
+            flush()
+            page = int(marker.group(1))
+            continue
+        if not line.strip():
+            if size >= max_chars // 2:
+                flush()
+            continue
+        # OCR output and DOCX paragraphs can be one very long line; cut it at spaces so
+        # no passage outgrows the budget it is selected against.
+        for piece in _line_pieces(line, max_chars):
+            if current and size + len(piece) > max_chars:
+                flush()
+            current.append(piece)
+            size += len(piece) + 1
+    flush()
+    return passages
+
+
+def _line_pieces(line, max_chars):
+    while len(line) > max_chars:
+        cut = line.rfind(' ', max_chars // 2, max_chars)
+        cut = cut if cut > 0 else max_chars
+        yield line[:cut]
+        line = line[cut:].lstrip()
+    if line:
+        yield line
+
+
+class BM25Index:
+    def __init__(self, passages):
+        self.passages = passages
+        self.postings = {}
+        self.lengths = []
+        for i, (_, passage) in enumerate(passages):
+            counts = Counter(tokenize(passage))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+
+    def search(self, query, k=PER_CATEGORY):
+        n = len(self.passages)
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings:
+                norm = K1 * (1 - B + B * self.lengths[i] / self.avg_length)
+                scores[i] += idf * tf * (K1 + 1) / (tf + norm)
+        return [i for i, _ in scores.most_common(k)]
+
+
+def select_passages(text, budget_chars, per_category=PER_CATEGORY, categories=CATEGORIES):
+    # Returns the selected passages in document order (with page markers and [...] for
+    # gaps) and a report of what was kept.
+    start = time.perf_counter()
+    passages = split_passages(text)
+    index = BM25Index(passages)
+    index_seconds = time.perf_counter() - start
+
+    ranked = [index.search(query, per_category) for query in categories.values()]
+    chosen = set()
+    used = 0
+    # Round-robin over categories by rank so every category gets its best passage
+    # before any category gets its second.
+    candidates = list(range(min(LEAD_PASSAGES, len(passages))))
+    for rank in range(per_category):
+        candidates.extend(hits[rank] for hits in ranked if rank < len(hits))
+    for i in candidates:
+        if i in chosen:
+            continue
+        size = len(passages[i][1]) + 1
+        if used + size > budget_chars:
+            continue
+        chosen.add(i)
+        used += size
+
+    lines = []
+    page = previous = None
+    for i in sorted(chosen):
+        passage_page, passage = passages[i]
+        if passage_page != page and passage_page is not None:
+            lines.append(f'\n--- Page {passage_page} ---')
+            page = passage_page
+        elif previous is not None and i != previous + 1:
+            lines.append('[...]')
+        lines.append(passage)
+        previous = i
+    selected = '\n'.join(lines).strip()
+    report = {
+        'passages': len(passages),
+        'selected': len(chosen),
+        'chars_before': len(text),
+        'chars_after': len(selected),
+        'categories_matched': sum(1 for hits in ranked if hits),
+        'index_seconds': index_seconds,
+        'seconds': time.perf_counter() - start,
+    }
+    return selected, report
@@ -0,0 +1,338 @@
+# summarizer.py
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from retrieval import select_passages
+
+MODEL = "command-a-03-2025"
+# Bump whenever a prompt below changes so stale cached summaries are not replayed.
+PROMPT_VERSION = 1
+
+TENDER_PROMPT = """You are an expert in analyzing and summarizing government and institutional tender documents.
+
+            Summarize the following tender document by extracting and presenting all important and relevant information that may be present. Only include the sections that are explicitly mentioned or applicable in the document. **Do not include sections that are not present, not mentioned, or not relevant to the specific tender type.**
+
+            **Make sure to use bullet points and headings to organize the information clearly and concisely.**
+            
+            1. AI Analyzed Lead Qualification and WIN Probability **MANDATORY**:
+            -According to you Calculate the Lead Qualification (High Value Lead or Low Value Lead) and WIN Probability (High, Medium, Low) based on the information provided in the document.
+            
+            2. Extract details under the following categories, underline and increase the font by 2 of the categories compared to its description. **ONLY IF AVAILABLE ELSE DO NOT GIVE**:
+            - Tender Name
+            - Tender Reference Number and ID  
+            - Name of the Issuing Organization or Authority  
+            - Tender Fee (amount, mode of payment)  
+            - EMD (Earnest Money Deposit) Details (amount, mode of payment)  
+            - Estimated Tender Value or Project Cost  
+            - Pre-bid Meeting Dates, Venue, and Registration/Link  
+            - Tender Meeting Dates and Venues (if different from Pre-bid)  
+            - Scope of Work  
+            - Modules or Work Packages  
+            - Workforce Requirements (specify onsite manpower and training manpower, if any)  
+            - Human Resource Details  
+            - Technical and Financial Eligibility Criteria  
+            - Technical and Financial Marking/Scoring Criteria  
+            - Performance Security Requirements  
+            - Implementation Timeline and Phases (Turnaround Time or TAT)  
+            - Contract Duration/Period  
+            - Project Location(s)  
+            - Existing IHMS or Software Application Details (if mentioned)  
+            - Payment Terms and Schedule  
+            - Submission Method (Online, Physical, or Hybrid)  
+            - Selection Methodology (e.g., QCBS, L1)  
+            - Cloud Service Provider (CSP) Details (if applicable)  
+            - Hardware Details (especially for hospital/lab tenders—CT/MRI/X-ray/Pathology equipment)  
+            - Technical Specifications  
+            - Radiology/Pathology Scope (if applicable)  
+            - Checklists (All the documents required, if provided)  
+            - Declarations, Undertakings, and Affidavits  
+            - OEM (Original Equipment Manufacturer) Document Requirements  
+            - Penalty Clauses and Bidder Obligations  
+            - Financial Bid Structure  
+            - Viability Gap Funding (VGF)  
+            - Special Purpose Vehicle (SPV) clauses  
+            - Land Border Sharing Clause  
+            - Mode of Payments for Tender Fee, EMD, and Other Charges  
+            - Contact Details of the Tender Issuer (email, phone, address)
+            Again, include **only the sections that are actually present in the document** and dont say not mentioned in the document, instead skip that section.
+
+            3. Check for the following criteria based on the document: **COMPULSORY**
+            -Mention if Criteria is yes or no or not able to find
+            -Mention the line/statement to provide proof for "Yes" or "No" criteria.
+            -If criteria is "not able to find", mention any similar statement that can be used as a proof if possible
+
+                1.If the Make in India clause is yes, then we are not able to participate in tender.
+                2.If the Average turnover  for last 3 Financial year is above is  30 Crore, then we cannot  participate. 
+                3.If the GEM bid is in the BOQ category, then we can participate in the BID
+                4.If the GEM Bid is in V2 Q2 category, then we cannot participate in the BID
+                5.We have only ISO certififcate ISO9001 2015 and ISO20000 2028
+                6.We have range of ADF Scanners from 20 PPM to 110 PM for A4 & A3 size documents
+                7.Overhead Scanners up to A3 size
+
+            Present the summary in a clean, organized format using clear headings or bullet points.
+            
+            4. At last give me these details seperate again: Tender Name, Tender Type (HIMS, Radiology Lab etc.), Tender registration start date and end date)
+            Finally give a Final Summary using the information extracted from the document. The summary should be concise, clear, and easy to understand. It should provide a high-level overview of the tender document, highlighting the most important aspects without going into excessive detail. Make Sure to mention if the Bid is worth to chase or not along with the reason as to why it is worth or not worth to chase the bid.
+            
+            Tender Document:\n\n"""
+
+TENDER_EMAIL_PROMPT = """You are an expert in analyzing and summarizing government and institutional tender emails.
+
+            Summarize the following tender email by extracting and presenting all important and relevant information that may be present. Only include the sections that are explicitly mentioned or applicable in the email. **Do not include sections that are not present, not mentioned, or not relevant to the specific tender type.**
+
+            **Make sure to use bullet points and headings to organize the information clearly and concisely.**
+            
+            1. AI Analyzed Lead Qualification and WIN Probability **MANDATORY**:
+            -According to you Calculate the Lead Qualification (High Value Lead or Low Value Lead) and WIN Probability (High, Medium, Low) based on the information provided in the email.
+            
+            2. Extract details under the following categories, underline and increase the font by 2 of the categories compared to its description. **ONLY IF AVAILABLE ELSE DO NOT GIVE**:
+            - Tender Name
+            - Tender Reference Number and ID  
+            - Name of the Issuing Organization or Authority  
+            - Tender Fee (amount, mode of payment)  
+            - EMD (Earnest Money Deposit) Details (amount, mode of payment)  
+            - Estimated Tender Value or Project Cost  
+            - Pre-bid Meeting Dates, Venue, and Registration/Link  
+            - Tender Meeting Dates and Venues (if different from Pre-bid)  
+            - Scope of Work  
+            - Modules or Work Packages  
+            - Workforce Requirements (specify onsite manpower and training manpower, if any)  
+            - Human Resource Details  
+            - Technical and Financial Eligibility Criteria  
+            - Technical and Financial Marking/Scoring Criteria  
+            - Performance Security Requirements  
+            - Implementation Timeline and Phases (Turnaround Time or TAT)  
+            - Contract Duration/Period  
+            - Project Location(s)  
+            - Existing IHMS or Software Application Details (if mentioned)  
+            - Payment Terms and Schedule  
+            - Submission Method (Online, Physical, or Hybrid)  
+            - Selection Methodology (e.g., QCBS, L1)  
+            - Cloud Service Provider (CSP) Details (if applicable)  
+            - Hardware Details (especially for hospital/lab tenders—CT/MRI/X-ray/Pathology equipment)  
+            - Technical Specifications  
+            - Radiology/Pathology Scope (if applicable)  
+            - Checklists (All the documents required, if provided)  
+            - Declarations, Undertakings, and Affidavits  
+            - OEM (Original Equipment Manufacturer) Document Requirements  
+            - Penalty Clauses and Bidder Obligations  
+            - Financial Bid Structure  
+            - Viability Gap Funding (VGF)  
+            - Special Purpose Vehicle (SPV) clauses  
+            - Land Border Sharing Clause  
+            - Mode of Payments for Tender Fee, EMD, and Other Charges  
+            - Contact Details of the Tender Issuer (email, phone, address)
+            Again, include **only the sections that are actually present in the email** and dont say not mentioned in the email, instead skip that section.
+
+            3. Check for the following criteria based on the email: **COMPULSORY**
+            -Mention if Criteria is yes or no or not able to find
+            -Mention the line/statement to provide proof for "Yes" or "No" criteria.
+            -If criteria is "not able to find", mention any similar statement that can be used as a proof if possible
+
+                1.If the Make in India clause is yes, then we are not able to participate in tender.
+                2.If the Average turnover  for last 3 Financial year is above is  30 Crore, then we cannot  participate. 
+                3.If the GEM bid is in the BOQ category, then we can participate in the BID
+                4.If the GEM Bid is in V2 Q2 category, then we cannot participate in the BID
+                5.We have only ISO certififcate ISO9001 2015 and ISO20000 2028
+                6.We have range of ADF Scanners from 20 PPM to 110 PM for A4 & A3 size documents
+                7.Overhead Scanners up to A3 size
+
+            Present the summary in a clean, organized format using clear headings or bullet points.
+            
+            4. At last give me these details seperate again: Tender Name, Tender Type (HIMS, Radiology Lab etc.), Tender registration start date and end date)
+            Finally give a Final Summary using the information extracted from the email. The summary should be concise, clear, and easy to understand. It should provide a high-level overview of the tender email, highlighting the most important aspects without going into excessive detail. Make Sure to mention if the Bid is worth to chase or not along with the reason as to why it is worth or not worth to chase the bid.
+            
+            Tender Email:\n\n"""
+
+BUSINESS_EMAIL_PROMPT = """Summarize the following business email in a clean and concise manner. 
+            Highlight key intent, sender, and any mentioned attachments, deadlines, required actions or any *important details* in clean bullet points .\n\n"""
+# Documents at least this long are summarized map-reduce style: chunks are condensed
+# to notes concurrently, then a single streamed pass writes the usual summary layout.
+MAP_REDUCE_MIN_CHARS = 90000
+CHUNK_CHARS = 30000
+MAP_WORKERS = 4
+
+# Default for long documents: send only the passages a BM25 index ranks highest for the
+# prompt's categories, keeping the prompt (and time to first token) bounded.
+# "map_reduce" reads the whole document instead, at the cost of one call per chunk.
+SUMMARY_MODE = "retrieval"
+RETRIEVAL_BUDGET_CHARS = 48000
+
+MAP_PROMPT = """You are reading part {part} of {parts} of a long government or institutional tender document.
+            Another pass will combine the notes from every part into the summary described in the instructions below.
+
+            For this part only, write concise bullet notes of every fact relevant to the categories and criteria in those instructions.
+            Quote exact names, reference numbers, amounts, dates, percentages and the proof statements for the criteria verbatim.
+            Skip categories that do not appear in this part. Do not write the final summary, lead qualification or verdicts.
+
+            Instructions:
+            {instructions}
+
+            Tender Document (part {part} of {parts}):\n\n"""
+
+REDUCE_NOTE = """The tender document was too long to send whole. Below are notes extracted from each part, in document order. Treat them as the tender document.\n\n"""
+
+RETRIEVAL_NOTE = """The tender document was too long to send whole. Below are the passages most relevant to each category, in document order; [...] marks omitted text. Treat them as the tender document.\n\n"""
+
+# A new copy of an already summarized tender (corrigendum, re-issue) only sends the
+# previous summary and the lines that changed.
+UPDATE_PROMPT = """You are an expert in analyzing and summarizing government and institutional tender documents.
+
+            Below is your earlier summary of a tender document, followed by the lines that differ in a newer copy of the same tender (for example a corrigendum, revised dates or amended clauses).
+            Rewrite the summary so it is correct for the newer copy: apply every change, keep everything else exactly as it is, and keep the same headings, layout and order.
+            Re-check the lead qualification, WIN probability, criteria and the final verdict against the changes and update them only if the changes affect them.
+            At the end add a section "Changes in this version" listing each change in one bullet.
+
+            Earlier summary:
+            {summary}
+
+            Lines added or changed in the newer copy:
+            {added}
+
+            Lines no longer present in the newer copy:
+            {removed}\n"""
+
+# Split points: OCR/hybrid page markers and common section headings.
+SECTION_BOUNDARY = re.compile(
+    r'(?=\n--- Page \d+ ---\n)'
+    r'|(?=\n(?:SECTION|Section|CHAPTER|Chapter|PART|Part|ANNEXURE|Annexure)\b)'
+    r'|(?=\n\d+(?:\.\d+)*\.?\s+[A-Z][^\n]{0,80}\n)'
+)
+
+
+def _record_usage(usage, meta):
+    billed = getattr(meta, "billed_units", None)
+    if billed is not None:
+        usage["input_tokens"] = int(billed.input_tokens or 0)
+        usage["output_tokens"] = int(billed.output_tokens or 0)
+
+
+def chat_stream(co, prompt, usage=None):
+    response = co.chat_stream(
+        model=MODEL,
+        message=prompt
+    )
+    for chunk in response:
+        if usage is not None and getattr(chunk, "event_type", None) == "stream-end":
+            _record_usage(usage, getattr(chunk.response, "meta", None))
+        if hasattr(chunk, "text") and chunk.text:
+            yield chunk.text
+
+
+def _stream(co, prompt, cache=None, usage=None, info=None):
+    if cache is None:
+        return chat_stream(co, prompt, usage)
+    return cache.stream(prompt, MODEL, PROMPT_VERSION, lambda: chat_stream(co, prompt, usage), info)
+
+
+def _timed_stream(co, prompt, cache, stats, stage, part=None):
+    entry = {"stage": stage, "part": part, "prompt_chars": len(prompt), "cached": False}
+    usage = {}
+    start = time.perf_counter()
+    output = 0
+    for text in _stream(co, prompt, cache, usage, entry):
+        if output == 0:
+            entry["first_token_seconds"] = time.perf_counter() - start
+        output += len(text)
+        yield text
+    # `cached` comes from the cache itself: a model response without billed units is
+    # still a model call.
+    entry.update(usage, output_chars=output, seconds=time.perf_counter() - start)
+    if stats is not None:
+        stats.setdefault("stages", []).append(entry)
+
+
+def split_into_chunks(text, max_chars=CHUNK_CHARS):
+    chunks = []
+    current = ""
+    for segment in SECTION_BOUNDARY.split(text):
+        # A single section longer than a chunk is cut at the last line break that fits.
+        while len(segment) > max_chars:
+            cut = segment.rfind("\n", max_chars // 2, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(segment[:cut])
+            segment = segment[cut:]
+        if current and len(current) + len(segment) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += segment
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def stream_map_reduce_summary(co, text, cache=None, stats=None, max_workers=MAP_WORKERS, chunk_chars=CHUNK_CHARS):
+    chunks = split_into_chunks(text, chunk_chars)
+    if stats is not None:
+        stats.update(mode="map_reduce", chunks=len(chunks))
+    instructions = TENDER_PROMPT[:TENDER_PROMPT.rindex("Tender Document:")].strip()
+
+    def summarize_chunk(part):
+        prompt = MAP_PROMPT.format(part=part + 1, parts=len(chunks), instructions=instructions) + chunks[part]
+        return "".join(_timed_stream(co, prompt, cache, stats, "map", part + 1))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        notes = list(pool.map(summarize_chunk, range(len(chunks))))
+    if stats is not None:
+        stats["stages"].sort(key=lambda entry: entry["part"])
+
+    combined = "\n\n".join(f"### Part {i + 1} of {len(chunks)}\n{note}" for i, note in enumerate(notes))
+    yield from _timed_stream(co, TENDER_PROMPT + REDUCE_NOTE + combined, cache, stats, "reduce")
+
+
+def stream_retrieval_summary(co, text, cache=None, stats=None, budget_chars=RETRIEVAL_BUDGET_CHARS):
+    selected, report = select_passages(text, budget_chars)
+    if not selected.strip():
+        # Nothing fit the budget (or matched); never send the prompt without a document.
+        yield from stream_map_reduce_summary(co, text, cache, stats)
+        return
+    if stats is not None:
+        stats.update(mode="retrieval", chunks=1, retrieval=report)
+    yield from _timed_stream(co, TENDER_PROMPT + RETRIEVAL_NOTE + selected, cache, stats, "retrieval")
+
+
+def stream_updated_summary(co, summary, added, removed, cache=None, stats=None):
+    if stats is not None:
+        stats.update(mode="update", chunks=1)
+    prompt = UPDATE_PROMPT.format(summary=summary, added="\n".join(added) or "(none)",
+                                  removed="\n".join(removed) or "(none)")
+    yield from _timed_stream(co, prompt, cache, stats, "update")
+
+
+def planned_llm_calls(text, mode=SUMMARY_MODE, budget_chars=RETRIEVAL_BUDGET_CHARS):
+    # The calls stream_summary_from_cohere will make for `text`, including the retrieval
+    # path's fall back to map-reduce when nothing is selected.
+    if mode == "retrieval" and len(text) > budget_chars:
+        selected, _ = select_passages(text, budget_chars)
+        if selected.strip():
+            return 1
+        return len(split_into_chunks(text)) + 1
+    if mode == "map_reduce" and len(text) >= MAP_REDUCE_MIN_CHARS:
+        return len(split_into_chunks(text)) + 1
+    return 1
+
+
+def stream_summary_from_cohere(co, text, cache=None, stats=None, mode=SUMMARY_MODE):
+    if mode == "retrieval" and len(text) > RETRIEVAL_BUDGET_CHARS:
+        yield from stream_retrieval_summary(co, text, cache, stats)
+        return
+    if mode == "map_reduce" and len(text) >= MAP_REDUCE_MIN_CHARS:
+        yield from stream_map_reduce_summary(co, text, cache, stats)
+        return
+    if stats is not None:
+        stats.update(mode="single", chunks=1)
+    yield from _timed_stream(co, TENDER_PROMPT + text, cache, stats, "single")
+
+
+def stream_email_summary_from_cohere(co, email_text, has_attachment, cache=None):
+    if not has_attachment:
+        # Use tender-style prompt if no attachment is present
+        prompt = TENDER_EMAIL_PROMPT + email_text
+    else:
+        # Use simple business email summary prompt
+        prompt = BUSINESS_EMAIL_PROMPT + f"Email:\n{email_text}"
+    yield from _stream(co, prompt, cache)
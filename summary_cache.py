@@ -0,0 +1,123 @@
+# summary_cache.py
+# Persistent cache of LLM outputs keyed by a hash of (model, prompt version, prompt),
+# so reruns and repeated "Generate" clicks replay the stored text instead of paying
+# for the model again.
+import hashlib
+import sqlite3
+import threading
+import time
+
+DB_PATH = 'summary_cache.db'
+MAX_BYTES = 64 * 1024 * 1024
+MAX_AGE = 14 * 24 * 3600
+REPLAY_CHUNK_SIZE = 80
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    prompt_version TEXT,
+    text TEXT,
+    size INTEGER,
+    created_at REAL,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS summaries_by_use ON summaries (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+
+def cache_key(prompt, model, prompt_version):
+    digest = hashlib.sha256()
+    for part in (model, str(prompt_version), prompt):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, path=DB_PATH, max_bytes=MAX_BYTES, max_age=MAX_AGE, replay_chunk_size=REPLAY_CHUNK_SIZE):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.replay_chunk_size = replay_chunk_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def _count(self, name):
+        self._conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,)
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT text FROM summaries WHERE key = ? AND created_at >= ?', (key, now - self.max_age)
+            ).fetchone()
+            if row:
+                self._conn.execute('UPDATE summaries SET last_used = ? WHERE key = ?', (now, key))
+            self._count('hits' if row else 'misses')
+            self._conn.commit()
+        return row[0] if row else None
+
+    def put(self, key, text, model, prompt_version):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO summaries (key, model, prompt_version, text, size, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, model, str(prompt_version), text, len(text.encode('utf-8')), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute('DELETE FROM summaries WHERE created_at < ?', (now - self.max_age,))
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM summaries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Least recently used entries go first until the cache fits again.
+        expired = []
+        for key, size in self._conn.execute('SELECT key, size FROM summaries ORDER BY last_used'):
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+        self._conn.executemany('DELETE FROM summaries WHERE key = ?', expired)
+
+    def stream(self, prompt, model, prompt_version, produce, info=None):
+        # `info`, when given, is told whether this call was served from the cache.
+        key = cache_key(prompt, model, prompt_version)
+        text = self.get(key)
+        if info is not None:
+            info['cached'] = text is not None
+        if text is not None:
+            for i in range(0, len(text), self.replay_chunk_size):
+                yield text[i:i + self.replay_chunk_size]
+            return
+
+        chunks = []
+        for chunk in produce():
+            chunks.append(chunk)
+            yield chunk
+        # Only complete responses are stored; an abandoned or failed stream never reaches here.
+        self.put(key, ''.join(chunks), model, prompt_version)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._conn.execute('SELECT name, value FROM counters').fetchall())
+            entries, size = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries').fetchone()
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': entries,
+            'bytes': size,
+        }
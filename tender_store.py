@@ -0,0 +1,241 @@
+# tender_store.py
+# Finished summaries parsed into structured tender records (the categories the tender
+# prompt asks for, the lead verdicts and the eligibility verdicts) and kept in SQLite
+# with an FTS5 index, so past tenders can be searched and filtered without the LLM.
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from prescreen import COMPILED as CRITERIA, LABELS
+
+DB_PATH = 'tender_store.db'
+MAX_FIELD_CHARS = 2000
+SEARCH_LIMIT = 50
+
+# Column -> lowercase phrases a summary heading or label may use for it. A heading
+# takes the first field it matches, so the more specific fields come first.
+FIELDS = {
+    'reference': ('reference', 'tender id', 'tender no', 'bid number', 'nit no'),
+    'tender_type': ('tender type',),
+    'tender_name': ('tender name', 'name of work', 'tender title'),
+    'organization': ('issuing organization', 'organization', 'authority', 'issuer', 'department'),
+    'tender_fee': ('tender fee', 'document fee'),
+    'emd': ('emd', 'earnest money'),
+    'estimated_value': ('estimated', 'project cost', 'tender value'),
+    'pre_bid': ('pre-bid', 'pre bid'),
+    'bid_dates': ('bid dates', 'registration', 'bid submission', 'end date', 'closing', 'last date', 'due date',
+                  'deadline'),
+    'location': ('location',),
+    'contact': ('contact',),
+    'final_summary': ('final summary', 'verdict'),
+}
+COLUMNS = ['message_id', 'subject', 'sender', 'filename', 'received_at', 'created_at', *FIELDS,
+           'lead_qualification', 'win_probability', 'worth_chasing', 'disqualified', 'verdicts', 'sections', 'summary']
+# Columns indexed for full-text search, with their bm25 weights.
+SEARCH_COLUMNS = {'subject': 4.0, 'organization': 4.0, 'tender_name': 6.0, 'reference': 6.0, 'body': 1.0}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS tenders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id TEXT UNIQUE,
+    subject TEXT,
+    sender TEXT,
+    filename TEXT,
+    received_at REAL,
+    created_at REAL,
+    {', '.join(f'{name} TEXT' for name in FIELDS)},
+    lead_qualification TEXT,
+    win_probability TEXT,
+    worth_chasing TEXT,
+    disqualified INTEGER,
+    verdicts TEXT,
+    sections TEXT,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS tenders_by_received ON tenders (received_at DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS tenders_fts USING fts5(
+    {', '.join(SEARCH_COLUMNS)}, tokenize='porter unicode61'
+);
+"""
+
+# "**Key**", "**Key:** value", "- **Key**: value", "### Key" and "1. Key" style labels.
+BOLD_LABEL = re.compile(r'^(?:[-*•]\s+|\d+\.\s*)?\*\*(?P<key>[^*]+?)\*\*\s*:?\s*(?P<rest>.*)$')
+HEADING = re.compile(r'^#+\s*(?P<key>.+?)\s*#*$')
+# "- Key: value" bullets whose key names a field.
+PLAIN_LABEL = re.compile(r'^(?:[-*•]\s+)?(?P<key>[A-Za-z][\w /&()-]{1,50}?)\s*:\s*(?P<rest>.+)$')
+BULLET = re.compile(r'^(?:[-*•]\s+|\d+\.\s+)')
+LEAD = re.compile(r'\b(high|low)[\s-]+value\s+lead', re.I)
+WIN = re.compile(r'win\s+probability[ \t:*–-]*(?:is\s+|of\s+)?(high|medium|low)\b', re.I)
+NOT_WORTH = re.compile(r'\bnot\s+(?:\w+\s+)?worth', re.I)
+WORTH = re.compile(r'\bworth\s+(?:to\s+)?chas', re.I)
+ANSWER = re.compile(r'\b(yes|no|not able to find|not found)\b', re.I)
+WORD = re.compile(r'\w+')
+# Markdown emphasis and heading marks, dropped from the indexed text so snippets read cleanly.
+MARKUP = re.compile(r'\*\*|^#+\s*', re.M)
+
+
+def _field_for(key):
+    key = key.lower()
+    return next((field for field, phrases in FIELDS.items() if any(p in key for p in phrases)), None)
+
+
+def parse_sections(summary_text):
+    # [(label, [lines])] in document order; bold labels and headings start a section and
+    # the lines below them (bullet markers dropped) are its values.
+    sections = []
+    values = None
+    for raw in summary_text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        match = BOLD_LABEL.match(line) or HEADING.match(line)
+        if match is None and _field_for(line.split(':', 1)[0]) and len(line.split(':', 1)[0]) <= 50:
+            match = PLAIN_LABEL.match(line)
+        if match:
+            key = match.group('key').strip().rstrip(':').strip()
+            rest = match.groupdict().get('rest') or ''
+            values = [rest.strip()] if rest.strip() else []
+            sections.append((key, values))
+        elif values is not None:
+            values.append(BULLET.sub('', line).replace('**', ''))
+    return sections
+
+
+def extract_record(summary_text, screen=None):
+    # Structured fields of one summary. `screen` is the pre-screen result, when there is one.
+    sections = parse_sections(summary_text)
+    record = dict.fromkeys(FIELDS)
+    for key, values in sections:
+        field = _field_for(key)
+        if field and record[field] is None and values:
+            record[field] = '\n'.join(values)[:MAX_FIELD_CHARS]
+
+    lead = LEAD.search(summary_text)
+    win = WIN.search(summary_text)
+    record['lead_qualification'] = f'{lead.group(1).capitalize()} Value Lead' if lead else None
+    record['win_probability'] = win.group(1).capitalize() if win else None
+    record['worth_chasing'] = 'no' if NOT_WORTH.search(summary_text) else 'yes' if WORTH.search(summary_text) else None
+
+    # The LLM's answer for each eligibility criterion, next to the local pre-screen's.
+    verdicts = {name: {'label': label, 'summary': None, 'prescreen': None} for name, label in LABELS.items()}
+    for line in summary_text.splitlines():
+        answer = ANSWER.search(line)
+        if not answer:
+            continue
+        for name, pattern in CRITERIA.items():
+            if verdicts[name]['summary'] is None and pattern.search(line):
+                verdicts[name]['summary'] = 'not found' if answer.group(1).lower().startswith('not') else answer.group(1).lower()
+    if screen:
+        for name, criterion in screen['criteria'].items():
+            verdicts[name]['prescreen'] = criterion['verdict']
+    record['verdicts'] = verdicts
+    record['disqualified'] = int(bool(screen['disqualified'])) if screen else None
+    record['sections'] = [{'label': key, 'text': '\n'.join(values)[:MAX_FIELD_CHARS]} for key, values in sections]
+    return record
+
+
+def match_query(text):
+    # User text as an FTS5 query: every whitespace-separated chunk must match, as a
+    # phrase of its words (so "5,00,000" or "AIIMS-Delhi" stay together), the last word
+    # as a prefix.
+    phrases = []
+    for chunk in text.split():
+        words = WORD.findall(chunk)
+        if words:
+            phrases.append('"' + ' '.join(words) + '"*')
+    return ' '.join(phrases)
+
+
+class TenderStore:
+    def __init__(self, path=DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def has(self, message_id):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM tenders WHERE message_id = ?', (message_id,)).fetchone() is not None
+
+    def add(self, email, summary, filename=None, screen=None, body=None):
+        # `email` is a listing entry; `summary` the markdown the fields are read from and
+        # `body` everything searchable (defaults to the summary).
+        record = extract_record(summary, screen)
+        now = time.time()
+        values = dict(
+            record,
+            message_id=email['id'],
+            subject=email.get('subject'),
+            sender=email.get('from'),
+            filename=filename,
+            received_at=email.get('internal_date', 0) / 1000 or now,
+            created_at=now,
+            verdicts=json.dumps(record['verdicts']),
+            sections=json.dumps(record['sections']),
+            summary=summary,
+        )
+        updates = ', '.join(f'{name} = excluded.{name}' for name in COLUMNS if name != 'message_id')
+        with self._lock:
+            self._conn.execute(
+                f'INSERT INTO tenders ({", ".join(COLUMNS)}) VALUES ({", ".join("?" * len(COLUMNS))}) '
+                f'ON CONFLICT(message_id) DO UPDATE SET {updates}',
+                [values[name] for name in COLUMNS]
+            )
+            row_id = self._conn.execute('SELECT id FROM tenders WHERE message_id = ?', (email['id'],)).fetchone()[0]
+            self._conn.execute('DELETE FROM tenders_fts WHERE rowid = ?', (row_id,))
+            self._conn.execute(
+                f'INSERT INTO tenders_fts (rowid, {", ".join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)',
+                (row_id, values['subject'], values['organization'], values['tender_name'], values['reference'],
+                 MARKUP.sub('', body if body is not None else summary))
+            )
+            self._conn.commit()
+        return record
+
+    def search(self, text='', win_probability=None, lead_qualification=None, disqualified=None, worth_chasing=None,
+               since=None, until=None, limit=SEARCH_LIMIT):
+        # Records matching the text (best first) and filters (newest first without text),
+        # plus the total number of matches.
+        where, params = [], []
+        query = match_query(text or '')
+        if query:
+            where.append('tenders_fts MATCH ?')
+            params.append(query)
+        for column, value in (('win_probability', win_probability), ('lead_qualification', lead_qualification),
+                              ('worth_chasing', worth_chasing)):
+            if value:
+                where.append(f't.{column} = ?')
+                params.append(value)
+        if disqualified is not None:
+            where.append('t.disqualified = ?')
+            params.append(int(disqualified))
+        if since is not None:
+            where.append('t.received_at >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('t.received_at < ?')
+            params.append(until)
+        source = 'tenders t JOIN tenders_fts ON tenders_fts.rowid = t.id' if query else 'tenders t'
+        condition = f'WHERE {" AND ".join(where)}' if where else ''
+        weights = ', '.join(str(w) for w in SEARCH_COLUMNS.values())
+        snippet = "snippet(tenders_fts, -1, '[', ']', '…', 16)" if query else 'NULL'
+        order = f'bm25(tenders_fts, {weights})' if query else 't.received_at DESC'
+        columns = ', '.join(f't.{name}' for name in COLUMNS)
+        with self._lock:
+            total = self._conn.execute(f'SELECT COUNT(*) FROM {source} {condition}', params).fetchone()[0]
+            rows = self._conn.execute(
+                f'SELECT {columns}, {snippet} FROM {source} {condition} ORDER BY {order} LIMIT ?', (*params, limit)
+            ).fetchall()
+        results = []
+        for row in rows:
+            result = dict(zip(COLUMNS, row))
+            result['verdicts'] = json.loads(result['verdicts'])
+            result['sections'] = json.loads(result['sections'])
+            result['snippet'] = ' '.join(row[-1].split()) if row[-1] else None
+            results.append(result)
+        return results, total
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM tenders').fetchone()[0]
@@ -0,0 +1,51 @@
+import base64
+import hashlib
+import json
+import os
+
+import pytest
+
+from attachment_store import spool_base64, spool_base64_stream
+
+DATA = bytes(range(256)) * 40 + b'tail'
+
+
+def response_chunks(data, size):
+    body = json.dumps({'size': len(data), 'data': base64.urlsafe_b64encode(data).decode().rstrip('=')}).encode()
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+# Chunk sizes that cut the base64 run at every offset modulo 4, split the "data" key
+# itself, and deliver one byte at a time.
+@pytest.mark.parametrize('size', [1, 3, 5, 6, 7, 4096, 1 << 20])
+def test_stream_decodes_across_chunk_boundaries(tmp_path, size):
+    with spool_base64_stream('tender.pdf', response_chunks(DATA, size), str(tmp_path)) as spooled:
+        with spooled.open() as f:
+            assert f.read() == DATA
+        assert spooled.size == len(DATA)
+        assert spooled.sha256 == hashlib.sha256(DATA).hexdigest()
+        assert spooled.path.endswith('.pdf')
+    assert not os.path.exists(spooled.path)
+
+
+@pytest.mark.parametrize('length', [0, 1, 2, 3, 4])
+def test_stream_pads_the_final_group(tmp_path, length):
+    data = DATA[:length]
+    with spool_base64_stream('a.bin', response_chunks(data, 2), str(tmp_path)) as spooled:
+        with spooled.open() as f:
+            assert f.read() == data
+
+
+def test_truncated_response_is_an_error_and_leaves_no_file(tmp_path):
+    chunks = response_chunks(DATA, 512)
+    with pytest.raises(ValueError):
+        spool_base64_stream('tender.pdf', chunks[:-2], str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_in_memory_spool_matches_stream(tmp_path):
+    encoded = base64.urlsafe_b64encode(DATA).decode().rstrip('=')
+    with spool_base64('tender.pdf', encoded, str(tmp_path), chunk_chars=8) as spooled:
+        with spooled.open() as f:
+            assert f.read() == DATA
+        assert spooled.sha256 == hashlib.sha256(DATA).hexdigest()
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from batch_summarize import RateLimiter, is_transient, with_retries
+from fakes import FakeCohereError
+
+
+def test_rate_limiter_charges_every_call():
+    limiter = RateLimiter(rate=10, per=1.0)
+    limiter.acquire(10)
+    start = time.monotonic()
+    limiter.acquire(3)
+    assert time.monotonic() - start >= 0.25
+
+
+def test_rate_limiter_larger_than_bucket_does_not_block_forever():
+    limiter = RateLimiter(rate=2, per=0.1)
+    limiter.acquire(5)
+    assert limiter.tokens < 0
+
+
+def test_transient_errors():
+    assert is_transient(FakeCohereError('429 Too Many Requests'))
+    assert is_transient(ConnectionResetError())
+    assert is_transient(TimeoutError())
+    assert not is_transient(KeyError('summary'))
+    assert not is_transient(ValueError('bad document'))
+
+
+def test_programming_errors_are_not_retried():
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise KeyError('summary')
+
+    with pytest.raises(KeyError):
+        with_retries(broken, retries=3, backoff=0, what='test')
+    assert len(calls) == 1
+
+
+def test_transient_errors_are_retried():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FakeCohereError('429 Too Many Requests')
+        return 'ok'
+
+    assert with_retries(flaky, retries=3, backoff=0, what='test') == 'ok'
+    assert len(calls) == 3
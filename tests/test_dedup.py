@@ -0,0 +1,81 @@
+import random
+
+from dedup import DedupIndex, fingerprint, match_details, similarity
+from fakes import synthetic_tender_text
+
+# Numbered so every line is distinct and a replaced line shows up once in the diff.
+TEXT = '\n'.join(f'{i}. {line}' for i, line in enumerate(synthetic_tender_text(random.Random(1), 120)))
+
+
+def index(tmp_path, **kwargs):
+    return DedupIndex(str(tmp_path / 'dedup.db'), **kwargs)
+
+
+def test_fingerprint_ignores_case_punctuation_and_whitespace():
+    assert fingerprint('Supply of  UPS, 10 kVA.\nEMD: Rs 5000') == fingerprint('supply of ups 10 kva emd rs 5000')
+
+
+def test_short_text_still_has_a_sketch():
+    text_hash, sketch = fingerprint('Tender notice')
+    assert len(sketch) == 1
+    assert similarity(sketch, sketch) == 1.0
+    assert similarity([], []) == 1.0
+
+
+def test_empty_index_misses(tmp_path):
+    result = index(tmp_path).match(TEXT)
+    assert result['kind'] == 'miss'
+    assert result['document'] is None
+
+
+def test_exact_copy_reuses_summary(tmp_path):
+    store = index(tmp_path)
+    first = store.match(TEXT)
+    store.add(first['fingerprint'], TEXT, 'summary', message_id='m1', subject='Tender')
+    result = store.match(TEXT.upper())
+    assert result['kind'] == 'exact'
+    assert result['document']['summary'] == 'summary'
+    assert match_details(result)['message_id'] == 'm1'
+
+
+def test_reordered_copy_is_near(tmp_path):
+    store = index(tmp_path, threshold=0.5)
+    store.add(fingerprint(TEXT), TEXT, 'summary')
+    lines = TEXT.splitlines()
+    result = store.match('\n'.join(lines[60:] + lines[:60]))
+    assert result['kind'] == 'near'
+    assert result['added'] == result['removed'] == []
+
+
+def test_corrigendum_is_a_diff(tmp_path):
+    store = index(tmp_path)
+    store.add(fingerprint(TEXT), TEXT, 'summary')
+    lines = TEXT.splitlines()
+    amended = '\n'.join(lines[:10] + ['Bid submission end date extended to 30-11-2026'] + lines[11:])
+    result = store.match(amended)
+    assert result['kind'] == 'diff'
+    assert result['added'] == ['Bid submission end date extended to 30-11-2026']
+    assert result['removed'] == [' '.join(lines[10].split())]
+
+
+def test_large_change_or_low_similarity_misses(tmp_path):
+    store = index(tmp_path, max_diff_chars=10)
+    store.add(fingerprint(TEXT), TEXT, 'summary')
+    assert store.match(TEXT + '\nOne more clause added by corrigendum')['kind'] == 'miss'
+    other = '\n'.join(synthetic_tender_text(random.Random(2), 120))
+    assert store.match(other)['kind'] == 'miss'
+
+
+def test_uncounted_lookups_stay_out_of_stats(tmp_path):
+    store = index(tmp_path)
+    store.match(TEXT, count=False)
+    store.match(TEXT)
+    assert store.stats()['lookups'] == 1
+
+
+def test_files_round_trip(tmp_path):
+    store = index(tmp_path)
+    assert store.get_file('abc') is None
+    store.put_file('abc', 'tender.pdf', 'text', pages=[{'page': 1}], warning=None)
+    assert store.get_file('abc') == {'text': 'text', 'pages': [{'page': 1}], 'warning': None}
+    assert store.stats()['file_hit_rate'] == 0.5
@@ -0,0 +1,69 @@
+import random
+from io import BytesIO
+
+from docx import Document
+
+from extractors import extract_text_from_docx_streaming, iter_docx_blocks
+from fakes import make_boq_docx
+
+
+def save(document):
+    out = BytesIO()
+    document.save(out)
+    out.seek(0)
+    return out
+
+
+def test_paragraphs_and_rows_in_document_order():
+    document = Document()
+    document.add_paragraph('Notice Inviting Tender')
+    table = document.add_table(rows=2, cols=3)
+    for r, values in enumerate([('S.No', 'Item', 'Qty'), ('1', 'UPS', '10')]):
+        for cell, value in zip(table.rows[r].cells, values):
+            cell.text = value
+    document.add_paragraph('Bids close on 30-11-2026')
+    assert list(iter_docx_blocks(save(document))) == ['Notice Inviting Tender', 'S.No Item Qty', '1 UPS 10',
+                                                     'Bids close on 30-11-2026']
+
+
+def test_tabs_and_breaks():
+    document = Document()
+    run = document.add_paragraph().add_run('EMD')
+    run.add_tab()
+    run.add_text('Rs. 50,000')
+    run.add_break()
+    run.add_text('Exempt for MSEs')
+    assert list(iter_docx_blocks(save(document))) == ['EMD\tRs. 50,000\nExempt for MSEs']
+
+
+def test_vertically_merged_cell_is_read_once():
+    document = Document()
+    table = document.add_table(rows=2, cols=2)
+    merged = table.cell(0, 0).merge(table.cell(1, 0))
+    merged.text = 'Lot 1'
+    table.cell(0, 1).text = 'UPS'
+    table.cell(1, 1).text = 'Batteries'
+    assert list(iter_docx_blocks(save(document))) == ['Lot 1 UPS', 'Batteries']
+
+
+def test_nested_table_rows_become_lines_of_their_cell():
+    document = Document()
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = 'Schedule A'
+    inner = table.cell(0, 1).add_table(rows=2, cols=2)
+    for r, values in enumerate([('Item', 'Qty'), ('UPS', '10')]):
+        for cell, value in zip(inner.rows[r].cells, values):
+            cell.text = value
+    # The cell's own (empty) paragraphs stay around the nested rows.
+    assert list(iter_docx_blocks(save(document))) == ['Schedule A \nItem Qty\nUPS 10\n']
+
+
+def test_large_boq_matches_python_docx():
+    data = make_boq_docx(random.Random(0), paragraphs=20, tables=2, rows=300)
+    document = Document(BytesIO(data))
+    expected = [p.text for p in document.paragraphs]
+    text = extract_text_from_docx_streaming(BytesIO(data))
+    for paragraph in expected:
+        assert paragraph in text
+    for row in document.tables[1].rows:
+        assert ' '.join(cell.text for cell in row.cells) in text
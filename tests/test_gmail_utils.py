@@ -0,0 +1,88 @@
+import datetime
+
+import gmail_utils
+from fakes import FakeGmailService
+from gmail_utils import (LISTING_QUERY, build_query, get_message_metadata, get_recent_emails, iter_attachment_parts,
+                         list_attachments, list_message_ids)
+
+LOGO = b'\x89PNG' + b'\0' * 12 * 1024
+
+
+def test_inline_images_are_not_attachments():
+    service = FakeGmailService(num_messages=0, latency=0)
+    message_id = service.add_message(has_attachment=True, filename='tender.pdf',
+                                     extra_attachments=[('corrigendum.pdf', b'%PDF-1.4')],
+                                     inline_images=[('image001.png', LOGO)])
+    names = [a['filename'] for a in list_attachments(service, message_id)]
+    assert names == ['tender.pdf', 'corrigendum.pdf']
+
+
+def test_attached_image_is_kept():
+    payload = {'mimeType': 'multipart/mixed', 'parts': [
+        {'mimeType': 'text/plain', 'filename': ''},
+        {'mimeType': 'image/jpeg', 'filename': 'site_photo.jpg',
+         'headers': [{'name': 'Content-Disposition', 'value': 'attachment; filename="site_photo.jpg"'}]},
+        # A Content-ID outside multipart/related is not referenced from a body.
+        {'mimeType': 'image/png', 'filename': 'scan.png', 'headers': [{'name': 'Content-ID', 'value': '<scan>'}]},
+    ]}
+    assert [p['filename'] for p in iter_attachment_parts(payload)] == ['site_photo.jpg', 'scan.png']
+
+
+def test_failed_batch_items_are_retried_on_the_batch_connection(monkeypatch):
+    service = FakeGmailService(num_messages=12, latency=0, per_item_latency=0)
+    ids = [m['id'] for m in service.users().messages().list(maxResults=12).execute()['messages']]
+    service.batch_failures.update(ids[1::3])
+    service.reset_counters()
+    monkeypatch.setattr(gmail_utils, '_thread_http', lambda service: object())
+    details = get_message_metadata(service, ids, batch_size=4, max_workers=3)
+    assert [d['id'] for d in details] == ids
+    assert service.calls['messages.get'] == 12 + 4
+    # Each batch's retries used that batch's own connection, never the shared one.
+    assert None not in service.connections['messages.get']
+    assert set(service.connections['messages.get']) <= set(service.connections['batch'])
+    assert len(set(service.connections['batch'])) == 3
+
+
+def test_messages_deleted_after_listing_are_skipped():
+    service = FakeGmailService(num_messages=5, latency=0, per_item_latency=0)
+    ids = [m['id'] for m in service.users().messages().list(maxResults=5).execute()['messages']]
+    service.delete_message(ids[2])
+    assert [d['id'] for d in get_message_metadata(service, ids)] == ids[:2] + ids[3:]
+
+
+def test_query_with_every_filter():
+    query = build_query(has_attachment=True, after=datetime.date(2026, 1, 5), before=datetime.date(2026, 2, 1),
+                        domains=['@gov.in', ' nic.in ', ''], keywords=['tender', ' bill of quantities ', ' '])
+    assert query == (f'{LISTING_QUERY} has:attachment after:2026/01/05 before:2026/02/01 '
+                     '{from:gov.in from:nic.in} {tender "bill of quantities"}')
+    assert build_query() == LISTING_QUERY
+
+
+def test_before_is_exclusive():
+    service = FakeGmailService(num_messages=0, latency=0, per_item_latency=0)
+    message = service.users().messages().get(id=service.add_message()).execute()
+    day = datetime.datetime.fromtimestamp(int(message['internalDate']) / 1000, datetime.timezone.utc).date()
+    assert message['id'] not in list_message_ids(service, build_query(before=day))[0]
+    assert message['id'] in list_message_ids(service, build_query(before=day + datetime.timedelta(days=1)))[0]
+    assert message['id'] in list_message_ids(service, build_query(after=day))[0]
+
+
+def test_domain_and_keyword_groups_filter_server_side():
+    service = FakeGmailService(num_messages=0, latency=0, per_item_latency=0)
+    tender = service.add_message(subject='Tender for UPS', sender='cppp@eprocure.gov.in')
+    service.add_message(subject='Tender for UPS', sender='news@vendor.com')
+    service.add_message(subject='Weekly newsletter', sender='admin@nic.in')
+    ids, _, estimate = list_message_ids(service, build_query(domains=['gov.in', 'nic.in'], keywords=['tender']))
+    assert ids == [tender] and estimate == 1
+
+
+def test_page_tokens_are_followed_up_to_max_results(monkeypatch):
+    monkeypatch.setattr(gmail_utils, 'MAX_PAGE_SIZE', 10)
+    service = FakeGmailService(num_messages=30, latency=0, per_item_latency=0)
+    emails = get_recent_emails(service, max_results=25)
+    assert len({e['id'] for e in emails}) == 25
+    # 10 + 10 + the last 5; the listing's remaining page is never requested.
+    assert service.calls['messages.list'] == 3
+    service.reset_counters()
+    assert len(get_recent_emails(service, max_results=100)) == 30
+    assert service.calls['messages.list'] == 3
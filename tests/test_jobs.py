@@ -0,0 +1,23 @@
+import time
+
+from fakes import FakeCohereClient, FakeGmailService
+from gmail_utils import get_recent_emails
+from jobs import JobQueue
+
+
+def test_latest_for_many_returns_newest_job_per_message(tmp_path):
+    service = FakeGmailService(num_messages=3, latency=0, attachment_rate=0)
+    emails = get_recent_emails(service, max_results=3)
+    co = FakeCohereClient(first_token_latency=0, token_latency=0, output_tokens=5)
+    queue = JobQueue(co, lambda: service, path=str(tmp_path / 'jobs.db'), trace_log=str(tmp_path / 'traces.jsonl'))
+    queue.submit(emails[0])
+    queue.submit(emails[1])
+    newest = queue.submit(emails[1], force=True)
+    ids = [email['id'] for email in emails]
+    deadline = time.monotonic() + 10
+    while queue.active_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    latest = queue.latest_for_many(ids)
+    assert set(latest) == set(ids[:2])
+    assert latest[ids[1]]['id'] == newest
+    assert all(latest[i]['id'] == queue.latest_for(i)['id'] for i in latest)
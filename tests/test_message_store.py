@@ -0,0 +1,89 @@
+from fakes import FakeGmailService
+from message_store import MessageStore
+from tracing import Trace
+
+
+def setup(tmp_path, messages=6):
+    service = FakeGmailService(num_messages=messages, latency=0, per_item_latency=0, attachment_rate=0.5)
+    store = MessageStore(str(tmp_path / 'messages.db'))
+    return service, store
+
+
+def ids(store):
+    return [email['id'] for email in store.recent()]
+
+
+def test_full_sync_lists_newest_first(tmp_path):
+    service, store = setup(tmp_path)
+    stats = store.sync(service, max_results=4)
+    assert stats['mode'] == 'full' and stats['fetched'] == 4
+    listed = service.users().messages().list(maxResults=4).execute()['messages']
+    assert ids(store) == [m['id'] for m in listed]
+    assert store.history_id() == service.users().getProfile().execute()['historyId']
+
+
+def test_incremental_add_label_removal_and_delete(tmp_path):
+    service, store = setup(tmp_path)
+    store.sync(service)
+    first, second = ids(store)[:2]
+    added = service.add_message(subject='Tender for UPS systems', has_attachment=True)
+    service.set_labels(first, remove=['INBOX'])
+    service.delete_message(second)
+    service.reset_counters()
+    stats = store.sync(service)
+    assert stats['mode'] == 'incremental'
+    assert stats['fetched'] == 2  # the new message and the archived one
+    assert stats['deleted'] == 2
+    assert ids(store)[0] == added
+    assert first not in ids(store) and second not in ids(store)
+    assert len(ids(store)) == 5
+    assert service.calls['messages.list'] == 0
+    stored = store.recent()[0]
+    assert stored['subject'] == 'Tender for UPS systems' and stored['has_attachment']
+
+
+def test_relabelled_message_comes_back(tmp_path):
+    service, store = setup(tmp_path)
+    store.sync(service)
+    message_id = ids(store)[-1]
+    service.set_labels(message_id, remove=['INBOX'])
+    store.sync(service)
+    service.set_labels(message_id, add=['INBOX'])
+    store.sync(service)
+    assert message_id in ids(store)
+
+
+def test_expired_history_falls_back_to_full_sync(tmp_path):
+    service, store = setup(tmp_path)
+    store.sync(service)
+    added = service.add_message()
+    service.expire_history()
+    stats = store.sync(service)
+    assert stats['mode'] == 'full'
+    assert ids(store)[0] == added
+    # The history id is current again, so the next sync is incremental.
+    assert store.sync(service)['mode'] == 'incremental'
+
+
+def test_messages_fetches_only_missing_ids(tmp_path):
+    service, store = setup(tmp_path, messages=8)
+    store.sync(service, max_results=4)
+    listed = [m['id'] for m in service.users().messages().list(maxResults=8).execute()['messages']]
+    page = [listed[6], listed[0], listed[5], listed[1]]
+    service.reset_counters()
+    assert [e['id'] for e in store.messages(service, page)] == page
+    assert service.calls['messages.get'] == 2
+    service.reset_counters()
+    store.messages(service, page)
+    assert service.calls['messages.get'] == 0
+
+
+def test_sync_and_fetches_are_traced(tmp_path):
+    service, store = setup(tmp_path)
+    trace = Trace('inbox', metrics=None)
+    store.sync(service, max_results=4, trace=trace)
+    store.messages(service, [m['id'] for m in service.users().messages().list(maxResults=6).execute()['messages']],
+                   trace=trace)
+    spans = {s['name']: s for s in trace.spans}
+    assert spans['gmail.sync']['fetched'] == 4 and spans['gmail.sync']['full'] == 1
+    assert spans['gmail.get_messages']['messages'] == 2
@@ -0,0 +1,51 @@
+from normalize import normalize_text
+
+
+def test_short_table_answers_are_kept():
+    text = 'Make in India applicable\nNo\nISO 9001 certificate\nYes\nEMD exemption\nNA\n(a)\n-----\n|||'
+    normalized, report = normalize_text(text)
+    assert normalized.splitlines() == ['Make in India applicable', 'No', 'ISO 9001 certificate', 'Yes',
+                                       'EMD exemption', 'NA', '(a)']
+    assert report['noise_lines'] == 2
+
+
+def test_words_broken_across_lines_are_joined():
+    assert normalize_text('e-procure-\nment portal')[0] == 'e-procurement portal'
+
+
+def test_hyphen_between_digits_is_kept():
+    normalized, _ = normalize_text('Turnover for FY 2023-\n24 and 10-\n12 days')
+    assert '202324' not in normalized
+    assert '2023-\n24' in normalized
+    assert '10-\n12' in normalized
+
+
+def test_repeated_page_header_kept_once():
+    clauses = ['Scope of work', 'Eligibility criteria', 'Payment terms', 'Penalty clauses', 'Contact details']
+    pages = [f'--- Page {i} ---\nAIIMS Delhi Tender No. 42 Page {i}\n{clause}' for i, clause in enumerate(clauses, 1)]
+    normalized, report = normalize_text('\n'.join(pages))
+    assert normalized.count('AIIMS Delhi Tender No.') == 1
+    assert report['boilerplate_lines'] == 4
+    assert all(clause in normalized for clause in clauses)
+
+
+def test_whitespace_and_invisible_characters():
+    normalized, _ = normalize_text('EMD​  Rs.\t50,000\n\n\n\nTender fee')
+    assert normalized == 'EMD Rs. 50,000\n\nTender fee'
+
+
+def test_lines_differing_only_in_numbers_are_kept():
+    pages = [f'--- Page {i} ---\nBill of Quantities\n' + '\n'.join(
+        f'Supply of 10 kVA UPS at Site {i * 10 + row} Qty {(i * 10 + row) * 3} Nos' for row in range(4))
+        + f'\nPage {i} of 6' for i in range(1, 7)]
+    normalized, report = normalize_text('\n'.join(pages))
+    assert all(f'Site {i * 10 + row} Qty' in normalized for i in range(1, 7) for row in range(4))
+    assert normalized.count('Bill of Quantities') == 1
+    assert normalized.count('of 6') == 1
+    assert report['boilerplate_lines'] == 10
+
+
+def test_repeated_body_line_is_not_boilerplate():
+    body = '\n'.join(f'Clause {name}' for name in 'ABCDEFGH')
+    pages = [f'--- Page {i} ---\nHeader\n{body}\nUPS make: any reputed brand\n{body}\nFooter' for i in range(1, 5)]
+    assert normalize_text('\n'.join(pages))[0].count('UPS make: any reputed brand') == 4
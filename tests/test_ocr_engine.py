@@ -0,0 +1,82 @@
+import random
+import shutil
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+import ocr_engine
+from extractors import extract_text_from_pdf_hybrid
+from fakes import make_text_pdf
+
+
+class InlinePool:
+    # Runs submissions in the test process and records how the pool was built.
+    instances = []
+
+    def __init__(self, max_workers, mp_context=None):
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.submitted = 0
+        self.shut_down = False
+        InlinePool.instances.append(self)
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+@pytest.fixture
+def inline_pool(monkeypatch):
+    InlinePool.instances.clear()
+    monkeypatch.setattr(ocr_engine, 'ProcessPoolExecutor', InlinePool)
+    monkeypatch.setattr(ocr_engine, '_ocr_page', lambda path, page, dpi, lang, folder: (f'text {page}', 0.1, 0.3))
+    return InlinePool.instances
+
+
+def test_workers_are_not_forked_from_the_app_process(inline_pool):
+    list(ocr_engine.iter_ocr_pages('tender.pdf', page_numbers=[1]))
+    assert inline_pool[0].mp_context.get_start_method() in ('forkserver', 'spawn')
+
+
+def test_pages_come_back_in_order_within_the_window(inline_pool):
+    pages = ocr_engine.iter_ocr_pages('tender.pdf', page_numbers=[2, 5, 7, 9], max_workers=1, window=2)
+    assert next(pages) == (2, 'text 2', 0.1, 0.3)
+    # The window was filled and refilled once before the first page was handed over.
+    assert inline_pool[0].submitted == 3
+    assert list(pages) == [(5, 'text 5', 0.1, 0.3), (7, 'text 7', 0.1, 0.3), (9, 'text 9', 0.1, 0.3)]
+    assert inline_pool[0].shut_down
+
+
+def test_hybrid_ocrs_only_scanned_pages_with_the_given_workers(inline_pool, tmp_path):
+    path = tmp_path / 'tender.pdf'
+    path.write_bytes(make_text_pdf([['Notice Inviting Tender for supply of UPS systems'], []]))
+    with open(path, 'rb') as f:
+        text, pages = extract_text_from_pdf_hybrid(f, ocr_workers=1)
+    assert [p['method'] for p in pages] == ['text', 'ocr']
+    assert pages[1]['cpu_seconds'] == 0.3
+    assert inline_pool[0].max_workers == 1
+    assert '--- Page 2 ---\ntext 2' in text
+
+
+@pytest.mark.skipif(not (shutil.which('tesseract') and shutil.which('pdftoppm')),
+                    reason='needs the tesseract and poppler binaries')
+def test_scanned_pdf_is_read_with_threads_running(tmp_path):
+    path = tmp_path / 'scan.pdf'
+    path.write_bytes(make_text_pdf([['EARNEST MONEY DEPOSIT']] * 2))
+    stop = threading.Event()
+    busy = threading.Thread(target=stop.wait)
+    busy.start()
+    try:
+        pages = list(ocr_engine.iter_ocr_pages(str(path), max_workers=2))
+    finally:
+        stop.set()
+        busy.join()
+    assert [page for page, _, _, _ in pages] == [1, 2]
+    assert all('EARNEST' in text.upper() for _, text, _, _ in pages)
+    assert all(cpu > 0 for _, _, _, cpu in pages)
@@ -0,0 +1,40 @@
+from concurrent.futures import Future
+
+import prefetch
+from prefetch import MIN_SCORE, score
+
+TENDER = {'from': 'CPPP <noreply@eprocure.gov.in>', 'subject': 'Tender for supply of UPS systems',
+          'has_attachment': True}
+
+
+def test_inline_logo_earns_no_attachment_bonus():
+    logo = dict(TENDER, attachments=[{'filename': 'image001.png', 'size': 12 * 1024}])
+    bare = dict(TENDER, has_attachment=False)
+    assert score(logo) == score(bare)
+
+
+def test_tender_document_scores_above_threshold():
+    email = dict(TENDER, attachments=[{'filename': 'image001.png', 'size': 12 * 1024},
+                                      {'filename': 'NIT.pdf', 'size': 800 * 1024}])
+    assert score(email) > score(dict(TENDER, has_attachment=False)) >= MIN_SCORE
+
+
+def test_oversized_attachment_is_never_prefetched():
+    email = dict(TENDER, attachments=[{'filename': 'drawings.pdf', 'size': 60 * 1024 * 1024}])
+    assert score(email) == 0.0
+
+
+def test_extraction_is_charged_in_cpu_seconds(tmp_path, monkeypatch):
+    calls = {}
+
+    def fake_fetch(service, message_id, trace, attachments, text_cache, ocr_workers=None):
+        calls['ocr_workers'] = ocr_workers
+        return {'text': 'Tender', 'extract_seconds': 2.0, 'cpu_seconds': 7.5}
+
+    monkeypatch.setattr(prefetch, 'fetch_and_extract', fake_fetch)
+    prefetcher = prefetch.Prefetcher(None, lambda: None, trace_log=str(tmp_path / 'traces.jsonl'))
+    entry = {'email': {'id': 'm1'}, 'future': Future(), 'cpu_seconds': 0.0, 'llm_calls': 0, 'seconds': 0.0}
+    prefetcher._extract(entry)
+    assert calls['ocr_workers'] == prefetch.OCR_WORKERS
+    assert entry['cpu_seconds'] == 7.5
+    assert prefetcher.stats()['cpu_seconds'] == 7.5
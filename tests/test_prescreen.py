@@ -0,0 +1,79 @@
+import pytest
+
+from prescreen import MAX_EVIDENCE, prescreen, prescreen_summary
+
+
+def verdict(text, name):
+    return prescreen(text)['criteria'][name]['verdict']
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Only Class-I local suppliers are eligible to bid.', 'disqualifying'),
+    ('Bidders must comply with the Make in India order.', 'disqualifying'),
+    ('Purchase preference to Make in India as per PPP-MII Order 2017.', 'review'),
+    ('Make in India clause: Not Applicable', 'no'),
+    ('MII: N/A', 'no'),
+    ('Delivery within 30 days of the purchase order.', 'not found'),
+])
+def test_make_in_india_needs_an_explicit_restriction(line, expected):
+    assert verdict(line, 'make_in_india') == expected
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Minimum average annual turnover of Rs. 50 Crore', 'disqualifying'),
+    ('Average annual turnover should be at least INR 3,500 Lakhs', 'disqualifying'),
+    ('Minimum average annual turnover: Rs. 20 Cr', 'ok'),
+    ('Minimum turnover Rs. 45 Crore (Rs. 25 Crore for MSEs)', 'ok'),
+    ('Minimum turnover of Rs. 2,00,00,000', 'ok'),
+    ('Turnover of the bidder in 2022-23: Rs. 120 Crore', 'review'),
+    ('Bidders with turnover above Rs. 500 Cr are exempted from EMD', 'review'),
+    ('Audited turnover statements for the last three years', 'not found'),
+])
+def test_turnover_disqualifies_only_on_a_requirement(line, expected):
+    assert verdict(line, 'turnover') == expected
+
+
+def test_requirement_anywhere_decides_turnover():
+    text = 'Turnover of OEM: Rs. 900 Crore\nMinimum average turnover of the bidder: Rs. 40 Crore'
+    assert verdict(text, 'turnover') == 'disqualifying'
+
+
+def test_gem_categories_and_iso():
+    assert verdict('Bid Type: BOQ', 'gem_boq') == 'ok'
+    assert verdict('Category: V2-Q2', 'gem_v2q2') == 'disqualifying'
+    assert verdict('ISO 9001:2015 and ISO/IEC 20000 certified', 'iso') == 'ok'
+    assert verdict('ISO 27001 certificate is mandatory', 'iso') == 'review'
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Bid category: V2-Q2', 'disqualifying'),
+    ('Open to V2  Q2 sellers only', 'disqualifying'),
+    ('Type of bid:\tV2\tQ2', 'disqualifying'),
+    ('This is not a V2 Q2 bid.', 'no'),
+    ('V2Q2 criteria: Not applicable', 'no'),
+    ('Sellers may refer to the V2 Q2 guidelines on the GeM portal.', 'review'),
+])
+def test_v2q2_needs_an_explicit_category(line, expected):
+    assert verdict(line, 'gem_v2q2') == expected
+
+
+def test_anchor_lookup_ignores_spacing():
+    result = prescreen('Category :  V2  -  Q  2\nTURN\tOVER  minimum  Rs. 40 Crore')
+    assert result['criteria']['gem_v2q2']['evidence'] == ['Category :  V2  -  Q  2']
+    assert result['criteria']['turnover']['verdict'] == 'disqualifying'
+
+
+def test_repeated_lines_are_one_piece_of_evidence():
+    text = '\n'.join(['Make in India: Not applicable'] * 10 + [f'MII clause {i} not applicable' for i in range(5)])
+    evidence = prescreen(text)['criteria']['make_in_india']['evidence']
+    assert evidence[0] == 'Make in India: Not applicable'
+    assert len(evidence) == MAX_EVIDENCE
+    assert len(set(evidence)) == MAX_EVIDENCE
+
+
+def test_summary_names_disqualifying_criteria():
+    result = prescreen('Only Class-I local suppliers are eligible.\nCategory: V2 Q2')
+    assert result['disqualified'] == ['make_in_india', 'gem_v2q2']
+    summary = prescreen_summary(result)
+    assert 'disqualified by Make in India clause, GEM bid in V2 Q2 category' in summary
+    assert '**Verdict**' in summary
@@ -0,0 +1,28 @@
+from report import parse_summary
+
+
+def test_parameters_and_values():
+    summary = ('# Tender Summary\n**Tender Name**\n- Supply of UPS\n**EMD**\n1. Rs. 50,000\n2. Exempt for MSEs\n'
+               'Some prose the model added\n')
+    assert parse_summary(summary) == ('Tender Summary', [('Tender Name', ['Supply of UPS']),
+                                                        ('EMD', ['Rs. 50,000', 'Exempt for MSEs'])])
+
+
+def test_duplicate_values_are_dropped_per_parameter():
+    heading, rows = parse_summary('**Location**\n- Pune\n- Pune\n**Contact**\n- Pune')
+    assert rows == [('Location', ['Pune']), ('Contact', ['Pune'])]
+
+
+def test_heading_defaults_and_bold_headings():
+    # Models sometimes put a markdown heading marker before the bold parameter.
+    heading, rows = parse_summary('## **Bid Dates**\n- 01-12-2026')
+    assert rows == [('Bid Dates', ['01-12-2026'])]
+    assert parse_summary('**Verdict**\n- Worth chasing') == ('Table', [('Verdict', ['Worth chasing'])])
+
+
+def test_items_before_a_parameter_and_empty_keys_are_ignored():
+    assert parse_summary('- stray\n****\n- orphan\n**Fee**\n-Rs. 500') == ('Table', [('Fee', ['Rs. 500'])])
+
+
+def test_empty_summary():
+    assert parse_summary('') == ('Table', [])
@@ -0,0 +1,48 @@
+from fakes import FakeCohereClient
+from retrieval import PASSAGE_CHARS, select_passages, split_passages
+from summarizer import RETRIEVAL_BUDGET_CHARS, planned_llm_calls, stream_retrieval_summary
+
+LONG_LINE = ' '.join(['Earnest Money Deposit of Rs. 5,00,000 and average annual turnover of 10 Crore'] * 1500)
+
+
+def test_passages_keep_page_numbers():
+    text = '--- Page 1 ---\nTender Notice\n--- Page 2 ---\nEMD Rs. 50,000'
+    assert split_passages(text) == [(1, 'Tender Notice'), (2, 'EMD Rs. 50,000')]
+
+
+def test_long_line_is_split_at_spaces():
+    passages = split_passages(LONG_LINE)
+    assert len(passages) > 1
+    assert all(len(passage) <= PASSAGE_CHARS for _, passage in passages)
+    assert ' '.join(passage for _, passage in passages).split() == LONG_LINE.split()
+
+
+def test_single_line_document_is_selected():
+    selected, report = select_passages(LONG_LINE, RETRIEVAL_BUDGET_CHARS)
+    assert report['chars_after'] > 0
+    assert 'Earnest Money Deposit' in selected
+
+
+def test_selection_stays_within_budget():
+    text = '\n\n'.join(f'Section {i}: the EMD is Rs. {i},000 and the tender fee is Rs. 500.' for i in range(2000))
+    selected, report = select_passages(text, 5000)
+    assert report['selected'] > 0
+    assert len(selected.replace('\n[...]', '')) <= 5000
+
+
+def test_summary_never_sent_without_document():
+    co = FakeCohereClient(first_token_latency=0, token_latency=0, output_tokens=20)
+    stats = {}
+    # A budget smaller than any passage selects nothing; the document is summarized in parts instead.
+    list(stream_retrieval_summary(co, LONG_LINE, stats=stats, budget_chars=10))
+    assert stats['mode'] == 'map_reduce'
+    assert all(stage['prompt_chars'] > 1000 for stage in stats['stages'] if stage['stage'] == 'map')
+
+
+def test_planned_calls_follow_the_fallback():
+    co = FakeCohereClient(first_token_latency=0, token_latency=0, output_tokens=20)
+    for budget in (10, RETRIEVAL_BUDGET_CHARS):
+        stats = {}
+        list(stream_retrieval_summary(co, LONG_LINE, stats=stats, budget_chars=budget))
+        assert planned_llm_calls(LONG_LINE, 'retrieval', budget_chars=budget) == len(stats['stages'])
+    assert planned_llm_calls(LONG_LINE, 'retrieval', budget_chars=10) > 1
@@ -0,0 +1,61 @@
+import summary_cache
+from fakes import FakeCohereClient
+from summarizer import stream_summary_from_cohere
+from summary_cache import SummaryCache
+
+TEXT = 'Tender for supply of transformers. EMD Rs. 50,000.'
+
+
+class UnbilledClient(FakeCohereClient):
+    # Some responses arrive without billed units; they are still model calls.
+    def chat_stream(self, **kwargs):
+        for chunk in super().chat_stream(**kwargs):
+            if getattr(chunk, 'event_type', None) != 'stream-end':
+                yield chunk
+
+
+def summarize(co, cache):
+    stats = {}
+    text = ''.join(stream_summary_from_cohere(co, TEXT, cache=cache, stats=stats))
+    return text, [stage['cached'] for stage in stats['stages']]
+
+
+def test_cached_flag_comes_from_the_cache(tmp_path):
+    co = UnbilledClient(first_token_latency=0, token_latency=0, output_tokens=20)
+    cache = SummaryCache(str(tmp_path / 'cache.db'))
+    first, first_cached = summarize(co, cache)
+    second, second_cached = summarize(co, cache)
+    assert first_cached == [False]
+    assert second_cached == [True]
+    assert second == first
+
+
+def test_uncached_stream_is_a_model_call():
+    co = UnbilledClient(first_token_latency=0, token_latency=0, output_tokens=20)
+    assert summarize(co, None)[1] == [False]
+
+
+def test_eviction_drops_expired_then_least_recently_used(tmp_path, monkeypatch):
+    clock = [0]
+    monkeypatch.setattr(summary_cache.time, 'time', lambda: clock[0])
+    cache = SummaryCache(str(tmp_path / 'cache.db'), max_bytes=300, max_age=100)
+
+    def put(key, at):
+        clock[0] = at
+        cache.put(key, key * 100, 'model', 1)
+
+    def keys():
+        return {row[0] for row in cache._conn.execute('SELECT key FROM summaries')}
+
+    put('a', 0)
+    put('b', 10)
+    put('c', 20)
+    clock[0] = 25
+    assert cache.get('a') == 'a' * 100
+    # Over the byte limit: the least recently used entry goes, not the oldest one.
+    put('d', 30)
+    assert keys() == {'a', 'c', 'd'}
+    # Past max_age 'a' and 'c' expire, although 'a' was used most recently.
+    put('e', 130)
+    assert keys() == {'d', 'e'}
+    assert cache.get('a') is None and cache.get('d') == 'd' * 100
@@ -0,0 +1,73 @@
+from prescreen import prescreen
+from tender_store import TenderStore, extract_record, match_query
+
+SUMMARY = """# Tender Summary
+**Tender Reference No.**: GEM/2026/B/123456
+**Tender Name**
+- Supply of 10 kVA online UPS systems
+- Installation at 12 sites
+### Issuing Organization
+AIIMS Delhi
+- **EMD**: Rs. 5,00,000
+Location: New Delhi
+**Bid Submission End Date**
+- 30-11-2026
+**Eligibility**
+- Make in India clause: No
+- Average turnover above 30 Crore: Not able to find
+**Final Summary**
+- High Value Lead. Win probability: Medium. Worth chasing.
+"""
+
+
+def test_labels_in_every_style_fill_fields():
+    record = extract_record(SUMMARY)
+    assert record['reference'] == 'GEM/2026/B/123456'
+    assert record['tender_name'] == 'Supply of 10 kVA online UPS systems\nInstallation at 12 sites'
+    assert record['organization'] == 'AIIMS Delhi'
+    assert record['emd'] == 'Rs. 5,00,000'
+    assert record['location'] == 'New Delhi'
+    assert record['bid_dates'] == '30-11-2026'
+    assert record['contact'] is None
+
+
+def test_lead_verdicts():
+    record = extract_record(SUMMARY)
+    assert record['lead_qualification'] == 'High Value Lead'
+    assert record['win_probability'] == 'Medium'
+    assert record['worth_chasing'] == 'yes'
+    assert extract_record('Verdict: not really worth chasing')['worth_chasing'] == 'no'
+    # A probability on the next line belongs to some other sentence.
+    assert extract_record('Win probability\nLow value lead')['win_probability'] is None
+
+
+def test_eligibility_answers_sit_next_to_prescreen():
+    screen = prescreen('Only Class-I local suppliers are eligible.')
+    record = extract_record(SUMMARY, screen)
+    assert record['verdicts']['make_in_india'] == {'label': 'Make in India clause', 'summary': 'no',
+                                                   'prescreen': 'disqualifying'}
+    assert record['verdicts']['turnover']['summary'] == 'not found'
+    assert record['disqualified'] == 1
+    assert extract_record(SUMMARY)['disqualified'] is None
+
+
+def test_match_query_keeps_chunks_together():
+    assert match_query('AIIMS-Delhi 5,00,000') == '"AIIMS Delhi"* "5 00 000"*'
+    assert match_query('  "ups"  ') == '"ups"*'
+    assert match_query('-- ?') == ''
+
+
+def test_search_by_text_and_filters(tmp_path):
+    store = TenderStore(str(tmp_path / 'tenders.db'))
+    email = {'id': 'm1', 'subject': 'Tender for UPS', 'from': 'aiims@gov.in', 'internal_date': 1_700_000_000_000}
+    store.add(email, SUMMARY)
+    store.add({'id': 'm2', 'subject': 'Newsletter'}, '**Final Summary**\n- Low value lead. Not worth chasing.')
+    results, total = store.search('aiims del')
+    assert total == 1 and results[0]['message_id'] == 'm1'
+    assert '[' in results[0]['snippet'] and '**' not in results[0]['snippet']
+    assert store.search(worth_chasing='no')[0][0]['message_id'] == 'm2'
+    assert store.search(since=1_700_000_000)[1] == 2
+    # Re-adding a message replaces its record and search row.
+    store.add(email, SUMMARY.replace('AIIMS Delhi', 'PGIMER Chandigarh'))
+    assert store.search('aiims')[1] == 0
+    assert store.count() == 2
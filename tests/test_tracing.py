@@ -0,0 +1,63 @@
+import json
+import re
+import time
+
+from tracing import BUCKETS, Metrics, Trace, span
+
+
+def slow_stream(first_delay, chunks):
+    time.sleep(first_delay)
+    yield from chunks
+
+
+def test_stream_records_time_to_first_token(tmp_path):
+    metrics = Metrics()
+    trace = Trace('generate', metrics=metrics, message_id='m1')
+    chunks = list(trace.stream('llm.summary', slow_stream(0.05, ['Tender ', 'summary']),
+                               totals=lambda: {'output_tokens': 3}))
+    assert chunks == ['Tender ', 'summary']
+    record = trace.finish(str(tmp_path / 'traces.jsonl'), status='done')
+    spans = {s['name']: s for s in record['spans']}
+    assert spans['llm.summary.first_token']['seconds'] >= 0.05
+    assert spans['llm.summary']['seconds'] >= spans['llm.summary.first_token']['seconds']
+    assert spans['llm.summary']['chars'] == len('Tender summary')
+    assert spans['llm.summary']['output_tokens'] == 3
+    logged = json.loads((tmp_path / 'traces.jsonl').read_text())
+    assert logged['message_id'] == 'm1' and logged['status'] == 'done'
+    assert {row['stage'] for row in metrics.snapshot()} == {'llm.summary', 'llm.summary.first_token'}
+
+
+def test_empty_stream_has_no_first_token():
+    trace = Trace('generate', metrics=None)
+    assert list(trace.stream('llm.summary', iter([]))) == []
+    assert [s['name'] for s in trace.spans] == ['llm.summary']
+
+
+def test_prometheus_histogram_and_counters():
+    metrics = Metrics()
+    metrics.observe('extract', 0.2, pages=3, method='ocr')
+    metrics.observe('extract', 7.0, pages=5)
+    metrics.observe('gmail.sync', 0.04, fetched=20)
+    text = metrics.prometheus(prefix='app')
+    lines = text.splitlines()
+    assert lines[:2] == ['# HELP app_stage_seconds Time spent per pipeline stage.',
+                         '# TYPE app_stage_seconds histogram']
+    buckets = [int(line.rsplit(' ', 1)[1]) for line in lines
+               if line.startswith('app_stage_seconds_bucket{stage="extract"')]
+    # Cumulative: one observation at or under 0.25s, both by 10s and +Inf.
+    assert len(buckets) == len(BUCKETS) + 1
+    assert buckets == sorted(buckets) and buckets[BUCKETS.index(0.25)] == 1 and buckets[-1] == 2
+    assert 'app_stage_seconds_sum{stage="extract"} 7.200000' in lines
+    assert 'app_stage_seconds_count{stage="extract"} 2' in lines
+    assert lines[lines.index('# TYPE app_stage_pages_total counter') + 1] == 'app_stage_pages_total{stage="extract"} 8'
+    assert 'app_stage_fetched_total{stage="gmail.sync"} 20' in lines
+    # String counters are not exported.
+    assert 'method' not in text
+    sample = re.compile(r'^app_stage_\w+(\{[^}]*\})? [\d.e+-]+$')
+    assert all(line.startswith('#') or sample.match(line) for line in lines)
+
+
+def test_span_without_trace_is_a_no_op():
+    with span(None, 'extract', pages=1) as counters:
+        counters['chars'] = 10
+    assert counters == {'pages': 1, 'chars': 10}
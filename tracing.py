@@ -0,0 +1,163 @@
+# tracing.py
+# Lightweight tracing for one Generate click (or one batch email). A Trace collects
+# timed spans with byte/page/token counters; finished traces are appended to a JSON
+# lines log and folded into process-wide stage metrics with a Prometheus text export.
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+TRACE_LOG = 'traces.jsonl'
+# Histogram bucket bounds in seconds.
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Recent durations kept per stage for the p50/p95 shown in the debug panel.
+SAMPLES = 500
+
+_log_lock = threading.Lock()
+
+
+def cpu_seconds():
+    # CPU time of the calling thread plus that of finished child processes (Tesseract
+    # and poppler run as children); only the thread's own time without `resource`.
+    try:
+        import resource
+    except ImportError:
+        return time.thread_time()
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.thread_time() + usage.ru_utime + usage.ru_stime
+
+
+def _counters(values):
+    return {k: v for k, v in values.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def observe(self, stage, seconds, **counters):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {
+                'count': 0, 'sum': 0.0, 'buckets': [0] * len(BUCKETS), 'samples': deque(maxlen=SAMPLES), 'counters': {}
+            })
+            entry['count'] += 1
+            entry['sum'] += seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry['buckets'][i] += 1
+            entry['samples'].append(seconds)
+            for name, value in _counters(counters).items():
+                entry['counters'][name] = entry['counters'].get(name, 0) + value
+
+    def snapshot(self):
+        rows = []
+        with self._lock:
+            for stage, entry in sorted(self._stages.items()):
+                samples = sorted(entry['samples'])
+                rows.append({
+                    'stage': stage,
+                    'count': entry['count'],
+                    'total_seconds': entry['sum'],
+                    'p50_seconds': samples[len(samples) // 2],
+                    'p95_seconds': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+                    **entry['counters'],
+                })
+        return rows
+
+    def prometheus(self, prefix='salesapp'):
+        lines = [f'# HELP {prefix}_stage_seconds Time spent per pipeline stage.',
+                 f'# TYPE {prefix}_stage_seconds histogram']
+        counter_lines = {}
+        with self._lock:
+            for stage, entry in sorted(self._stages.items()):
+                label = f'stage="{stage}"'
+                for bound, count in zip(BUCKETS, entry['buckets']):
+                    lines.append(f'{prefix}_stage_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{prefix}_stage_seconds_bucket{{{label},le="+Inf"}} {entry["count"]}')
+                lines.append(f'{prefix}_stage_seconds_sum{{{label}}} {entry["sum"]:.6f}')
+                lines.append(f'{prefix}_stage_seconds_count{{{label}}} {entry["count"]}')
+                for name, value in sorted(entry['counters'].items()):
+                    counter_lines.setdefault(name, []).append(f'{prefix}_stage_{name}_total{{{label}}} {value:g}')
+        for name, samples in sorted(counter_lines.items()):
+            lines.append(f'# TYPE {prefix}_stage_{name}_total counter')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics()
+
+
+class Trace:
+    def __init__(self, name, metrics=METRICS, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.metrics = metrics
+        self.spans = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **counters):
+        # Yields the counter dict so the caller can fill in bytes/pages/tokens as it goes.
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.record(name, time.perf_counter() - start, start=start, **counters)
+
+    def record(self, name, seconds, start=None, **counters):
+        if start is None:
+            start = time.perf_counter() - seconds
+        span = {'name': name, 'start': round(start - self._start, 6), 'seconds': round(seconds, 6),
+                **_counters(counters)}
+        with self._lock:
+            self.spans.append(span)
+        if self.metrics is not None:
+            self.metrics.observe(name, seconds, **counters)
+
+    def stream(self, name, chunks, totals=None, **counters):
+        # Pass a text stream through, recording time to the first chunk and the whole stream.
+        # `totals` is called once the stream ends for counters only known then (tokens).
+        with self.span(name, **counters) as span:
+            start = time.perf_counter()
+            chars = 0
+            first = True
+            for chunk in chunks:
+                if first:
+                    self.record(f'{name}.first_token', time.perf_counter() - start, start=start)
+                    first = False
+                chars += len(chunk)
+                yield chunk
+            span['chars'] = chars
+            if totals is not None:
+                span.update(totals())
+
+    def finish(self, log_path=None, **attributes):
+        self.attributes.update(attributes)
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s['start'])
+        record = {'trace': self.name, 'started_at': self.started_at, **self.attributes,
+                  'seconds': round(time.perf_counter() - self._start, 6), 'spans': spans}
+        if log_path:
+            with _log_lock, open(log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        return record
+
+
+def llm_totals(stats):
+    # Span counters from the per-call stages summarizer stats collect.
+    stages = stats.get('stages', [])
+    return {
+        'calls': len(stages),
+        'input_tokens': sum(s.get('input_tokens', 0) for s in stages),
+        'output_tokens': sum(s.get('output_tokens', 0) for s in stages),
+        'prompt_chars': sum(s['prompt_chars'] for s in stages),
+    }
+
+
+def span(trace, name, **counters):
+    # Tracing is optional everywhere; without a trace this is a no-op context.
+    return trace.span(name, **counters) if trace is not None else nullcontext(counters)